@@ -1,10 +1,31 @@
 from http.server import BaseHTTPRequestHandler
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
 import os
 import sys
+import json
+import time
 
 # Import the simple site generator
 from simple_site import main as generate_site
 
+# The search modules live in the repository root, next to generate_site.py
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from search_index import INDEX_DIR
+from search import IndexSearch
+
+# Prebuilt search index; without it, the index is built in memory from search-data.json
+SEARCH_INDEX_DIR = os.environ.get('SEARCH_INDEX_DIR', os.path.join(ROOT_DIR, INDEX_DIR))
+SEARCH_DATA_PATH = os.environ.get('SEARCH_DATA_PATH', os.path.join(ROOT_DIR, 'output/assets/data/search-data.json'))
+
+# Answers kept per warm instance, least recently used evicted first
+SEARCH_CACHE_SIZE = 1024
+
+# Longest query answered
+MAX_QUERY_LENGTH = 100
+
 # Run the site generation on startup
 try:
     generate_site()
@@ -12,9 +33,91 @@ try:
 except Exception as e:
     print(f"Error during site generation: {e}")
 
+# Loaded by the first search of an instance and reused while it stays warm
+search_index = None
+search_index_ms = None
+search_cache = OrderedDict()
+
+def load_search_index():
+    """Return the search index, loading it on the first call (the cold start)."""
+    global search_index, search_index_ms
+    if search_index is None:
+        start = time.perf_counter()
+        if os.path.isfile(os.path.join(SEARCH_INDEX_DIR, 'manifest.json')):
+            index = IndexSearch(SEARCH_INDEX_DIR)
+        else:
+            index = IndexSearch.from_search_data(SEARCH_DATA_PATH)
+        index.preload()
+        search_index = index
+        search_index_ms = (time.perf_counter() - start) * 1000
+        print(f"Search index {index.path} loaded in {search_index_ms:.1f} ms")
+    return search_index
+
+def answer_search(kind, query):
+    """Return (answer, whether it came from the cache) for a search or suggest query."""
+    # Answers only depend on the normalized text, so case and spacing share an entry
+    key = (kind, ' '.join(query.lower().split()))
+    if key in search_cache:
+        search_cache.move_to_end(key)
+        return search_cache[key], True
+    index = load_search_index()
+    if kind == 'suggest':
+        answer = {'results': index.suggest(query)[0]}
+    else:
+        answer = index.search(query)[0]
+    answer = json.loads(json.dumps(answer))
+    for result in answer.get('results', []):
+        # Only the fields search-handler.js shows
+        for field in ('strings', 'relevance', 'score', 'type'):
+            result.pop(field, None)
+    search_cache[key] = answer
+    if len(search_cache) > SEARCH_CACHE_SIZE:
+        search_cache.popitem(last=False)
+    return answer, False
+
 class Handler(BaseHTTPRequestHandler):
     def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        # vercel.json rewrites /api/search to this function, which may see either path
+        if url.path.rstrip('/') == '/api/search' or (url.path.rstrip('/') == '/api/index' and 'q' in params):
+            self.send_search(params)
+            return
         self.send_response(200)
         self.send_header('Content-type', 'text/plain')
         self.end_headers()
-        self.wfile.write('Site generation complete! The static site should be available.'.encode()) 
\ No newline at end of file
+        self.wfile.write('Site generation complete! The static site should be available.'.encode())
+
+    def send_search(self, params):
+        """Answer /api/search?q=...&type=search|suggest with the JSON a search-worker.js message gets."""
+        start = time.perf_counter()
+        query = params.get('q', [''])[0].strip()
+        kind = params.get('type', ['search'])[0]
+        if not query or len(query) > MAX_QUERY_LENGTH or kind not in ('search', 'suggest'):
+            self.send_json(400, {'error': f'Pass a query of up to {MAX_QUERY_LENGTH} characters as q, '
+                                          'and type=search or suggest.'})
+            return
+        cold = search_index is None
+        try:
+            answer, cached = answer_search(kind, query)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading the search index: {e}")
+            self.send_json(503, {'error': 'Search is unavailable. Please try again later.'})
+            return
+        search_ms = (time.perf_counter() - start) * 1000
+        # Cold requests include loading the index; warm ones only the lookup
+        state = 'cached' if cached else 'cold' if cold else 'warm'
+        timing = f'search;dur={search_ms:.2f};desc="{state}"'
+        if cold:
+            timing += f', index;dur={search_index_ms:.2f}'
+        self.send_json(200, answer, {'Server-Timing': timing, 'Cache-Control': 'public, max-age=300'})
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
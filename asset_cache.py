@@ -0,0 +1,111 @@
+"""
+Write-if-changed helpers for the static assets of the generated website.
+A manifest next to output/ remembers the hash, size and mtime of every asset
+written, so an unchanged asset costs a stat() on the next build instead of a
+rewrite. Large binaries are hardlinked from their source when possible.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+
+MANIFEST_PATH = '.asset-manifest.json'
+
+# Binaries at least this large are hardlinked instead of copied
+LINK_THRESHOLD = 64 * 1024
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """Load the asset manifest, or return an empty one."""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    """Save the asset manifest."""
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def stat_or_none(path):
+    """Return os.stat(path), or None if the file does not exist."""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+def is_recorded(entry, st):
+    """Check that a file still matches what the manifest recorded for it."""
+    return (entry is not None and st is not None
+            and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns)
+
+def record(manifest, path, sha256, source=None):
+    """Record the current state of path (and of its source file) in the manifest."""
+    st = os.stat(path)
+    manifest[path] = {'sha256': sha256, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    if source is not None:
+        manifest[path]['source'] = [source.st_size, source.st_mtime_ns]
+
+def write_if_changed(manifest, path, content):
+    """Write text content to path unless the file already holds it.
+
+    Returns True if the file was written.
+    """
+    data = content.encode('utf-8')
+    sha256 = hashlib.sha256(data).hexdigest()
+    entry = manifest.get(path)
+    st = stat_or_none(path)
+    if is_recorded(entry, st) and entry['sha256'] == sha256:
+        return False
+    if st is not None and st.st_size == len(data) and file_hash(path) == sha256:
+        record(manifest, path, sha256)
+        return False
+
+    with open(path, 'wb') as f:
+        f.write(data)
+    record(manifest, path, sha256)
+    return True
+
+def copy_if_changed(manifest, src, dst):
+    """Copy src to dst unless dst already has the same content.
+
+    Large files are hardlinked, falling back to a copy across filesystems.
+    Returns True if dst was (re)created.
+    """
+    src_st = os.stat(src)
+    entry = manifest.get(dst)
+    dst_st = stat_or_none(dst)
+    if is_recorded(entry, dst_st) and entry.get('source') == [src_st.st_size, src_st.st_mtime_ns]:
+        return False
+    if dst_st is not None and os.path.samestat(src_st, dst_st):
+        record(manifest, dst, file_hash(src), src_st)
+        return False
+
+    sha256 = file_hash(src)
+    if dst_st is not None and dst_st.st_size == src_st.st_size and file_hash(dst) == sha256:
+        record(manifest, dst, sha256, src_st)
+        return False
+
+    if dst_st is not None:
+        os.remove(dst)
+    linked = False
+    if src_st.st_size >= LINK_THRESHOLD:
+        try:
+            # link() does not follow symlinks on every platform
+            os.link(os.path.realpath(src), dst)
+            linked = True
+        except OSError:
+            pass
+    if not linked:
+        shutil.copyfile(src, dst)
+    record(manifest, dst, sha256, src_st)
+    return True
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+End-to-end scaling benchmark for generate_site.py.
+Builds the whole site from synthetic datasets at several multiples of a base
+size (1x, 10x and 100x by default), each in its own scratch directory, and
+records wall time, peak RSS and output bytes. Prints the scaling curve (the
+log-log slope between sizes is ~1.0 for a linear build) and compares it
+against a stored baseline.
+
+Example:
+    python benchmark_build.py --scales 1,10 --save build-baseline.json
+    python benchmark_build.py --scales 1,10 --baseline build-baseline.json
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+from generate_synthetic_data import generate_companies, write_companies
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Static files generate_site.py copies from its working directory
+BUILD_INPUTS = ['scissor-lift.jpeg', 'scissor-lift-favicon.png']
+
+def directory_size(directory):
+    """Return the total size of the files below directory, in bytes."""
+    total = 0
+    for root, _, files in os.walk(directory):
+        for file in files:
+            total += os.path.getsize(os.path.join(root, file))
+    return total
+
+def run_build(work_dir, data_path):
+    """Run generate_site.py in work_dir and return (wall seconds, peak RSS bytes)."""
+    with open(os.path.join(work_dir, 'build.log'), 'w') as log:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, os.path.join(ROOT, 'generate_site.py'), '--input', data_path],
+                                   cwd=work_dir, stdout=log, stderr=subprocess.STDOUT)
+        # wait4 gives the resource usage of this child alone
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(f"Build failed, see {os.path.join(work_dir, 'build.log')}")
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    return wall, peak_rss
+
+def benchmark_scale(scale, base_rows, base_cities, seed, keep):
+    """Build the site at one dataset scale and return its measurements."""
+    work_dir = tempfile.mkdtemp(prefix=f'build-{scale}x-')
+    try:
+        for name in BUILD_INPUTS:
+            os.symlink(os.path.join(ROOT, name), os.path.join(work_dir, name))
+        rows = base_rows * scale
+        data_path = os.path.join(work_dir, 'companies.csv')
+        write_companies(generate_companies(rows, city_count=base_cities * scale, seed=seed), data_path)
+
+        wall, peak_rss = run_build(work_dir, data_path)
+        with open(os.path.join(work_dir, 'build-report.json'), 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        return {
+            'scale': scale,
+            'rows': rows,
+            'pages': report['total']['pages'],
+            'wall_s': wall,
+            'peak_rss_bytes': peak_rss,
+            'output_bytes': directory_size(os.path.join(work_dir, 'output')),
+            'phases': {phase['name']: phase['wall_s'] for phase in report['phases']},
+        }
+    finally:
+        if keep:
+            print(f"Kept build directory {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+def scaling_exponent(smaller, larger, metric):
+    """Return the log-log slope of metric between two runs (1.0 = linear)."""
+    if smaller[metric] <= 0 or larger[metric] <= 0 or larger['rows'] == smaller['rows']:
+        return None
+    return math.log(larger[metric] / smaller[metric]) / math.log(larger['rows'] / smaller['rows'])
+
+def print_results(results, baseline=None):
+    """Print the scaling curve, and the change against a baseline if given."""
+    previous = {result['scale']: result for result in baseline or []}
+    print(f"{'Scale':>6}{'Rows':>10}{'Pages':>9}{'Wall (s)':>10}{'ms/page':>9}{'Peak RSS (MB)':>15}"
+          f"{'Output (MB)':>13}{'Slope':>7}{'vs baseline':>13}")
+    for index, result in enumerate(results):
+        slope = scaling_exponent(results[index - 1], result, 'wall_s') if index else None
+        old = previous.get(result['scale'])
+        change = f"{result['wall_s'] / old['wall_s'] - 1:+.1%}" if old else '-'
+        print(f"{str(result['scale']) + 'x':>6}{result['rows']:>10,}{result['pages']:>9,}{result['wall_s']:>10.2f}"
+              f"{result['wall_s'] * 1000 / max(result['pages'], 1):>9.2f}{result['peak_rss_bytes'] / 2**20:>15.1f}"
+              f"{result['output_bytes'] / 2**20:>13.1f}{f'{slope:.2f}' if slope is not None else '-':>7}{change:>13}")
+
+    slowest = results[-1]['phases']
+    print("Phase wall time at the largest scale:")
+    for name, wall in sorted(slowest.items(), key=lambda item: -item[1]):
+        print(f"  {name:<14}{wall:>10.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the full site build at several dataset sizes')
+    parser.add_argument('--scales', default='1,10,100', help='Comma-separated multiples of the base dataset')
+    parser.add_argument('--base-rows', type=int, default=5000, help='Company listings at 1x')
+    parser.add_argument('--base-cities', type=int, default=2250, help='Distinct cities at 1x')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+    parser.add_argument('--save', help='Write the results to this JSON file (e.g. as a new baseline)')
+    parser.add_argument('--baseline', help='Compare against results saved with --save')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch build directories')
+
+    args = parser.parse_args()
+
+    results = []
+    for scale in sorted(int(value) for value in args.scales.split(',')):
+        print(f"Building at {scale}x ({args.base_rows * scale:,} rows)...")
+        results.append(benchmark_scale(scale, args.base_rows, args.base_cities, args.seed, args.keep))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'base_rows': args.base_rows, 'base_cities': args.base_cities, 'seed': args.seed,
+                       'results': results}, f, indent=2)
+        print(f"Results saved to {args.save}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the per-row and per-page helpers in site_helpers.py.
+Reports the latency and peak allocation of each call for representative and
+adversarial inputs, and can compare against a saved baseline so regressions
+in these hot paths show up before a full build.
+
+Example:
+    python benchmark_helpers.py --save benchmark-helpers.json
+    python benchmark_helpers.py --baseline benchmark-helpers.json
+"""
+
+import sys
+import json
+import timeit
+import argparse
+import tracemalloc
+
+from site_helpers import (generate_state_description, generate_city_description, clean_url, clean_image_url,
+                          format_hours, format_about, to_slug)
+
+GOOGLE_PHOTO = 'https://lh5.googleusercontent.com/p/AF1QipPx3kQ8Hn2xYd0WmVJt4Wq9Zbq7vGkqF1c8Qm5Z=w408-h306-k-no'
+HOURS = json.dumps({'Monday': '7AM-5PM', 'Tuesday': '7AM-5PM', 'Wednesday': '7AM-5PM', 'Thursday': '7AM-5PM',
+                    'Friday': '7AM-5PM', 'Saturday': 'Closed', 'Sunday': 'Closed'})
+ABOUT = json.dumps({
+    'Service options': {'Onsite services': True, 'Online appointments': True, 'Delivery': False},
+    'Accessibility': {'Wheelchair accessible entrance': True},
+    'Payments': {'Credit cards': True, 'Debit cards': True},
+})
+
+# Latency changes smaller than this are timer noise, not regressions
+MIN_LATENCY_DELTA_NS = 500
+
+# (function, case name, arguments)
+CASES = [
+    (clean_url, 'empty', ('',)),
+    (clean_url, 'plain', ('https://www.sunbeltrentals.com/',)),
+    (clean_url, 'utm', ('https://www.unitedrentals.com/locations/tx/austin/?utm_source=gmb&utm_medium=organic&utm_campaign=local',)),
+    (clean_url, 'long query', ('https://example.com/rent?' + '&'.join(f'p{i}={i}' for i in range(200)) + '&utm_source=x',)),
+
+    (clean_image_url, 'empty', ('',)),
+    (clean_image_url, 'google photo', (GOOGLE_PHOTO,)),
+    (clean_image_url, 'plain', ('www.example.com/images/lift.jpg',)),
+    (clean_image_url, 'truncated', ('https://lh5.googleusercontent.com/p/AF1Qip...',)),
+    (clean_image_url, 'streetview', ('https://streetviewpixels-pa.googleapis.com/v1/thumbnail?panoid=abc&cb_client=search&w=203&h=100&yaw=1',)),
+    (clean_image_url, 'many size segments', ('https://lh3.googleusercontent.com/x' + ''.join(f'=s{i}=w{i}=h{i}' for i in range(300)),)),
+    (clean_image_url, 'percent encoded', ('https://lh3.googleusercontent.com/' + '%2F%3D%20' * 300,)),
+
+    (format_hours, 'empty', ('',)),
+    (format_hours, 'json', (HOURS,)),
+    (format_hours, 'single quotes', (HOURS.replace('"', "'"),)),
+    (format_hours, 'malformed', ("{'Monday': '7AM-5PM', 'Tuesday': '7AM",)),
+    (format_hours, 'large malformed', ('{"Monday": "' + '7AM-5PM, ' * 2000,)),
+
+    (format_about, 'empty', ('',)),
+    (format_about, 'nested', (ABOUT,)),
+    (format_about, 'malformed', ('{"Service options": {"Onsite services": tru',)),
+    (format_about, 'large nested', (json.dumps({f'Category {c}': {f'Feature {f}': f % 2 == 0 for f in range(20)}
+                                                for c in range(50)}),)),
+
+    (to_slug, 'empty', ('',)),
+    (to_slug, 'city', ('Fort Worth',)),
+    (to_slug, 'punctuation', ("St. Mary's - Coeur d'Alene (North)",)),
+    (to_slug, 'long', ('Lake Havasu City ' * 100,)),
+
+    (generate_state_description, 'state', ('Texas',)),
+    (generate_city_description, 'city', ('Austin', 'Texas')),
+]
+
+def measure_latency(function, args, repeat=3):
+    """Return the best per-call latency in nanoseconds."""
+    timer = timeit.Timer(lambda: function(*args))
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e9
+
+def measure_allocation(function, args, calls=20):
+    """Return the largest peak allocation of a single call, in bytes."""
+    function(*args)  # warm up caches such as compiled regexes
+    tracemalloc.start()
+    try:
+        peak = 0
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            function(*args)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def run_benchmarks(name_filter=None):
+    """Run every benchmark case and return a list of results."""
+    results = []
+    for function, case, args in CASES:
+        name = f'{function.__name__}[{case}]'
+        if name_filter and name_filter not in name:
+            continue
+        results.append({
+            'name': name,
+            'ns_per_call': measure_latency(function, args),
+            'peak_bytes_per_call': measure_allocation(function, args),
+        })
+    return results
+
+def compare_to_baseline(results, baseline, threshold):
+    """Return the cases whose latency or allocation grew by more than threshold."""
+    previous = {result['name']: result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(result['name'])
+        if not old:
+            continue
+        for metric in ('ns_per_call', 'peak_bytes_per_call'):
+            if metric == 'ns_per_call' and result[metric] - old[metric] < MIN_LATENCY_DELTA_NS:
+                continue
+            if old[metric] and result[metric] > old[metric] * (1 + threshold):
+                regressions.append((result['name'], metric, old[metric], result[metric]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark the data cleaning and formatting helpers')
+    parser.add_argument('--filter', help='Only run cases whose name contains this text')
+    parser.add_argument('--save', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against results saved with --save')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown before flagging (0.25 = 25%%)')
+
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.filter)
+    print(f"{'Case':<50}{'ns/call':>12}{'peak bytes/call':>18}")
+    for result in results:
+        print(f"{result['name']:<50}{result['ns_per_call']:>12,.0f}{result['peak_bytes_per_call']:>18,}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare_to_baseline(results, json.load(f), args.threshold)
+        for name, metric, old, new in regressions:
+            print(f"REGRESSION {name} {metric}: {old:,.0f} -> {new:,.0f} ({new / old - 1:+.0%})")
+        print(f"{len(regressions)} regressions against {args.baseline}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Opt-in profiling of generate_site.py build phases (generate_site.py --profile DIR).
+Keeps one cProfile profile per build phase and tracks tracemalloc peaks and
+allocation sites per phase, then writes <phase>.pstats files and a top-N
+allocation summary.
+
+The .pstats files can be inspected with:
+    python -m pstats profile/render.pstats
+"""
+
+import os
+import cProfile
+import tracemalloc
+
+# Allocation sites left out of the summary: the profiler's own bookkeeping and
+# imports. They are dropped from the diff rather than with Snapshot.filter_traces,
+# which takes seconds on a snapshot of a loaded DataFrame.
+IGNORED_SITES = (tracemalloc.__file__, __file__, '<frozen importlib._bootstrap')
+
+class PhaseProfiler:
+    """Profiles build phases; driven by BuildReport.start_phase/end_phase.
+
+    Phases such as render run once per page, and comparing two tracemalloc
+    snapshots costs seconds once the data is loaded, so allocation sites are
+    only sampled on the first `samples` calls of each phase. CPU profiles and
+    memory peaks cover every call.
+    """
+
+    def __init__(self, samples=3):
+        self.samples = samples
+        self.profiles = {}
+        self.peaks = {}
+        self.allocations = {}
+        self.sampled_calls = {}
+        self.snapshots = []
+        tracemalloc.start()
+
+    def fold_peak(self, name):
+        """Record the tracemalloc peak since the last reset against a phase."""
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peaks[name] = max(self.peaks.get(name, 0), peak)
+
+    def enter(self, name, outer=None):
+        """Switch profiling from the enclosing phase (if any) to phase name."""
+        if outer:
+            self.profiles[outer].disable()
+            self.fold_peak(outer)
+        if self.sampled_calls.get(name, 0) < self.samples:
+            self.snapshots.append(tracemalloc.take_snapshot())
+        else:
+            self.snapshots.append(None)
+        tracemalloc.reset_peak()
+        self.profiles.setdefault(name, cProfile.Profile()).enable()
+
+    def exit(self, name, outer=None):
+        """Stop profiling phase name and resume the enclosing phase (if any)."""
+        self.profiles[name].disable()
+        self.fold_peak(name)
+        before = self.snapshots.pop()
+        if before is not None:
+            sites = self.allocations.setdefault(name, {})
+            for stat in tracemalloc.take_snapshot().compare_to(before, 'lineno'):
+                frame = stat.traceback[0]
+                if stat.size_diff > 0 and not frame.filename.startswith(IGNORED_SITES):
+                    site = sites.setdefault(f'{frame.filename}:{frame.lineno}', [0, 0])
+                    site[0] += stat.size_diff
+                    site[1] += stat.count_diff
+            self.sampled_calls[name] = self.sampled_calls.get(name, 0) + 1
+        tracemalloc.reset_peak()
+        if outer:
+            self.profiles[outer].enable()
+
+    def write(self, directory, top=20):
+        """Write <phase>.pstats files and allocations.txt to directory; return the summary text."""
+        os.makedirs(directory, exist_ok=True)
+        for name, profile in self.profiles.items():
+            profile.dump_stats(os.path.join(directory, f'{name}.pstats'))
+
+        lines = []
+        for name in self.profiles:
+            sites = self.allocations.get(name, {})
+            lines.append(f"{name}: peak traced memory {self.peaks.get(name, 0) / 2**20:.1f} MiB, "
+                         f"allocations sampled over {self.sampled_calls.get(name, 0)} calls")
+            for site, (size, count) in sorted(sites.items(), key=lambda item: -item[1][0])[:top]:
+                lines.append(f"  {size / 1024:>10.1f} KiB {count:>8} blocks  {site}")
+        summary = '\n'.join(lines)
+        with open(os.path.join(directory, 'allocations.txt'), 'w', encoding='utf-8') as f:
+            f.write(summary + '\n')
+        return summary
@@ -0,0 +1,176 @@
+"""
+Phase-level timing for generate_site.py.
+Records wall time, CPU time, pages and bytes written for each build phase and
+writes them as a JSON build report next to output/.
+"""
+
+import json
+import math
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+REPORT_PATH = 'build-report.json'
+
+# Slowest and largest pages listed in the report
+TOP_PAGES = 10
+
+def clock():
+    """Return the current (wall, cpu) times."""
+    return time.perf_counter(), time.process_time()
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of a non-empty list of values."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+def distribution(values):
+    """Return the p50, p95 and max of a non-empty list of values."""
+    return {'p50': percentile(values, 0.5), 'p95': percentile(values, 0.95), 'max': max(values)}
+
+class BuildReport:
+    """Accumulates statistics per build phase.
+
+    Phases can be entered many times (e.g. once per page) and can nest; time
+    spent in a nested phase is only charged to the innermost one, so the phase
+    times add up to the total build time.
+    """
+
+    def __init__(self, profiler=None):
+        self.started_at = datetime.now()
+        self.start = clock()
+        self.phases = {}
+        self.stack = []
+        self.pages = []
+        # Optional build_profile.PhaseProfiler, switched along with the phases
+        self.profiler = profiler
+
+    def stats(self, name):
+        if name not in self.phases:
+            self.phases[name] = {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'pages': 0, 'bytes': 0}
+        return self.phases[name]
+
+    def charge(self, name, since, now):
+        stats = self.stats(name)
+        stats['wall_s'] += now[0] - since[0]
+        stats['cpu_s'] += now[1] - since[1]
+        return now[0] - since[0]
+
+    def start_phase(self, name):
+        """Start timing a phase, pausing the enclosing one."""
+        now = clock()
+        outer = self.stack[-1] if self.stack else None
+        if outer:
+            outer[2] += self.charge(outer[0], outer[1], now)
+        self.stats(name)['calls'] += 1
+        if self.profiler:
+            # Profiler bookkeeping is not charged to any phase
+            self.profiler.enter(name, outer[0] if outer else None)
+            now = clock()
+        self.stack.append([name, now, 0.0])
+
+    def end_phase(self, pages=0):
+        """Stop timing the current phase, resume the enclosing one and return
+        the wall seconds charged to this call of the phase."""
+        now = clock()
+        name, since, wall = self.stack.pop()
+        wall += self.charge(name, since, now)
+        self.stats(name)['pages'] += pages
+        if self.profiler:
+            self.profiler.exit(name, self.stack[-1][0] if self.stack else None)
+            now = clock()
+        if self.stack:
+            self.stack[-1][1] = now
+        return wall
+
+    @contextmanager
+    def phase(self, name, pages=0):
+        """Time the enclosed block as part of the named phase."""
+        self.start_phase(name)
+        try:
+            yield
+        finally:
+            self.end_phase(pages)
+
+    def add_output(self, nbytes, pages=0):
+        """Charge bytes (and pages) written to the current phase."""
+        stats = self.stats(self.stack[-1][0] if self.stack else 'other')
+        stats['bytes'] += nbytes
+        stats['pages'] += pages
+
+    def record_page(self, path, page_type, render_s, companies, nbytes):
+        """Record the render time, company count and size of one generated page."""
+        self.pages.append({'path': path, 'type': page_type, 'render_ms': render_s * 1000,
+                           'companies': companies, 'bytes': nbytes})
+
+    def page_summary(self, top=TOP_PAGES):
+        """Return per-page-type distributions and the slowest and largest pages."""
+        page_types = []
+        for page_type in dict.fromkeys(page['type'] for page in self.pages):
+            pages = [page for page in self.pages if page['type'] == page_type]
+            page_types.append({
+                'type': page_type,
+                'pages': len(pages),
+                'render_ms': distribution([page['render_ms'] for page in pages]),
+                'companies': distribution([page['companies'] for page in pages]),
+                'bytes': distribution([page['bytes'] for page in pages]),
+            })
+        return {
+            'page_types': page_types,
+            'slowest_pages': sorted(self.pages, key=lambda page: -page['render_ms'])[:top],
+            'largest_pages': sorted(self.pages, key=lambda page: -page['bytes'])[:top],
+        }
+
+    def to_dict(self):
+        """Return the report as a JSON-serialisable dict."""
+        now = clock()
+        phases = []
+        for name, stats in self.phases.items():
+            phase = {'name': name}
+            phase.update(stats)
+            phase['pages_per_s'] = stats['pages'] / stats['wall_s'] if stats['pages'] and stats['wall_s'] else None
+            phases.append(phase)
+        return {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total': {
+                'wall_s': now[0] - self.start[0],
+                'cpu_s': now[1] - self.start[1],
+                'pages': sum(stats['pages'] for name, stats in self.phases.items() if name == 'write'),
+                'bytes': sum(stats['bytes'] for stats in self.phases.values()),
+            },
+            'phases': phases,
+            **self.page_summary(),
+        }
+
+    def write(self, path=REPORT_PATH):
+        """Write the report as JSON and return it."""
+        report = self.to_dict()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+def print_report(report):
+    """Print a build report as a table."""
+    print(f"{'Phase':<14}{'Calls':>8}{'Wall (s)':>10}{'CPU (s)':>10}{'Pages':>8}{'Pages/s':>10}{'Bytes':>13}")
+    for phase in report['phases']:
+        pages_per_s = f"{phase['pages_per_s']:.0f}" if phase['pages_per_s'] else '-'
+        print(f"{phase['name']:<14}{phase['calls']:>8}{phase['wall_s']:>10.3f}{phase['cpu_s']:>10.3f}"
+              f"{phase['pages']:>8}{pages_per_s:>10}{phase['bytes']:>13,}")
+    total = report['total']
+    print(f"{'total':<14}{'':>8}{total['wall_s']:>10.3f}{total['cpu_s']:>10.3f}{total['pages']:>8}{'':>10}{total['bytes']:>13,}")
+
+    if not report.get('page_types'):
+        return
+    print(f"\n{'Page type':<14}{'Pages':>8}{'Render ms p50/p95/max':>26}{'Companies p50/p95/max':>24}"
+          f"{'Bytes p50/p95/max':>28}")
+    for page_type in report['page_types']:
+        render = '/'.join(f"{value:.1f}" for value in page_type['render_ms'].values())
+        companies = '/'.join(str(value) for value in page_type['companies'].values())
+        size = '/'.join(f"{value:,}" for value in page_type['bytes'].values())
+        print(f"{page_type['type']:<14}{page_type['pages']:>8}{render:>26}{companies:>24}{size:>28}")
+    print("Slowest pages:")
+    for page in report['slowest_pages'][:5]:
+        print(f"  {page['render_ms']:>10.1f} ms  {page['companies']:>5} companies  {page['path']}")
+    print("Largest pages:")
+    for page in report['largest_pages'][:5]:
+        print(f"  {page['bytes']:>10,} B   {page['companies']:>5} companies  {page['path']}")
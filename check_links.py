@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Script to check the internal links of the generated website.
+Collects every href/src from the HTML pages, resolves them against the set of
+emitted paths and reports the links that point at nothing.
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import posixpath
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlsplit, unquote
+
+# Matches href="..." and src="..." attributes (either quote style)
+LINK_PATTERN = re.compile(r'(?:href|src)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+# Links with these prefixes leave the site and are not checked
+EXTERNAL_PREFIXES = ('http:', 'https:', '//', 'mailto:', 'tel:', 'javascript:', 'data:', '#')
+
+def extract_links(html):
+    """Return every href/src value found in the given HTML."""
+    return [(double or single).strip() for double, single in LINK_PATTERN.findall(html)]
+
+@lru_cache(maxsize=None)
+def resolve_link(page_dir, link):
+    """Resolve a link found on a page in page_dir to a path relative to the site root.
+
+    Returns None for external links, anchors and empty links. Cached because
+    pages at the same depth share most of their links.
+    """
+    if not link or link.lower().startswith(EXTERNAL_PREFIXES):
+        return None
+    path = unquote(urlsplit(link).path)
+    if not path:
+        return None
+    if path.startswith('/'):
+        target = path.lstrip('/')
+    else:
+        target = posixpath.join(page_dir, path)
+    is_directory = path.endswith('/')
+    target = posixpath.normpath(target) if target else '.'
+    if target == '.':
+        target = ''
+    if is_directory and target:
+        target += '/'
+    return target
+
+def target_exists(target, known_paths):
+    """Check whether a resolved link points at an emitted file."""
+    if target == '' or target.endswith('/'):
+        return target + 'index.html' in known_paths
+    return target in known_paths or target + '/index.html' in known_paths
+
+def check_pages(output_dir, page_paths, known_paths):
+    """Check the links of a batch of pages and return the dangling ones."""
+    dangling = []
+    link_count = 0
+    for page_path in page_paths:
+        with open(os.path.join(output_dir, page_path), 'r', encoding='utf-8') as f:
+            html = f.read()
+        page_dir = posixpath.dirname(page_path)
+        for link in extract_links(html):
+            target = resolve_link(page_dir, link)
+            if target is None:
+                continue
+            link_count += 1
+            if target.startswith('../') or not target_exists(target, known_paths):
+                dangling.append((page_path, link))
+    return link_count, dangling
+
+def list_output_files(output_dir):
+    """Return every file below output_dir as a site-relative path."""
+    paths = set()
+    for root, _, files in os.walk(output_dir):
+        for file in files:
+            full_path = os.path.join(root, file)
+            paths.add(os.path.relpath(full_path, output_dir).replace(os.sep, '/'))
+    return paths
+
+def check_links(output_dir='output', known_paths=None, workers=None):
+    """Check every internal link of the HTML pages in known_paths.
+
+    known_paths defaults to the files currently present in output_dir.
+    Returns a tuple of (number of links checked, list of (page, link)).
+    """
+    if known_paths is None:
+        known_paths = list_output_files(output_dir)
+    known_paths = set(known_paths)
+    page_paths = sorted(path for path in known_paths if path.endswith('.html'))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(page_paths) < 200 or 'fork' not in multiprocessing.get_all_start_methods():
+        return check_pages(output_dir, page_paths, known_paths)
+
+    # Split the pages into a few batches per worker so they finish evenly
+    batch_count = workers * 4
+    batches = [page_paths[i::batch_count] for i in range(batch_count)]
+
+    link_count = 0
+    dangling = []
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = [executor.submit(check_pages, output_dir, batch, known_paths) for batch in batches if batch]
+        for future in futures:
+            batch_links, batch_dangling = future.result()
+            link_count += batch_links
+            dangling.extend(batch_dangling)
+    dangling.sort()
+    return link_count, dangling
+
+def report_dangling_links(link_count, page_count, dangling, elapsed, limit=20):
+    """Print a summary of the link check."""
+    print(f"Checked {link_count} internal links on {page_count} pages in {elapsed:.2f}s: {len(dangling)} dangling.")
+    for page_path, link in dangling[:limit]:
+        print(f"  {page_path}: {link}")
+    if len(dangling) > limit:
+        print(f"  ... and {len(dangling) - limit} more")
+
+def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(description='Check the internal links of the generated website')
+    parser.add_argument('--output-dir', default='output', help='Generated site directory')
+
+    args = parser.parse_args()
+
+    output_dir = args.output_dir
+    if not os.path.isdir(output_dir):
+        print(f"Output directory not found at {output_dir}")
+        return 1
+
+    start = time.perf_counter()
+    known_paths = list_output_files(output_dir)
+    link_count, dangling = check_links(output_dir, known_paths)
+    page_count = sum(1 for path in known_paths if path.endswith('.html'))
+    report_dangling_links(link_count, page_count, dangling, time.perf_counter() - start, limit=len(dangling))
+    return 1 if dangling else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""
+Full-text company index for the site search.
+Indexes every listing by its name, Scissor Lift Brands, Sizes Available and
+the features of its about data, so "Genie GS-1930" or a company name finds
+the companies and links to their card on the city page.
+
+The index is part of the search index of search_index.py:
+    terms/<prefix>.json   {"terms": {term: [company id gaps]}}, sharded by
+                          the first TERM_PREFIX_LENGTH letters of the term
+    companies/<n>.json    {"companies": [[name, city, state id, city slug, anchor]]},
+                          COMPANY_CHUNK_SIZE companies per file
+Companies are numbered best first (most reviews), so the posting lists are
+sorted by rank and a query only reads the company rows of its first
+matches. Posting lists store the gaps between ids to keep them small.
+
+search-worker.js matches queries against it in loadCompanyMatches.
+"""
+
+import re
+import json
+
+from search_index import normalize, to_json
+from site_helpers import to_slug
+
+TERM_PREFIX_LENGTH = 2
+
+# Terms shorter than this are not indexed (and ignored in queries)
+MIN_TERM_LENGTH = 2
+
+COMPANY_CHUNK_SIZE = 100
+
+# Companies whose rows are read to rank the matches of a query
+COMPANY_CANDIDATES = 20
+
+# Terms are the runs of letters or digits of the normalized text, so "19ft"
+# is found by "19 ft" and "GS-1930" by "gs1930"
+TERM_PATTERN = re.compile(r'[a-z]+|[0-9]+')
+
+def tokenize(text):
+    """Return the distinct terms of a text, in order."""
+    return list(dict.fromkeys(term for term in TERM_PATTERN.findall(normalize(text)) if len(term) >= MIN_TERM_LENGTH))
+
+def about_features(about):
+    """Return the features a listing's about data offers, e.g. ['Delivery', 'Credit cards'].
+
+    The about data is the JSON-like {category: {feature: true/false or text}}
+    string of the export (see site_helpers.format_about); features that are
+    false are left out, and text that does not parse is returned as is.
+    """
+    if not about:
+        return []
+    try:
+        data = json.loads(about.replace("'", '"'))
+    except ValueError:
+        return [about]
+    if not isinstance(data, dict):
+        return [str(data)]
+    features = []
+    for category, details in data.items():
+        if isinstance(details, dict):
+            for feature, value in details.items():
+                if value is True:
+                    features.append(feature)
+                elif value and not isinstance(value, bool):
+                    features.append(f'{feature} {value}')
+        elif details:
+            features.append(str(details))
+    return features
+
+def company_anchors(state_slugs, city_slugs, names):
+    """Return the id of every company's card on its city page: company-<name slug>, made unique per city."""
+    anchors = []
+    used = set()
+    for state_slug, city_slug, name in zip(state_slugs, city_slugs, names):
+        base = 'company-' + (to_slug(str(name)).strip('-') or 'listing')
+        anchor, number = base, 1
+        while (state_slug, city_slug, anchor) in used:
+            number += 1
+            anchor = f'{base}-{number}'
+        used.add((state_slug, city_slug, anchor))
+        anchors.append(anchor)
+    return anchors
+
+def encode_postings(company_ids):
+    """Return the gaps between sorted company ids (the first id as is)."""
+    return [company_id - previous for previous, company_id in zip([0] + company_ids, company_ids)]
+
+def decode_postings(gaps):
+    company_ids = []
+    company_id = 0
+    for gap in gaps:
+        company_id += gap
+        company_ids.append(company_id)
+    return company_ids
+
+def build_company_index(search_data, companies):
+    """Return ({path: JSON text} of the term shards and company chunks, manifest fields).
+
+    companies is columnar: {"name", "city", "anchor", "reviews", "brands",
+    "sizes", "about"}, where city holds the city ids of search_data.
+    """
+    cities = search_data['cities']
+    order = sorted(range(len(companies['name'])),
+                   key=lambda i: (-companies['reviews'][i], normalize(str(companies['name'][i])), i))
+    rows = []
+    postings = {}
+    for company_id, i in enumerate(order):
+        city_id = companies['city'][i]
+        name = str(companies['name'][i])
+        rows.append([name, cities['name'][city_id], cities['state'][city_id], cities['slug'][city_id],
+                     companies['anchor'][i]])
+        fields = [name, str(companies['brands'][i]), str(companies['sizes'][i])] + about_features(companies['about'][i])
+        for term in dict.fromkeys(term for field in fields for term in tokenize(field)):
+            postings.setdefault(term, []).append(company_id)
+
+    files = {}
+    for start in range(0, len(rows), COMPANY_CHUNK_SIZE):
+        files[f'companies/{start // COMPANY_CHUNK_SIZE}.json'] = to_json({'companies': rows[start:start + COMPANY_CHUNK_SIZE]})
+    shards = {}
+    for term in sorted(postings):
+        shards.setdefault(term[:TERM_PREFIX_LENGTH], {})[term] = encode_postings(postings[term])
+    for key, terms in shards.items():
+        files[f'terms/{key}.json'] = to_json({'terms': terms})
+    return files, {
+        'company_count': len(rows),
+        'company_chunk_size': COMPANY_CHUNK_SIZE,
+        'term_prefix_length': TERM_PREFIX_LENGTH,
+        'term_shards': sorted(shards),
+    }
+
+def intersect(a, b):
+    """Return the ids in both sorted lists."""
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            i += 1
+        elif a[i] > b[j]:
+            j += 1
+        else:
+            result.append(a[i])
+            i += 1
+            j += 1
+    return result
+
+def match_companies(query, load_terms):
+    """Return the ids of the companies matching every term of a query, best first.
+
+    The last term also matches as a prefix, for queries typed partway.
+    load_terms(key) returns the {term: gaps} of a term shard, or None.
+    """
+    terms = tokenize(query)
+    shards = [load_terms(term[:TERM_PREFIX_LENGTH]) for term in terms]
+    if not terms or any(shard is None for shard in shards):
+        return []
+    matches = None
+    for position, (term, shard) in enumerate(zip(terms, shards)):
+        if position == len(terms) - 1:
+            found = sorted({company_id for candidate, gaps in shard.items() if candidate.startswith(term)
+                            for company_id in decode_postings(gaps)})
+        else:
+            found = decode_postings(shard.get(term, []))
+        matches = found if matches is None else intersect(matches, found)
+    return matches
+
+def name_matches(query, name):
+    """Return whether every term of a query starts a term of a company name."""
+    name_terms = tokenize(name)
+    return all(any(name_term.startswith(term) for name_term in name_terms) for term in tokenize(query))
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Compares two builds of the website.
+Prints the per-phase timing deltas of their build reports and the files that
+differ between their output trees, so a performance refactor of the generator
+can be shown to be faster and output-equivalent. Files are compared by hash;
+changed pages whose differences are near-identical (e.g. the same template
+line changed on every city page) are grouped and shown with one example diff.
+
+Each argument is a build directory (holding build-report.json and output/),
+a build report or an output tree. Build with a fixed --seed so the randomly
+chosen descriptions match between builds.
+
+Example:
+    python generate_site.py --seed 1 && cp -r output /tmp/old-output && cp build-report.json /tmp/old-report.json
+    ... change the generator ...
+    python generate_site.py --seed 1
+    python compare_builds.py /tmp/old-report.json build-report.json
+    python compare_builds.py /tmp/old-output output
+"""
+
+import os
+import re
+import sys
+import json
+import difflib
+import hashlib
+import argparse
+
+from check_links import list_output_files
+
+# Minimum similarity of two page diffs for the pages to share a group
+GROUP_SIMILARITY = 0.8
+
+# Numbers (counts, coordinates, ratings) differ between otherwise identical diffs
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+def load_build(path):
+    """Return (build report or None, output directory or None) for a build path."""
+    if os.path.isfile(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f), None
+    report_path = os.path.join(path, 'build-report.json')
+    if os.path.isdir(os.path.join(path, 'output')):
+        report = None
+        if os.path.isfile(report_path):
+            with open(report_path, 'r', encoding='utf-8') as f:
+                report = json.load(f)
+        return report, os.path.join(path, 'output')
+    return None, path
+
+def change(old, new):
+    """Format the relative change from old to new."""
+    return f"{new / old - 1:+.1%}" if old else '-'
+
+def print_timing_diff(old, new):
+    """Print the wall and CPU time of each phase in two build reports."""
+    old_phases = {phase['name']: phase for phase in old['phases']}
+    new_phases = {phase['name']: phase for phase in new['phases']}
+    print(f"{'Phase':<14}{'Old wall (s)':>14}{'New wall (s)':>14}{'Delta (s)':>11}{'Change':>9}"
+          f"{'Old CPU (s)':>13}{'New CPU (s)':>13}")
+    for name in list(dict.fromkeys(list(old_phases) + list(new_phases))):
+        before = old_phases.get(name, {'wall_s': 0.0, 'cpu_s': 0.0})
+        after = new_phases.get(name, {'wall_s': 0.0, 'cpu_s': 0.0})
+        print(f"{name:<14}{before['wall_s']:>14.3f}{after['wall_s']:>14.3f}{after['wall_s'] - before['wall_s']:>+11.3f}"
+              f"{change(before['wall_s'], after['wall_s']):>9}{before['cpu_s']:>13.3f}{after['cpu_s']:>13.3f}")
+    before, after = old['total'], new['total']
+    print(f"{'total':<14}{before['wall_s']:>14.3f}{after['wall_s']:>14.3f}{after['wall_s'] - before['wall_s']:>+11.3f}"
+          f"{change(before['wall_s'], after['wall_s']):>9}{before['cpu_s']:>13.3f}{after['cpu_s']:>13.3f}")
+    if before['pages'] != after['pages']:
+        print(f"Pages written changed from {before['pages']} to {after['pages']}")
+
+    # Per-page render times, for reports that record them
+    old_types = {page_type['type']: page_type for page_type in old.get('page_types', [])}
+    for page_type in new.get('page_types', []):
+        previous = old_types.get(page_type['type'])
+        if previous:
+            print(f"  {page_type['type']:<14} render p50 {previous['render_ms']['p50']:.1f} -> "
+                  f"{page_type['render_ms']['p50']:.1f} ms, p95 {previous['render_ms']['p95']:.1f} -> "
+                  f"{page_type['render_ms']['p95']:.1f} ms")
+
+def hash_tree(output_dir):
+    """Return {site-relative path: content hash} for every file below output_dir."""
+    hashes = {}
+    for path in list_output_files(output_dir):
+        with open(os.path.join(output_dir, path), 'rb') as f:
+            hashes[path] = hashlib.blake2b(f.read(), digest_size=16).digest()
+    return hashes
+
+def read_lines(path):
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read().splitlines()
+
+def diff_signature(old_lines, new_lines):
+    """Return the changed lines of a page with numbers masked, as one string."""
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    changed = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != 'equal':
+            changed.extend('-' + line.strip() for line in old_lines[i1:i2])
+            changed.extend('+' + line.strip() for line in new_lines[j1:j2])
+    return NUMBER_PATTERN.sub('#', '\n'.join(changed))
+
+def group_changes(old_dir, new_dir, paths):
+    """Group changed files whose diffs are near-identical.
+
+    Returns a list of groups, largest first: {'signature', 'paths', 'bytes_delta'}.
+    """
+    groups = []
+    exact = {}
+    for path in paths:
+        old_path, new_path = os.path.join(old_dir, path), os.path.join(new_dir, path)
+        bytes_delta = os.path.getsize(new_path) - os.path.getsize(old_path)
+        signature = diff_signature(read_lines(old_path), read_lines(new_path))
+        group = exact.get(signature)
+        if group is None:
+            for candidate in groups:
+                matcher = difflib.SequenceMatcher(None, candidate['signature'], signature, autojunk=False)
+                if matcher.quick_ratio() >= GROUP_SIMILARITY and matcher.ratio() >= GROUP_SIMILARITY:
+                    group = candidate
+                    break
+            else:
+                group = {'signature': signature, 'paths': [], 'bytes_delta': 0}
+                groups.append(group)
+            exact[signature] = group
+        group['paths'].append(path)
+        group['bytes_delta'] += bytes_delta
+    return sorted(groups, key=lambda group: -len(group['paths']))
+
+def print_example_diff(old_dir, new_dir, path, limit):
+    """Print the unified diff of one file, truncated to limit lines."""
+    diff = list(difflib.unified_diff(read_lines(os.path.join(old_dir, path)), read_lines(os.path.join(new_dir, path)),
+                                     f'old/{path}', f'new/{path}', n=1, lineterm=''))
+    for line in diff[:limit]:
+        print(f"      {line}")
+    if len(diff) > limit:
+        print(f"      ... {len(diff) - limit} more diff lines")
+
+def compare_trees(old_dir, new_dir, diff_lines=12, group_limit=10):
+    """Print the differences between two output trees and return the number of differing files."""
+    old_hashes, new_hashes = hash_tree(old_dir), hash_tree(new_dir)
+    added = sorted(set(new_hashes) - set(old_hashes))
+    removed = sorted(set(old_hashes) - set(new_hashes))
+    changed = sorted(path for path in set(old_hashes) & set(new_hashes) if old_hashes[path] != new_hashes[path])
+    identical = len(old_hashes) - len(removed) - len(changed)
+
+    print(f"{identical} identical, {len(changed)} changed, {len(added)} added, {len(removed)} removed files")
+    for label, paths in (('Added', added), ('Removed', removed)):
+        for path in paths[:group_limit]:
+            print(f"  {label}: {path}")
+        if len(paths) > group_limit:
+            print(f"  ... and {len(paths) - group_limit} more {label.lower()}")
+
+    groups = group_changes(old_dir, new_dir, changed)
+    for index, group in enumerate(groups[:group_limit], 1):
+        paths = group['paths']
+        print(f"Group {index}: {len(paths)} files, {group['bytes_delta']:+,} bytes, e.g. {', '.join(paths[:3])}")
+        print_example_diff(old_dir, new_dir, paths[0], diff_lines)
+    if len(groups) > group_limit:
+        print(f"... and {len(groups) - group_limit} more groups")
+    return len(added) + len(removed) + len(changed)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the timing and output of two site builds')
+    parser.add_argument('old', help='Build directory, build report or output tree of the baseline build')
+    parser.add_argument('new', help='Build directory, build report or output tree of the new build')
+    parser.add_argument('--diff-lines', type=int, default=12, help='Lines of example diff per group')
+    parser.add_argument('--groups', type=int, default=10, help='Groups of changed files to list')
+
+    args = parser.parse_args()
+
+    old_report, old_dir = load_build(args.old)
+    new_report, new_dir = load_build(args.new)
+    if old_report and new_report:
+        print_timing_diff(old_report, new_report)
+    if old_dir and new_dir:
+        if old_report and new_report:
+            print()
+        differences = compare_trees(old_dir, new_dir, args.diff_lines, args.groups)
+        return 1 if differences else 0
+    if not (old_report and new_report):
+        print("Pass two build reports, two output trees or two build directories")
+        return 2
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,18 +1,33 @@
 #!/usr/bin/env python3
 """
 Script to generate search data for the scissor lift rental directory website.
-This script reads the Excel file and creates a JSON file with city and zip code data
-that can be used by the search functionality.
+This script reads the Excel file and creates a JSON file with city and zip code data,
+plus the sharded search index (see search_index.py) that the search functionality loads.
 """
 
 import pandas as pd
+import argparse
 import json
 import os
 
+from search_index import INDEX_DIR, build_search_data, write_search_index
+from company_index import company_anchors
+from zip_centroids import GAZETTEER_PATH, nearby_zips
+
 def main():
+    parser = argparse.ArgumentParser(description='Generate the search data and search index of the site')
+    parser.add_argument('--input', default='scissor-lift-companies.xlsx',
+                        help='Company spreadsheet (.xlsx, or .csv such as generate_synthetic_data.py writes)')
+    parser.add_argument('--zip-centroids', default=GAZETTEER_PATH,
+                        help='Zip code centroid table (Census ZCTA gazetteer) for the zip search fallback')
+    args = parser.parse_args()
+
     # Load the Excel file
     print("Loading Excel file...")
-    df = pd.read_excel('scissor-lift-companies.xlsx')
+    if args.input.endswith('.csv'):
+        df = pd.read_csv(args.input)
+    else:
+        df = pd.read_excel(args.input)
     
     # Clean and prepare data
     print("Cleaning and preparing data...")
@@ -46,53 +61,27 @@ def main():
     df['state_slug'] = df['us_state'].apply(lambda x: state_abbr.get(x, to_slug(x)))
     df['city_slug'] = df['city'].apply(to_slug)
     
+    # Id of each company's card on its city page (as generate_site.py renders it)
+    df['anchor'] = company_anchors(df['state_slug'], df['city_slug'], df['name'])
+    
     # Create search data
     print("Generating search data...")
-    search_data = {
-        "cities": [],
-        "zips": []
-    }
-    
-    # Get states with companies
-    states_with_companies = df[df['state_slug'] != ''][['us_state', 'state_slug']].drop_duplicates().sort_values('us_state')
-    states_list = [(state, slug) for state, slug in zip(states_with_companies['us_state'], states_with_companies['state_slug'])]
-    
-    # Process all cities
-    for state, state_slug in states_list:
-        # Get cities in this state
-        state_df = df[df['state_slug'] == state_slug]
-        cities_with_companies = state_df[state_df['city_slug'] != ''][['city', 'city_slug']].drop_duplicates().sort_values('city')
-        
-        for city, city_slug in zip(cities_with_companies['city'], cities_with_companies['city_slug']):
-            # Add city to search data
-            search_data["cities"].append({
-                "name": city,
-                "state": state,
-                "url": f"{state_slug}/{city_slug}/"
-            })
-            
-            # Get zip codes for this city
-            city_df = state_df[state_df['city_slug'] == city_slug]
-            zip_codes = city_df['postal_code'].dropna().unique()
-            
-            for zip_code in zip_codes:
-                if zip_code and str(zip_code).strip():
-                    # Add zip code to search data
-                    search_data["zips"].append({
-                        "code": str(zip_code).strip(),
-                        "city": city,
-                        "state": state,
-                        "url": f"{state_slug}/{city_slug}/"
-                    })
+    df['reviews_num'] = pd.to_numeric(df['reviews'], errors='coerce').fillna(0)
+    search_data, companies = build_search_data(df)
     
     # Create output directory
     os.makedirs('output/assets/data', exist_ok=True)
     
     # Save search data to a JSON file
     with open('output/assets/data/search-data.json', 'w') as f:
-        json.dump(search_data, f)
+        json.dump(search_data, f, separators=(',', ':'))
+    
+    # Save the sharded search index that search-worker.js loads
+    nearby = nearby_zips(search_data, args.zip_centroids, (df['postal_code'], df['latitude'], df['longitude']))
+    files = write_search_index(search_data, nearby=nearby, companies=companies)
     
-    print(f"Search data generated with {len(search_data['cities'])} cities and {len(search_data['zips'])} zip codes.")
+    print(f"Search data generated with {len(search_data['cities']['name'])} cities and {len(search_data['zips']['code'])} zip codes.")
+    print(f"Search index written to {INDEX_DIR} ({len(files)} files).")
 
 if __name__ == "__main__":
     import re  # Import re here to avoid issues
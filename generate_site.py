@@ -1,221 +1,66 @@
 import pandas as pd
 import os
-import re
 import json
 import requests
 import statistics
 import random
-from urllib.parse import urlparse, unquote
 from jinja2 import Environment, FileSystemLoader
-import shutil
-
-# Function to generate unique SEO-optimized descriptions for states
-def generate_state_description(state):
-    # LSI keywords and N-grams related to scissor lift rentals
-    lsi_keywords = [
-        "aerial work platforms", "elevated work platforms", "construction equipment rental",
-        "industrial equipment", "maintenance equipment", "height access solutions",
-        "lifting equipment", "mobile elevating work platforms", "MEWP rentals",
-        "commercial construction equipment", "industrial machinery"
-    ]
-    
-    # Randomly select 3-4 LSI keywords to include
-    selected_keywords = random.sample(lsi_keywords, random.randint(3, 4))
-    
-    # Create a unique description for each state
-    descriptions = [
-        f"{state} offers a comprehensive selection of scissor lift rentals and {selected_keywords[0]} for construction, maintenance, and industrial projects. Whether you need equipment for indoor applications or {selected_keywords[1]} for outdoor construction sites, rental companies throughout {state} provide reliable solutions with flexible rental terms.",
-        
-        f"Finding quality scissor lift rentals in {state} is simple with numerous providers offering {selected_keywords[0]} and {selected_keywords[1]}. Construction professionals and maintenance crews across {state} rely on these versatile machines for safe and efficient elevated work access.",
-        
-        f"Contractors and facility managers in {state} can access a wide range of scissor lift rentals and {selected_keywords[0]} from reputable providers. These {selected_keywords[1]} are essential for projects requiring safe access to elevated work areas in commercial, industrial, and institutional settings.",
-        
-        f"{state}'s construction and maintenance industries are well-served by local companies offering scissor lift rentals and other {selected_keywords[0]}. These {selected_keywords[1]} provide safe and stable platforms for workers needing to reach heights efficiently.",
-        
-        f"The {selected_keywords[0]} market in {state} includes numerous options for scissor lift rentals suited to various applications. From {selected_keywords[1]} to specialized equipment for unique projects, {state}'s rental providers offer comprehensive solutions for height access needs."
-    ]
-    
-    # Select a random description template and add safety information
-    description = random.choice(descriptions)
-    
-    # Add information about popular brands
-    brands = ["JLG", "Genie", "Skyjack", "Haulotte", "Snorkel"]
-    random.shuffle(brands)
-    top_brands = brands[:3]  # Select 3 random brands
-    
-    description += f" Popular scissor lift brands available in {state} include {', '.join(top_brands)}, offering various platform heights, weight capacities, and power options to suit specific project requirements."
-    
-    return description
-
-# Function to generate unique SEO-optimized descriptions for cities
-def generate_city_description(city, state):
-    # LSI keywords and N-grams related to scissor lift rentals in cities
-    lsi_keywords = [
-        "aerial equipment rental", "construction lift rental", "industrial lift equipment",
-        "scissor platform rental", "elevated work access", "commercial lift solutions",
-        "height access equipment", "construction machinery rental", "industrial access platforms",
-        "building maintenance equipment", "contractor equipment rental"
-    ]
-    
-    # Randomly select 3-4 LSI keywords to include
-    selected_keywords = random.sample(lsi_keywords, random.randint(3, 4))
-    
-    # Create a unique description for each city
-    descriptions = [
-        f"Contractors and businesses in {city}, {state} have access to premium scissor lift rentals and {selected_keywords[0]} from local providers. These {selected_keywords[1]} are essential for construction, maintenance, and renovation projects requiring safe and efficient access to elevated work areas.",
-        
-        f"{city}, {state} offers numerous options for scissor lift rentals and {selected_keywords[0]} to support local construction and maintenance industries. Companies in {city} provide {selected_keywords[1]} with various platform heights and weight capacities to accommodate different project requirements.",
-        
-        f"Finding reliable scissor lift rentals in {city}, {state} is straightforward with several local companies offering {selected_keywords[0]} and {selected_keywords[1]}. These versatile machines help contractors and maintenance teams work safely and efficiently at height.",
-        
-        f"The {selected_keywords[0]} market in {city}, {state} includes multiple providers offering scissor lift rentals for commercial, industrial, and institutional applications. These {selected_keywords[1]} are crucial for projects requiring stable elevated work platforms.",
-        
-        f"Businesses and contractors in {city}, {state} rely on local scissor lift rentals and {selected_keywords[0]} for safe access to elevated work areas. The {selected_keywords[1]} available in {city} include various models suited to both indoor and outdoor applications."
-    ]
-    
-    # Select a random description template
-    description = random.choice(descriptions)
-    
-    # Add rental advice specific to the city
-    rental_advice = [
-        f"When renting scissor lifts in {city}, consider factors such as project duration, required working height, and whether you need an electric model for indoor use or a rough terrain unit for outdoor applications.",
-        
-        f"For optimal results when renting scissor lifts in {city}, be sure to specify your project requirements including working height, platform capacity, and whether you need indoor or outdoor capabilities.",
-        
-        f"Rental companies in {city} typically offer daily, weekly, and monthly rates for scissor lifts, with significant discounts available for longer rental periods. Be sure to inquire about delivery and pickup services when requesting quotes.",
-        
-        f"Before renting a scissor lift in {city}, assess your specific project needs including required height, weight capacity, and whether you'll be working indoors or outdoors. Most local rental companies can help determine the right equipment for your application.",
-        
-        f"When selecting a scissor lift rental in {city}, consider the working environment, required platform height, weight capacity needs, and rental duration to ensure you get the most cost-effective solution for your project."
-    ]
-    
-    description += " " + random.choice(rental_advice)
-    
-    return description
+import time
+import argparse
+from check_links import check_links, report_dangling_links
+from prune_stale_pages import prune_stale_pages
+from asset_cache import load_manifest, save_manifest, write_if_changed, copy_if_changed
+from build_report import BuildReport, print_report
+from build_profile import PhaseProfiler
+from zip_centroids import GAZETTEER_PATH as ZIP_CENTROIDS_PATH, nearby_zips
+from search_index import (INDEX_DIR as SEARCH_INDEX_DIR, SHARD_KINDS as SEARCH_SHARD_KINDS, build_search_data,
+                          build_search_index, remove_stale_shards)
+from company_index import company_anchors
+from site_helpers import (generate_state_description, generate_city_description, clean_url, clean_image_url,
+                          format_hours, format_about, to_slug)
+
+parser = argparse.ArgumentParser(description='Generate the scissor lift rental directory website')
+parser.add_argument('--input', default='scissor-lift-companies.xlsx',
+                    help='Company spreadsheet (.xlsx, or .csv such as generate_synthetic_data.py writes)')
+parser.add_argument('--seed', type=int,
+                    help='Seed the random description choices so builds are reproducible (see compare_builds.py)')
+parser.add_argument('--profile', metavar='DIR',
+                    help='Write a cProfile .pstats file per build phase and an allocation summary to DIR')
+parser.add_argument('--profile-top', type=int, default=20,
+                    help='Allocation sites to list per phase in the --profile summary')
+parser.add_argument('--profile-samples', type=int, default=3,
+                    help='Calls per phase whose allocation sites --profile records (each costs seconds)')
+parser.add_argument('--only-state', metavar='SLUG',
+                    help='Only render the pages of one state (e.g. ca); skips pruning, the link check and sitemap.xml, '
+                         'and writes the report to build-report-SLUG.json')
+parser.add_argument('--search-api', metavar='URL',
+                    help='Search endpoint search-worker.js asks before fetching index files, e.g. /api/search '
+                         'when deploying with the api/index.py function (default: none, index files only)')
+parser.add_argument('--zip-centroids', default=ZIP_CENTROIDS_PATH,
+                    help='Zip code centroid table (Census ZCTA gazetteer) for the zip search fallback; '
+                         'without it ZIP3 centroids are derived from the listings')
+args = parser.parse_args()
+
+if args.seed is not None:
+    random.seed(args.seed)
+
+# Time every build phase for the build report, profiling them if asked to
+report = BuildReport(profiler=PhaseProfiler(args.profile_samples) if args.profile else None)
 
 # Load the Excel file
 print("Loading Excel file...")
-df = pd.read_excel('scissor-lift-companies.xlsx')
+report.start_phase('ingest')
+if args.input.endswith('.csv'):
+    df = pd.read_csv(args.input)
+else:
+    df = pd.read_excel(args.input)
+report.end_phase()
 
 # Clean and prepare data
 print("Cleaning and preparing data...")
+report.start_phase('clean')
 df = df.fillna('')  # Replace NaN values with empty strings
 
-# Function to strip UTM parameters from URLs
-def clean_url(url):
-    if not url:
-        return ''
-    # Remove UTM parameters and other tracking codes
-    url = re.sub(r'\?utm_.*$', '', url)
-    url = re.sub(r'&utm_.*$', '', url)
-    # Remove any other query parameters if needed
-    # url = re.sub(r'\?.*$', '', url)
-    return url
-
-# Function to validate and clean image URLs
-def clean_image_url(url):
-    if not url:
-        return ''
-    
-    # Check if URL is truncated (common in Excel exports)
-    if '...' in url:
-        return ''
-    
-    # Remove @ symbol if it's at the beginning (sometimes added in Excel)
-    if url.startswith('@'):
-        url = url[1:]
-    
-    # Make sure URL has a valid scheme
-    if not url.startswith(('http://', 'https://')):
-        if url.startswith('//'):
-            url = 'https:' + url
-        else:
-            url = 'https://' + url
-    
-    # Special handling for Google images
-    if 'googleusercontent.com' in url or 'googleapis.com' in url:
-        # Fix common issues with Google image URLs
-        
-        # Ensure we're using https
-        url = url.replace('http://', 'https://')
-        
-        # Remove size restrictions that might be in the URL
-        url = re.sub(r'=s\d+', '=s800', url)  # Set to a reasonable size
-        url = re.sub(r'=w\d+', '=w800', url)
-        url = re.sub(r'=h\d+', '=h500', url)
-        
-        # Fix common issues with Google Street View images
-        if 'streetviewpixels' in url:
-            # These often need special handling
-            url = re.sub(r'\?.*$', '', url)  # Remove all query parameters
-            url = url + '?cb=1'  # Add a cache-busting parameter
-        
-        # Handle Google Maps photos
-        if 'AF1QipP' in url:
-            # These are Google Maps user-contributed photos
-            # Make sure we're using the right format
-            url = re.sub(r'=.*$', '=w800-h500', url)
-    
-    # URL decode to handle any encoded characters
-    url = unquote(url)
-    
-    return url
-
-# Function to format working hours in a user-friendly way
-def format_hours(hours_str):
-    if not hours_str:
-        return ''
-    
-    try:
-        # Try to parse the JSON-like string
-        hours_str = hours_str.replace("'", '"')  # Replace single quotes with double quotes for JSON parsing
-        hours_dict = json.loads(hours_str)
-        
-        # Format the hours in a readable way
-        formatted_hours = []
-        days_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-        
-        for day in days_order:
-            if day in hours_dict:
-                time = hours_dict[day]
-                formatted_hours.append(f"{day}: {time}")
-        
-        return "<br>".join(formatted_hours)
-    except:
-        # If parsing fails, return the original string
-        return hours_str
-
-# Function to format about section in a user-friendly way
-def format_about(about_str):
-    if not about_str:
-        return ''
-    
-    try:
-        # Try to parse the JSON-like string
-        about_str = about_str.replace("'", '"')  # Replace single quotes with double quotes for JSON parsing
-        about_dict = json.loads(about_str)
-        
-        # Format the about information in a readable way
-        formatted_about = []
-        
-        for category, details in about_dict.items():
-            formatted_about.append(f"<strong>{category}</strong>")
-            
-            if isinstance(details, dict):
-                for feature, value in details.items():
-                    if isinstance(value, bool):
-                        value_text = "Yes" if value else "No"
-                        formatted_about.append(f"- {feature}: {value_text}")
-                    else:
-                        formatted_about.append(f"- {feature}: {value}")
-            else:
-                formatted_about.append(f"- {details}")
-        
-        return "<br>".join(formatted_about)
-    except:
-        # If parsing fails, return the original string
-        return about_str
-
 # Apply URL cleaning to the site column
 df['site'] = df['site'].apply(clean_url)
 
@@ -237,15 +82,6 @@ state_abbr = {
     'District of Columbia': 'dc'
 }
 
-# Function to convert to URL-friendly slug
-def to_slug(text):
-    if not text:
-        return ''
-    text = text.lower()
-    text = re.sub(r'[^a-z0-9\s-]', '', text)
-    text = re.sub(r'\s+', '-', text)
-    return text
-
 # Add slug columns for state and city
 df['state_slug'] = df['us_state'].apply(lambda x: state_abbr.get(x, to_slug(x)))
 df['city_slug'] = df['city'].apply(to_slug)
@@ -253,7 +89,12 @@ df['city_slug'] = df['city'].apply(to_slug)
 # Convert reviews to numeric for sorting
 df['reviews_num'] = pd.to_numeric(df['reviews'], errors='coerce').fillna(0)
 
+# Id of each company's card on its city page, which company search links to
+df['anchor'] = company_anchors(df['state_slug'], df['city_slug'], df['name'])
+report.end_phase()
+
 # Create output directory
+report.start_phase('assets')
 os.makedirs('output', exist_ok=True)
 os.makedirs('output/assets', exist_ok=True)
 os.makedirs('output/assets/css', exist_ok=True)
@@ -261,16 +102,46 @@ os.makedirs('output/assets/images', exist_ok=True)
 os.makedirs('output/assets/js', exist_ok=True)
 os.makedirs('output/assets/data', exist_ok=True)
 
+# Every file written below output/, relative to it. The link checker resolves
+# links against this set instead of crawling the site.
+emitted_paths = set()
+
+# Function to record a file below output/ as emitted
+def record_output(path):
+    emitted_paths.add(os.path.relpath(path, 'output').replace(os.sep, '/'))
+
+# Function to write a generated file (text or bytes) below output/, returning its size in bytes
+def write_output(path, content):
+    data = content if isinstance(content, bytes) else content.encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(data)
+    record_output(path)
+    report.add_output(len(data), pages=1 if path.endswith('.html') else 0)
+    return len(data)
+
+# Static assets are only rewritten when their content changes
+asset_manifest = load_manifest()
+
+# Function to write a static asset below output/ if its content changed
+def write_asset(path, content):
+    if write_if_changed(asset_manifest, path, content):
+        report.add_output(os.path.getsize(path))
+    record_output(path)
+
+# Function to copy a static file below output/ if its content changed
+def copy_asset(src, dst):
+    if copy_if_changed(asset_manifest, src, dst):
+        report.add_output(os.path.getsize(dst))
+    record_output(dst)
+
 # Create a default placeholder image
-with open('output/assets/images/placeholder.svg', 'w') as f:
-    f.write('''<svg width="800" height="400" xmlns="http://www.w3.org/2000/svg">
+write_asset('output/assets/images/placeholder.svg', '''<svg width="800" height="400" xmlns="http://www.w3.org/2000/svg">
     <rect width="800" height="400" fill="#e9ecef"/>
     <text x="400" y="200" font-family="Arial" font-size="30" text-anchor="middle" fill="#6c757d">Scissor Lift Rental</text>
 </svg>''')
 
 # Create a JavaScript file for image handling
-with open('output/assets/js/image-handler.js', 'w') as f:
-    f.write('''
+write_asset('output/assets/js/image-handler.js', '''
 // Function to handle image loading errors
 function handleImageError(img) {
     img.onerror = null; // Prevent infinite loops
@@ -314,8 +185,7 @@ document.addEventListener('DOMContentLoaded', function() {
 ''')
 
 # Create a JavaScript file for map handling
-with open('output/assets/js/map-handler.js', 'w') as f:
-    f.write('''
+write_asset('output/assets/js/map-handler.js', '''
 // Initialize the map when the page loads
 function initMap() {
     // Get the map container
@@ -380,171 +250,19 @@ function initMap() {
 }
 ''')
 
-# Create a JavaScript file for search functionality
-with open('output/assets/js/search-handler.js', 'w') as f:
-    f.write('''
-// Function to handle the search form submission
-function handleSearch(event) {
-    event.preventDefault();
-    
-    // Get the search query
-    var searchQuery = document.getElementById('search-input').value.trim();
-    
-    // If the search query is empty, show an error message
-    if (!searchQuery) {
-        showSearchError('Please enter a city, state, or zip code');
-        return;
-    }
-    
-    // Show loading indicator
-    showSearchLoading();
-    
-    // Fetch the search data
-    fetch('assets/data/search-data.json')
-        .then(response => response.json())
-        .then(data => {
-            processSearchResults(searchQuery, data);
-        })
-        .catch(error => {
-            console.error('Error fetching search data:', error);
-            showSearchError('An error occurred while searching. Please try again.');
-        });
-}
-
-// Function to process search results
-function processSearchResults(query, data) {
-    query = query.toLowerCase();
-    
-    // First, try to find an exact match for city or zip
-    var exactMatches = [];
-    
-    // Check for exact city matches
-    data.cities.forEach(city => {
-        if (city.name.toLowerCase() === query || 
-            city.name.toLowerCase() + ', ' + city.state.toLowerCase() === query) {
-            exactMatches.push({
-                type: 'city',
-                url: city.url,
-                name: city.name,
-                state: city.state,
-                distance: 0
-            });
-        }
-    });
-    
-    // Check for exact zip matches
-    data.zips.forEach(zip => {
-        if (zip.code === query) {
-            exactMatches.push({
-                type: 'zip',
-                url: zip.url,
-                name: zip.city,
-                state: zip.state,
-                distance: 0
-            });
-        }
-    });
-    
-    // If we have exact matches, redirect to the first one
-    if (exactMatches.length > 0) {
-        window.location.href = exactMatches[0].url;
-        return;
-    }
-    
-    // If no exact matches, try partial matches for cities
-    var partialMatches = [];
-    
-    data.cities.forEach(city => {
-        if (city.name.toLowerCase().includes(query) || 
-            query.includes(city.name.toLowerCase()) ||
-            city.state.toLowerCase().includes(query) ||
-            query.includes(city.state.toLowerCase())) {
-            
-            // Calculate a simple relevance score based on string similarity
-            var relevance = 0;
-            if (city.name.toLowerCase().startsWith(query)) relevance += 3;
-            else if (city.name.toLowerCase().includes(query)) relevance += 2;
-            else if (query.includes(city.name.toLowerCase())) relevance += 1;
-            
-            partialMatches.push({
-                type: 'city',
-                url: city.url,
-                name: city.name,
-                state: city.state,
-                relevance: relevance
-            });
-        }
-    });
-    
-    // Sort partial matches by relevance
-    partialMatches.sort((a, b) => b.relevance - a.relevance);
-    
-    // If we have partial matches, show the top 5
-    if (partialMatches.length > 0) {
-        showSearchResults(partialMatches.slice(0, 5));
-        return;
-    }
-    
-    // If no matches at all, show a message
-    showSearchError('No matches found. Please try a different search term.');
-}
-
-// Function to show search results
-function showSearchResults(results) {
-    var resultsContainer = document.getElementById('search-results');
-    resultsContainer.innerHTML = '';
-    resultsContainer.style.display = 'block';
-    
-    var resultsList = document.createElement('ul');
-    resultsList.className = 'search-results-list';
-    
-    results.forEach(result => {
-        var listItem = document.createElement('li');
-        var link = document.createElement('a');
-        link.href = result.url;
-        link.textContent = result.name + ', ' + result.state;
-        listItem.appendChild(link);
-        resultsList.appendChild(listItem);
-    });
-    
-    resultsContainer.appendChild(resultsList);
-    
-    // Hide loading indicator
-    document.getElementById('search-loading').style.display = 'none';
-}
-
-// Function to show search error
-function showSearchError(message) {
-    var resultsContainer = document.getElementById('search-results');
-    resultsContainer.innerHTML = '<p class="search-error">' + message + '</p>';
-    resultsContainer.style.display = 'block';
-    
-    // Hide loading indicator
-    document.getElementById('search-loading').style.display = 'none';
-}
-
-// Function to show search loading
-function showSearchLoading() {
-    var resultsContainer = document.getElementById('search-results');
-    resultsContainer.innerHTML = '';
-    resultsContainer.style.display = 'block';
-    
-    // Show loading indicator
-    document.getElementById('search-loading').style.display = 'block';
-}
-
-// Add event listener to the search form
-document.addEventListener('DOMContentLoaded', function() {
-    var searchForm = document.getElementById('search-form');
-    if (searchForm) {
-        searchForm.addEventListener('submit', handleSearch);
-    }
-});
-''')
+# Copy the search scripts: the form handler and the worker that loads the
+# sharded search index written below
+for script in ('search-handler.js', 'search-worker.js'):
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script)
+    if script == 'search-worker.js' and args.search_api:
+        with open(script_path, 'r', encoding='utf-8') as f:
+            worker_js = f.read().replace('var SEARCH_API_URL = null;', f'var SEARCH_API_URL = {json.dumps(args.search_api)};', 1)
+        write_asset(f'output/assets/js/{script}', worker_js)
+    else:
+        copy_asset(script_path, f'output/assets/js/{script}')
 
 # Create CSS file
-with open('output/assets/css/style.css', 'w') as f:
-    f.write('''
+style_css = '''
 /* Global styles */
 body {
     font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
@@ -666,6 +384,12 @@ a:hover {
     box-shadow: 0 5px 15px rgba(0, 0, 0, 0.15);
 }
 
+/* The card a company search result links to */
+.company-card:target {
+    outline: 3px solid #0056b3;
+    scroll-margin-top: 1rem;
+}
+
 .company-content {
     padding: 1.5rem;
 }
@@ -796,7 +520,8 @@ a:hover {
         grid-template-columns: repeat(auto-fill, minmax(150px, 1fr));
     }
 }
-    ''')
+    '''
+report.end_phase()
 
 # Set up Jinja2 templates
 env = Environment(loader=FileSystemLoader('.'))
@@ -1105,7 +830,7 @@ city_template = '''<!DOCTYPE html>
             
             {% if companies %}
                 {% for company in companies %}
-                <div class="company-card" itemscope itemtype="https://schema.org/LocalBusiness">
+                <div class="company-card" id="{{ company.anchor }}" itemscope itemtype="https://schema.org/LocalBusiness">
                     <meta itemprop="name" content="{{ company.name }}">
                     <meta itemprop="address" content="{{ company.full_address }}">
                     {% if company.phone %}
@@ -1307,8 +1032,13 @@ current_year = datetime.now().year
 print("Generating site structure...")
 
 # Create homepage
+report.start_phase('group')
 states_with_companies = df[df['state_slug'] != ''][['us_state', 'state_slug']].drop_duplicates().sort_values('us_state')
 states_list = [(state, slug) for state, slug in zip(states_with_companies['us_state'], states_with_companies['state_slug'])]
+report.end_phase()
+if args.only_state and args.only_state not in [slug for _, slug in states_list]:
+    parser.error(f"--only-state {args.only_state} matches no state of {args.input} "
+                 f"(one of: {', '.join(slug for _, slug in states_list)})")
 
 # Define popular states
 popular_states = [
@@ -1320,6 +1050,7 @@ popular_states = [
 ]
 
 # Generate homepage
+report.start_phase('render')
 homepage_html = Environment().from_string(homepage_template.replace(
     '<h2>Browse Scissor Lift Rentals by State</h2>',
     '<h2>Browse Scissor Lift Rentals by State <a href="states/" class="view-all-link">View All States <i class="fas fa-arrow-right"></i></a></h2>'
@@ -1330,60 +1061,50 @@ homepage_html = Environment().from_string(homepage_template.replace(
     meta_title=generate_meta_title("homepage"),
     meta_description=generate_meta_description("homepage")
 )
+render_time = report.end_phase(pages=1)
 
-with open('output/index.html', 'w') as f:
-    f.write(homepage_html)
+with report.phase('write'):
+    page_bytes = write_output('output/index.html', homepage_html)
+report.record_page('index.html', 'homepage', render_time, len(df), page_bytes)
 
 # Create search data for the search functionality
 print("Generating search data...")
-search_data = {
-    "cities": [],
-    "zips": []
-}
-
-# Process all cities
-for state, state_slug in states_list:
-    # Get cities in this state
-    state_df = df[df['state_slug'] == state_slug]
-    cities_with_companies = state_df[state_df['city_slug'] != ''][['city', 'city_slug']].drop_duplicates().sort_values('city')
-    
-    for city, city_slug in zip(cities_with_companies['city'], cities_with_companies['city_slug']):
-        # Add city to search data
-        search_data["cities"].append({
-            "name": city,
-            "state": state,
-            "url": f"{state_slug}/{city_slug}/"
-        })
-        
-        # Get zip codes for this city
-        city_df = state_df[state_df['city_slug'] == city_slug]
-        zip_codes = city_df['postal_code'].dropna().unique()
-        
-        for zip_code in zip_codes:
-            if zip_code and str(zip_code).strip():
-                # Add zip code to search data
-                search_data["zips"].append({
-                    "code": str(zip_code).strip(),
-                    "city": city,
-                    "state": state,
-                    "url": f"{state_slug}/{city_slug}/"
-                })
+report.start_phase('search_data')
+search_data, companies = build_search_data(df)
 
 # Save search data to a JSON file
-with open('output/assets/data/search-data.json', 'w') as f:
-    json.dump(search_data, f)
+write_output('output/assets/data/search-data.json', json.dumps(search_data, separators=(',', ':')))
+
+# Map every zip code to its nearest city with listings, so zip search never dead-ends
+nearby = nearby_zips(search_data, args.zip_centroids, (df['postal_code'], df['latitude'], df['longitude']))
+if nearby:
+    print(f"Mapped {len(nearby['code'])} {'zip codes' if nearby['digits'] == 5 else 'ZIP3 areas'} to their nearest city")
+
+# Save the sharded search index that search-worker.js loads
+search_index = build_search_index(search_data, nearby, companies)
+for kind in SEARCH_SHARD_KINDS:
+    os.makedirs(f'{SEARCH_INDEX_DIR}/{kind}', exist_ok=True)
+for path, content in search_index.items():
+    write_output(f'{SEARCH_INDEX_DIR}/{path}', content)
+remove_stale_shards(SEARCH_INDEX_DIR, search_index)
+report.end_phase()
 
 # Create state pages
 for state, state_slug in states_list:
+    if args.only_state and state_slug != args.only_state:
+        continue
     # Create state directory
     os.makedirs(f'output/{state_slug}', exist_ok=True)
     
     # Get cities in this state
+    report.start_phase('group')
     state_df = df[df['state_slug'] == state_slug]
     cities_with_companies = state_df[state_df['city_slug'] != ''][['city', 'city_slug']].drop_duplicates().sort_values('city')
     cities_list = [(city, slug) for city, slug in zip(cities_with_companies['city'], cities_with_companies['city_slug'])]
+    report.end_phase()
     
     # Generate state page
+    report.start_phase('render')
     state_html = Environment().from_string(state_template).render(
         state=state,
         cities=cities_list,
@@ -1393,9 +1114,11 @@ for state, state_slug in states_list:
         meta_title=f"Scissor Lift Rental in {state} | Top Equipment Rental Companies",
         meta_description=f"Looking for scissor lift rentals in {state}? Browse our directory of {state} scissor lift rental companies. Compare prices, equipment types, and availability for your project needs."
     )
+    render_time = report.end_phase(pages=1)
     
-    with open(f'output/{state_slug}/index.html', 'w') as f:
-        f.write(state_html)
+    with report.phase('write'):
+        page_bytes = write_output(f'output/{state_slug}/index.html', state_html)
+    report.record_page(f'{state_slug}/index.html', 'state', render_time, len(state_df), page_bytes)
     
     # Create city pages
     for city, city_slug in cities_list:
@@ -1403,9 +1126,12 @@ for state, state_slug in states_list:
         os.makedirs(f'output/{state_slug}/{city_slug}', exist_ok=True)
         
         # Get companies in this city
+        report.start_phase('group')
         city_df = state_df[state_df['city_slug'] == city_slug].sort_values('reviews_num', ascending=False)
+        report.end_phase()
         
         # Prepare map data if we have coordinates
+        report.start_phase('render')
         map_data = None
         if not city_df.empty and city_df['latitude'].notna().any() and city_df['longitude'].notna().any():
             # Filter out rows with invalid coordinates
@@ -1449,6 +1175,7 @@ for state, state_slug in states_list:
         for _, row in city_df.iterrows():
             companies.append({
                 'name': row['name'],
+                'anchor': row['anchor'],
                 'reviews': row['reviews'],
                 'Scissor_Lift_Brands': row['Scissor Lift Brands'],
                 'Sizes_Available': row['Sizes Available'],
@@ -1471,68 +1198,75 @@ for state, state_slug in states_list:
             meta_title=f"Scissor Lift Rental in {city}, {state} | Best Prices & Local Providers",
             meta_description=f"Find the best scissor lift rentals in {city}, {state}. Compare local providers, prices, and equipment options. Get quotes from top-rated scissor lift rental companies in {city}."
         )
+        render_time = report.end_phase(pages=1)
         
-        with open(f'output/{state_slug}/{city_slug}/index.html', 'w') as f:
-            f.write(city_html)
-
-# Generate sitemap.xml
-print("Generating sitemap.xml...")
-with open('output/sitemap.xml', 'w') as f:
-    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-    f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
-    
-    # Homepage
-    f.write('  <url>\n')
-    f.write('    <loc>https://scissorliftrentals.com/</loc>\n')
-    f.write('    <changefreq>weekly</changefreq>\n')
-    f.write('    <priority>1.0</priority>\n')
-    f.write('  </url>\n')
-    
-    # State pages
-    for state, state_slug in states_list:
+        with report.phase('write'):
+            page_bytes = write_output(f'output/{state_slug}/{city_slug}/index.html', city_html)
+        report.record_page(f'{state_slug}/{city_slug}/index.html', 'city', render_time, len(city_df), page_bytes)
+
+# Generate sitemap.xml; a single-state build keeps the sitemap of the last full build
+if args.only_state:
+    print("Skipping sitemap.xml for a single-state build...")
+else:
+    print("Generating sitemap.xml...")
+    report.start_phase('sitemap')
+    with open('output/sitemap.xml', 'w') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+    
+        # Homepage
         f.write('  <url>\n')
-        f.write(f'    <loc>https://scissorliftrentals.com/{state_slug}/</loc>\n')
+        f.write('    <loc>https://scissorliftrentals.com/</loc>\n')
         f.write('    <changefreq>weekly</changefreq>\n')
-        f.write('    <priority>0.8</priority>\n')
+        f.write('    <priority>1.0</priority>\n')
         f.write('  </url>\n')
-        
-        # City pages for this state
-        state_df = df[df['state_slug'] == state_slug]
-        cities = sorted(set(zip(state_df['city'], state_df['city_slug'])))
-        
-        for city, city_slug in cities:
+    
+        # State pages
+        for state, state_slug in states_list:
             f.write('  <url>\n')
-            f.write(f'    <loc>https://scissorliftrentals.com/{state_slug}/{city_slug}/</loc>\n')
+            f.write(f'    <loc>https://scissorliftrentals.com/{state_slug}/</loc>\n')
             f.write('    <changefreq>weekly</changefreq>\n')
-            f.write('    <priority>0.6</priority>\n')
+            f.write('    <priority>0.8</priority>\n')
             f.write('  </url>\n')
+        
+            # City pages for this state
+            state_df = df[df['state_slug'] == state_slug]
+            cities = sorted(set(zip(state_df['city'], state_df['city_slug'])))
+        
+            for city, city_slug in cities:
+                f.write('  <url>\n')
+                f.write(f'    <loc>https://scissorliftrentals.com/{state_slug}/{city_slug}/</loc>\n')
+                f.write('    <changefreq>weekly</changefreq>\n')
+                f.write('    <priority>0.6</priority>\n')
+                f.write('  </url>\n')
       
-    f.write('</urlset>')
+        f.write('</urlset>')
+    record_output('output/sitemap.xml')
+    report.add_output(os.path.getsize('output/sitemap.xml'))
+    report.end_phase()
 
 print("Site generation complete! Output is in the 'output' directory.")
 
 # Copy the scissor-lift.jpeg to the assets/images directory
 print("Copying hero image to assets directory...")
+report.start_phase('assets')
 os.makedirs('output/assets/images', exist_ok=True)
-import shutil
-shutil.copy('scissor-lift.jpeg', 'output/assets/images/scissor-lift.jpeg')
+copy_asset('scissor-lift.jpeg', 'output/assets/images/scissor-lift.jpeg')
 
 # Copy the favicon to the output directory
 print("Copying favicon to output directory...")
 os.makedirs('output/assets/images', exist_ok=True)
-shutil.copy('scissor-lift-favicon.png', 'output/assets/images/scissor-lift-favicon.png')
+copy_asset('scissor-lift-favicon.png', 'output/assets/images/scissor-lift-favicon.png')
 
 # Also copy to assets/images for direct references
 os.makedirs('output/assets/images', exist_ok=True)
-shutil.copy('scissor-lift-favicon.png', 'output/assets/images/favicon.ico')
+copy_asset('scissor-lift-favicon.png', 'output/assets/images/favicon.ico')
 
 # Add hero styles to the CSS file
 print("Adding hero styles to CSS...")
-with open('output/assets/css/style.css', 'r') as f:
-    css_content = f.read()
 
 # Add hero styles if they don't already exist
-if '.hero-container' not in css_content:
+if '.hero-container' not in style_css:
     hero_styles = '''
 /* Hero section styles */
 .hero-container {
@@ -1609,20 +1343,7 @@ if '.hero-container' not in css_content:
 }
 '''
     
-    with open('output/assets/css/style.css', 'a') as f:
-        f.write(hero_styles)
-
-# Generate state portal page
-print("Generating state portal page...")
-os.makedirs('output/states', exist_ok=True)
-
-state_portal_html = Environment().from_string(state_portal_template).render(
-    states=states_list,
-    current_year=current_year
-)
-
-with open('output/states/index.html', 'w') as f:
-    f.write(state_portal_html)
+    style_css += hero_styles
 
 # Update homepage to link to the state portal page
 homepage_template = homepage_template.replace(
@@ -1631,7 +1352,7 @@ homepage_template = homepage_template.replace(
 )
 
 # Add view-all-link style if it doesn't exist
-if '.view-all-link' not in css_content:
+if '.view-all-link' not in style_css:
     view_all_link_style = '''
 /* View all link */
 .view-all-link {
@@ -1660,16 +1381,13 @@ if '.view-all-link' not in css_content:
 }
 '''
     
-    with open('output/assets/css/style.css', 'a') as f:
-        f.write(view_all_link_style)
+    style_css += view_all_link_style
 
 # Add navigation styles to CSS
 print("Adding navigation styles to CSS...")
-with open('output/assets/css/style.css', 'r') as f:
-    css_content = f.read()
 
 # Add navigation styles if they don't already exist
-if '.main-nav' not in css_content:
+if '.main-nav' not in style_css:
     nav_styles = '''
 /* Navigation styles */
 .main-nav {
@@ -1780,14 +1498,52 @@ if '.main-nav' not in css_content:
 }
 '''
     
-    with open('output/assets/css/style.css', 'a') as f:
-        f.write(nav_styles)
+    style_css += nav_styles
+
+write_asset('output/assets/css/style.css', style_css)
+save_manifest(asset_manifest)
+report.end_phase()
 
-# Update the state portal page generation to use the correct CSS path
+# Generate state portal page, once its styles are in style.css
+print("Generating state portal page...")
+os.makedirs('output/states', exist_ok=True)
+report.start_phase('render')
 state_portal_html = Environment().from_string(state_portal_template).render(
     states=states_list,
     current_year=current_year
 )
-
-with open('output/states/index.html', 'w') as f:
-    f.write(state_portal_html) 
\ No newline at end of file
+render_time = report.end_phase(pages=1)
+
+with report.phase('write'):
+    page_bytes = write_output('output/states/index.html', state_portal_html)
+report.record_page('states/index.html', 'state_portal', render_time, len(df), page_bytes)
+
+# A single-state build leaves the other states' pages unwritten, so they must
+# not be pruned or reported as dangling link targets
+if args.only_state:
+    print(f"Built only the {args.only_state} state pages; skipping pruning and the link check.")
+else:
+    # Prune pages of states and cities that are no longer in the data
+    print("Pruning stale pages...")
+    with report.phase('prune'):
+        stale_pages = prune_stale_pages('output', emitted_paths)
+    if stale_pages:
+        print(f"Moved {len(stale_pages)} stale pages to stale-pages/ and recorded them in stale-pages.json for CDN purge.")
+
+    # Check the internal links of everything emitted above
+    print("Checking internal links...")
+    link_check_start = time.perf_counter()
+    with report.phase('link_check'):
+        link_count, dangling_links = check_links('output', emitted_paths)
+    report_dangling_links(link_count, sum(1 for path in emitted_paths if path.endswith('.html')),
+                          dangling_links, time.perf_counter() - link_check_start)
+
+# Write the build report next to output/; a single-state build gets its own
+# report, so build-report.json keeps describing the last full build
+report_path = f'build-report-{args.only_state}.json' if args.only_state else 'build-report.json'
+print(f"Writing build report to {report_path}...")
+print_report(report.write(report_path))
+
+if args.profile:
+    print(f"Writing phase profiles to {args.profile}/...")
+    print(report.profiler.write(args.profile, top=args.profile_top))
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Script to generate a synthetic scissor lift company dataset for scale testing.
+The dataset has the columns generate_site.py reads and is skewed the way the
+real spreadsheet is: listings follow state population, a few metros per state
+hold most of the listings, national chains repeat everywhere and review
+counts are heavy-tailed.
+
+Example:
+    python generate_synthetic_data.py --rows 50000 --cities 5000 --output synthetic.csv
+    python generate_site.py --input synthetic.csv
+"""
+
+import csv
+import json
+import random
+import argparse
+
+# State name -> (abbreviation, centroid latitude, centroid longitude, first zip3, population in millions)
+STATES = {
+    'Alabama': ('AL', 32.8, -86.8, 350, 5.1), 'Alaska': ('AK', 61.4, -150.0, 995, 0.7),
+    'Arizona': ('AZ', 33.7, -111.4, 850, 7.4), 'Arkansas': ('AR', 34.9, -92.4, 716, 3.1),
+    'California': ('CA', 36.1, -119.7, 900, 39.0), 'Colorado': ('CO', 39.1, -105.3, 800, 5.9),
+    'Connecticut': ('CT', 41.6, -72.7, 60, 3.6), 'Delaware': ('DE', 39.3, -75.5, 197, 1.0),
+    'District of Columbia': ('DC', 38.9, -77.0, 200, 0.7), 'Florida': ('FL', 27.8, -81.7, 320, 22.6),
+    'Georgia': ('GA', 33.0, -83.6, 300, 11.0), 'Hawaii': ('HI', 21.1, -157.5, 967, 1.4),
+    'Idaho': ('ID', 44.2, -114.5, 832, 2.0), 'Illinois': ('IL', 40.3, -89.0, 600, 12.5),
+    'Indiana': ('IN', 39.8, -86.3, 460, 6.9), 'Iowa': ('IA', 42.0, -93.2, 500, 3.2),
+    'Kansas': ('KS', 38.5, -96.7, 660, 2.9), 'Kentucky': ('KY', 37.7, -84.7, 400, 4.5),
+    'Louisiana': ('LA', 31.2, -91.9, 700, 4.6), 'Maine': ('ME', 44.7, -69.4, 39, 1.4),
+    'Maryland': ('MD', 39.1, -76.8, 206, 6.2), 'Massachusetts': ('MA', 42.2, -71.5, 10, 7.0),
+    'Michigan': ('MI', 43.3, -84.5, 480, 10.0), 'Minnesota': ('MN', 45.7, -93.9, 550, 5.7),
+    'Mississippi': ('MS', 32.7, -89.7, 386, 2.9), 'Missouri': ('MO', 38.5, -92.3, 630, 6.2),
+    'Montana': ('MT', 46.9, -110.5, 590, 1.1), 'Nebraska': ('NE', 41.1, -98.3, 680, 2.0),
+    'Nevada': ('NV', 38.3, -117.1, 889, 3.2), 'New Hampshire': ('NH', 43.5, -71.6, 30, 1.4),
+    'New Jersey': ('NJ', 40.3, -74.5, 70, 9.3), 'New Mexico': ('NM', 34.8, -106.2, 870, 2.1),
+    'New York': ('NY', 42.2, -74.9, 100, 19.6), 'North Carolina': ('NC', 35.6, -79.8, 270, 10.8),
+    'North Dakota': ('ND', 47.5, -99.8, 580, 0.8), 'Ohio': ('OH', 40.4, -82.8, 430, 11.8),
+    'Oklahoma': ('OK', 35.6, -96.9, 730, 4.1), 'Oregon': ('OR', 44.6, -122.1, 970, 4.2),
+    'Pennsylvania': ('PA', 40.6, -77.2, 150, 13.0), 'Rhode Island': ('RI', 41.7, -71.5, 28, 1.1),
+    'South Carolina': ('SC', 33.9, -80.9, 290, 5.4), 'South Dakota': ('SD', 44.3, -99.4, 570, 0.9),
+    'Tennessee': ('TN', 35.7, -86.7, 370, 7.1), 'Texas': ('TX', 31.1, -97.6, 750, 30.5),
+    'Utah': ('UT', 40.2, -111.9, 840, 3.4), 'Vermont': ('VT', 44.0, -72.7, 50, 0.6),
+    'Virginia': ('VA', 37.8, -78.2, 220, 8.7), 'Washington': ('WA', 47.4, -121.5, 980, 7.8),
+    'West Virginia': ('WV', 38.5, -80.9, 247, 1.8), 'Wisconsin': ('WI', 44.3, -89.6, 530, 5.9),
+    'Wyoming': ('WY', 42.8, -107.3, 820, 0.6),
+}
+
+CITY_PREFIXES = ['', '', '', '', 'North ', 'South ', 'East ', 'West ', 'New ', 'Lake ', 'Port ', 'Fort ', 'Mount ']
+CITY_ROOTS = [
+    'Oak', 'Cedar', 'Maple', 'Spring', 'River', 'Green', 'Fair', 'Clear', 'Rock', 'Pine', 'Elm', 'Ash',
+    'Brook', 'Stone', 'Silver', 'Gold', 'Red', 'White', 'Black', 'Bright', 'Sun', 'Wind', 'Marsh', 'Mill',
+    'Bridge', 'Glen', 'High', 'Long', 'Fox', 'Deer', 'Eagle', 'Hawk', 'Bear', 'Wolf', 'Laurel', 'Willow',
+    'Harris', 'Madison', 'Jackson', 'Franklin', 'Clinton', 'Warren', 'Marion', 'Salem', 'Greens', 'Chester',
+    'Bloom', 'Frank', 'Lexing', 'Burling', 'Living', 'Arling', 'Wilming', 'Hunting',
+]
+CITY_SUFFIXES = ['ville', 'ton', 'field', 'burg', 'wood', 'port', 'dale', 'view', ' City', ' Springs', ' Falls',
+                 ' Heights', 'ford', 'haven', 'land', 'mont', 'ridge']
+
+# National chains appear in most cities, so the real data has many repeated names
+CHAINS = [('United Rentals', 'https://www.unitedrentals.com/'), ('Sunbelt Rentals', 'https://www.sunbeltrentals.com/'),
+          ('Herc Rentals', 'https://www.hercrentals.com/'), ('The Home Depot Tool Rental', 'https://www.homedepot.com/c/tool_and_truck_rental'),
+          ('H&E Equipment Services', 'https://www.he-equipment.com/'), ('Sunstate Equipment', 'https://www.sunstateequip.com/')]
+LOCAL_NAMES = ['{city} Equipment Rental', '{city} Rent-All', '{surname} Lift & Equipment', '{surname} Rentals',
+               'A-1 Rental of {city}', '{surname} Aerial Platforms', 'All Star Rentals {city}', '{city} Tool & Lift']
+SURNAMES = ['Smith', 'Johnson', 'Miller', 'Davis', 'Wilson', 'Anderson', 'Taylor', 'Moore', 'Martin', 'Thompson',
+            'Garcia', 'Clark', 'Lewis', 'Walker', 'Young', 'Allen', 'King', 'Wright', 'Hill', 'Baker']
+STREETS = ['Main St', 'Industrial Blvd', 'Commerce Dr', 'Highway 10', 'Oak Ave', 'Airport Rd', 'Market St', 'Park Ave']
+
+BRANDS = ['Genie', 'JLG', 'Skyjack', 'Haulotte', 'Snorkel', 'MEC', 'Hy-Brid', 'LGMG']
+BRAND_WEIGHTS = [30, 28, 20, 6, 6, 4, 3, 3]
+SIZES = ['13ft', '19ft', '20ft', '26ft', '32ft', '40ft', '45ft', '50ft']
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+HOURS = ['7AM-5PM', '7AM-4:30PM', '6:30AM-5PM', '8AM-5PM', '7AM-6PM']
+
+ABOUT_OPTIONS = {
+    'Service options': ['Onsite services', 'Online appointments', 'Delivery', 'In-store pickup'],
+    'Accessibility': ['Wheelchair accessible entrance', 'Wheelchair accessible parking lot'],
+    'Payments': ['Credit cards', 'Debit cards', 'NFC mobile payments'],
+}
+
+COLUMNS = ['name', 'site', 'photo', 'Scissor Lifts', 'Scissor Lift Brands', 'Sizes Available', 'phone',
+           'full_address', 'city', 'us_state', 'postal_code', 'reviews', 'working_hours', 'about',
+           'latitude', 'longitude']
+
+def city_names(rng):
+    """Yield an endless stream of unique synthetic city names."""
+    names = [prefix + root + suffix for prefix in CITY_PREFIXES for root in CITY_ROOTS for suffix in CITY_SUFFIXES]
+    names = sorted(set(names))
+    rng.shuffle(names)
+    round_number = 0
+    while True:
+        for name in names:
+            yield name if round_number == 0 else f'{name} {round_number + 1}'
+        round_number += 1
+
+def plan_cities(rng, state_names, city_count):
+    """Spread city_count cities (at least one per state) over the states, proportional to population."""
+    weights = [STATES[state][4] ** 0.8 for state in state_names]
+    total = sum(weights)
+    counts = [max(1, int(city_count * weight / total)) for weight in weights]
+    # Hand out the rounding remainder to the largest states, or take back the
+    # cities the one-per-state minimum added from the states with the most
+    for index in sorted(range(len(state_names)), key=lambda i: -weights[i])[:max(0, city_count - sum(counts))]:
+        counts[index] += 1
+    while sum(counts) > city_count:
+        counts[max(range(len(counts)), key=lambda i: counts[i])] -= 1
+
+    names = city_names(rng)
+    cities = []
+    for state, count in zip(state_names, counts):
+        _, lat, lng, zip3, population = STATES[state]
+        zip_spread = max(3, min(60, int(population * 4)))
+        for rank in range(1, count + 1):
+            zip_base = min(zip3 + rng.randrange(zip_spread), 999) * 100 + rng.randrange(90)
+            # Bigger cities (low rank) have more zip codes
+            zip_count = max(1, int(6 / rank ** 0.5))
+            cities.append({
+                'name': next(names),
+                'state': state,
+                'rank': rank,
+                'lat': lat + rng.gauss(0, 1.2),
+                'lng': lng + rng.gauss(0, 1.6),
+                'zips': [zip_base + i for i in range(zip_count)],
+            })
+    return cities
+
+def random_hours(rng):
+    """Return a working_hours value; a few are empty or malformed like the real export."""
+    roll = rng.random()
+    if roll < 0.15:
+        return ''
+    if roll < 0.18:
+        return "{'Monday': '7AM-5PM', 'Tuesday': '7AM"
+    open_days = DAYS[:5] if rng.random() < 0.6 else DAYS[:6]
+    hours = rng.choice(HOURS)
+    return json.dumps({day: hours if day in open_days else 'Closed' for day in DAYS})
+
+def random_about(rng):
+    """Return an about value in the nested JSON form of the real export."""
+    if rng.random() < 0.2:
+        return ''
+    about = {}
+    for category, options in ABOUT_OPTIONS.items():
+        if rng.random() < 0.7:
+            about[category] = {option: rng.random() < 0.8 for option in rng.sample(options, rng.randint(1, len(options)))}
+    return json.dumps(about)
+
+def random_photo(rng):
+    """Return a photo URL, mostly Google-hosted with size segments."""
+    if rng.random() < 0.3:
+        return ''
+    token = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-') for _ in range(40))
+    return f'https://lh5.googleusercontent.com/p/AF1QipP{token}=w{rng.choice([203, 408, 800])}-h{rng.choice([100, 300, 500])}-k-no'
+
+def make_company(rng, city, serial):
+    """Return one synthetic company row located in city."""
+    state = city['state']
+    abbreviation = STATES[state][0]
+    if rng.random() < 0.35:
+        name, site = rng.choice(CHAINS)
+        site = f'{site}?utm_source=gmb&utm_medium=organic&utm_campaign={serial}' if rng.random() < 0.5 else site
+    else:
+        name = rng.choice(LOCAL_NAMES).format(city=city['name'], surname=rng.choice(SURNAMES))
+        site = '' if rng.random() < 0.25 else f"https://www.{name.lower().replace(' ', '').replace('&', 'and')[:30]}.com/"
+
+    postal_code = rng.choice(city['zips']) if rng.random() < 0.97 else ''
+    # Heavy-tailed review counts: most listings have a handful, a few have thousands
+    reviews = 0 if rng.random() < 0.1 else int(rng.lognormvariate(2.8, 1.4))
+    brands = sorted(set(rng.choices(BRANDS, BRAND_WEIGHTS, k=rng.randint(1, 4))))
+    sizes = sorted(rng.sample(SIZES, rng.randint(1, 5)), key=lambda size: int(size[:-2]))
+
+    return {
+        'name': name,
+        'site': site,
+        'photo': random_photo(rng),
+        'Scissor Lifts': 'Yes',
+        'Scissor Lift Brands': ', '.join(brands) if rng.random() < 0.8 else '',
+        'Sizes Available': ', '.join(sizes) if rng.random() < 0.7 else '',
+        'phone': f'({rng.randint(201, 989)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}',
+        'full_address': f"{rng.randint(1, 9999)} {rng.choice(STREETS)}, {city['name']}, {abbreviation} {postal_code}".strip(),
+        'city': city['name'],
+        'us_state': state,
+        'postal_code': postal_code,
+        'reviews': reviews,
+        'working_hours': random_hours(rng),
+        'about': random_about(rng),
+        # generate_site.py expects every listing to have coordinates
+        'latitude': round(city['lat'] + rng.gauss(0, 0.03), 6),
+        'longitude': round(city['lng'] + rng.gauss(0, 0.03), 6),
+    }
+
+def generate_companies(rows, state_count=51, city_count=2250, seed=0):
+    """Generate a list of synthetic company rows."""
+    rng = random.Random(seed)
+    # Every city needs a listing and every state a city
+    city_count = min(city_count, rows)
+    state_names = sorted(STATES, key=lambda state: -STATES[state][4])[:min(state_count, city_count)]
+    cities = plan_cities(rng, state_names, city_count)
+
+    # Every city gets one listing, the rest follow state population and a
+    # Zipf distribution over each state's cities
+    weights = [STATES[city['state']][4] / city['rank'] ** 1.1 for city in cities]
+    chosen = cities + rng.choices(cities, weights, k=rows - len(cities))
+    return [make_company(rng, city, serial) for serial, city in enumerate(chosen)]
+
+def write_companies(companies, path):
+    """Write the companies as .csv, or as .xlsx through pandas."""
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(companies)
+    else:
+        import pandas as pd
+        pd.DataFrame(companies, columns=COLUMNS).to_excel(path, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic scissor lift company dataset')
+    parser.add_argument('--rows', type=int, default=5000, help='Number of company listings')
+    parser.add_argument('--states', type=int, default=len(STATES), help='Number of states (most populous first)')
+    parser.add_argument('--cities', type=int, default=2250, help='Number of distinct cities')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    parser.add_argument('--output', default='synthetic-companies.csv', help='Output file (.csv or .xlsx)')
+
+    args = parser.parse_args()
+    for option in ('rows', 'states', 'cities'):
+        if getattr(args, option) < 1:
+            parser.error(f'--{option} must be at least 1')
+
+    companies = generate_companies(args.rows, min(args.states, len(STATES)), args.cities, args.seed)
+    write_companies(companies, args.output)
+
+    city_total = len({(company['us_state'], company['city']) for company in companies})
+    state_total = len({company['us_state'] for company in companies})
+    print(f"Generated {len(companies)} companies in {city_total} cities across {state_total} states: {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Offline page-weight analyzer for the generated website.
+Parses every HTML page below output/ and counts, per page and per page type,
+the requests it makes, how many of them block rendering, the bytes it
+transfers (raw and gzip-compressed), its inline script size and its
+third-party references. Pages that exceed a budget are listed and the script
+exits with status 1, so budgets can gate a build.
+
+Only files below output/ can be weighed offline, so transfer bytes cover the
+page and its local resources; third-party resources are counted as requests
+and listed by host. Images referenced from a stylesheet (e.g. the hero JPEG)
+are charged to every page that loads the stylesheet.
+
+Example:
+    python page_weight.py --budget compressed_bytes=60000
+    python page_weight.py --budgets page-budgets.json --save page-weight.json
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import argparse
+import posixpath
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+from check_links import resolve_link, list_output_files
+
+# gzip level typical of web servers and CDNs
+COMPRESSION_LEVEL = 6
+
+# Matches url(...) references in CSS
+CSS_URL_PATTERN = re.compile(r'url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)')
+
+# Matches fetch('...') calls with a literal URL in JavaScript
+FETCH_PATTERN = re.compile(r'fetch\(\s*[\'"]([^\'"]+)[\'"]')
+
+METRICS = ['requests', 'blocking_requests', 'transfer_bytes', 'compressed_bytes', 'inline_script_bytes',
+           'third_party_requests']
+
+# Budgets applied to every page type unless overridden with --budgets/--budget
+DEFAULT_BUDGETS = {
+    'blocking_requests': 6,
+    'compressed_bytes': 250_000,
+    'inline_script_bytes': 20_000,
+    'third_party_requests': 6,
+}
+
+class ResourceParser(HTMLParser):
+    """Collects the resources an HTML page loads and its inline scripts."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.resources = []  # (url, blocking)
+        self.inline_scripts = []
+        self.in_inline_script = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or '' for name, value in attrs}
+        if tag == 'link':
+            rel = attrs.get('rel', '').lower().split()
+            if 'stylesheet' in rel:
+                # Stylesheets block rendering unless they only apply to print
+                self.resources.append((attrs.get('href', ''), attrs.get('media', 'all') != 'print'))
+            elif {'icon', 'preload', 'modulepreload'} & set(rel):
+                self.resources.append((attrs.get('href', ''), False))
+        elif tag == 'script':
+            if 'src' in attrs:
+                blocking = not ('async' in attrs or 'defer' in attrs or attrs.get('type') == 'module')
+                self.resources.append((attrs['src'], blocking))
+            elif attrs.get('type', 'text/javascript') in ('text/javascript', 'module', 'application/javascript'):
+                # JSON-LD and other data blocks are not executed
+                self.in_inline_script = True
+                self.inline_scripts.append('')
+        elif tag in ('img', 'iframe', 'source', 'video', 'audio') and attrs.get('src'):
+            self.resources.append((attrs['src'], False))
+
+    def handle_data(self, data):
+        if self.in_inline_script:
+            self.inline_scripts[-1] += data
+
+    def handle_endtag(self, tag):
+        if tag == 'script':
+            self.in_inline_script = False
+
+def page_type(path):
+    """Return the page type of a site-relative HTML path."""
+    parts = path.split('/')
+    if path == 'index.html':
+        return 'homepage'
+    if path == 'states/index.html':
+        return 'state_portal'
+    if len(parts) == 1:
+        return 'static'
+    if len(parts) == 2:
+        return 'state'
+    return 'city'
+
+def is_third_party(url):
+    return url.lower().startswith(('http:', 'https:', '//'))
+
+class PageWeigher:
+    """Weighs pages, caching the sizes and sub-resources of local files."""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.sizes = {}
+        self.subresources = {}
+
+    def read(self, target):
+        with open(os.path.join(self.output_dir, target), 'rb') as f:
+            return f.read()
+
+    def size(self, target):
+        """Return the (raw, compressed) size of a local file, or None if it is missing."""
+        if target not in self.sizes:
+            try:
+                data = self.read(target)
+            except OSError:
+                self.sizes[target] = None
+            else:
+                # Servers send already-compressed formats such as JPEG as they are
+                compressed = len(gzip.compress(data, COMPRESSION_LEVEL))
+                self.sizes[target] = (len(data), min(len(data), compressed))
+        return self.sizes[target]
+
+    def nested_urls(self, target):
+        """Return the URLs a local stylesheet or script loads, resolved against the page root."""
+        if target not in self.subresources:
+            urls = []
+            try:
+                text = self.read(target).decode('utf-8', 'replace')
+            except OSError:
+                text = ''
+            if target.endswith('.css'):
+                # CSS url()s resolve against the stylesheet itself
+                for url in CSS_URL_PATTERN.findall(text):
+                    resolved = resolve_link(posixpath.dirname(target), url)
+                    urls.append(('/' + resolved if resolved is not None else url, False))
+            elif target.endswith('.js'):
+                # fetch() URLs resolve against the page, so they are kept as written
+                urls = [(url, False) for url in FETCH_PATTERN.findall(text)]
+            self.subresources[target] = urls
+        return self.subresources[target]
+
+    def weigh(self, path):
+        """Return the weight metrics of one HTML page."""
+        html = self.read(path)
+        parser = ResourceParser()
+        parser.feed(html.decode('utf-8', 'replace'))
+        page_dir = posixpath.dirname(path)
+
+        resources = list(parser.resources)
+        for script in parser.inline_scripts:
+            resources.extend((url, False) for url in FETCH_PATTERN.findall(script))
+
+        weight = dict.fromkeys(METRICS, 0)
+        weight['transfer_bytes'], weight['compressed_bytes'] = self.size(path)
+        weight['requests'] = 1
+        third_party_hosts = set()
+        seen = set()
+        while resources:
+            url, blocking = resources.pop(0)
+            if not url or url.startswith('data:') or url in seen:
+                continue
+            seen.add(url)
+            if is_third_party(url):
+                weight['third_party_requests'] += 1
+                third_party_hosts.add(urlsplit(url if ':' in url else 'https:' + url).netloc)
+            else:
+                target = resolve_link(page_dir, url)
+                if target is None or target in seen:
+                    continue
+                seen.add(target)
+                size = self.size(target)
+                if size:
+                    weight['transfer_bytes'] += size[0]
+                    weight['compressed_bytes'] += size[1]
+                resources.extend(self.nested_urls(target))
+            weight['requests'] += 1
+            weight['blocking_requests'] += blocking
+        weight['inline_script_bytes'] = sum(len(script.encode('utf-8')) for script in parser.inline_scripts)
+        return dict(path=path, type=page_type(path), third_party_hosts=sorted(third_party_hosts), **weight)
+
+def load_budgets(path=None, overrides=()):
+    """Return budgets per page type ('*' applies to all), from a JSON file and metric=value overrides."""
+    budgets = {'*': dict(DEFAULT_BUDGETS)}
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            for page_type_name, limits in json.load(f).items():
+                budgets.setdefault(page_type_name, {}).update(limits)
+    for override in overrides:
+        metric, _, value = override.partition('=')
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {', '.join(METRICS)}")
+        budgets['*'][metric] = int(value)
+    return budgets
+
+def check_budgets(pages, budgets):
+    """Return (path, metric, value, limit) for every budget a page exceeds."""
+    failures = []
+    for page in pages:
+        limits = dict(budgets.get('*', {}))
+        limits.update(budgets.get(page['type'], {}))
+        for metric, limit in limits.items():
+            if limit is not None and page[metric] > limit:
+                failures.append((page['path'], metric, page[metric], limit))
+    return failures
+
+def summarize(pages):
+    """Return the median and max of every metric per page type."""
+    by_type = {}
+    for page in pages:
+        by_type.setdefault(page['type'], []).append(page)
+    summary = {}
+    for name, typed in by_type.items():
+        summary[name] = {'pages': len(typed)}
+        for metric in METRICS:
+            values = sorted(page[metric] for page in typed)
+            summary[name][metric] = {'median': values[len(values) // 2], 'max': values[-1]}
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Weigh the generated pages and enforce page-weight budgets')
+    parser.add_argument('--output-dir', default='output', help='Generated site directory')
+    parser.add_argument('--budgets', help='JSON file of budgets per page type, e.g. {"city": {"compressed_bytes": 60000}}')
+    parser.add_argument('--budget', action='append', default=[], metavar='METRIC=VALUE',
+                        help='Budget applied to every page type (repeatable)')
+    parser.add_argument('--save', help='Write per-page weights and the summary to this JSON file')
+    parser.add_argument('--limit', type=int, default=20, help='Budget failures to list')
+
+    args = parser.parse_args()
+
+    budgets = load_budgets(args.budgets, args.budget)
+    weigher = PageWeigher(args.output_dir)
+    pages = [weigher.weigh(path) for path in sorted(list_output_files(args.output_dir)) if path.endswith('.html')]
+    summary = summarize(pages)
+
+    print(f"{'Page type':<14}{'Pages':>7}" + ''.join(f"{metric:>22}" for metric in METRICS))
+    for name, stats in summary.items():
+        print(f"{name:<14}{stats['pages']:>7}" + ''.join(
+            f"{stats[metric]['median']:>12,} /{stats[metric]['max']:>8,}" for metric in METRICS))
+    print("(median / max per page)")
+
+    third_party_hosts = sorted({host for page in pages for host in page['third_party_hosts']})
+    print(f"Third-party hosts: {', '.join(third_party_hosts) or 'none'}")
+
+    failures = check_budgets(pages, budgets)
+    for path, metric, value, limit in failures[:args.limit]:
+        print(f"  {path}: {metric} {value:,} > {limit:,}")
+    if len(failures) > args.limit:
+        print(f"  ... and {len(failures) - args.limit} more")
+    print(f"{len(failures)} budget failures on {len({failure[0] for failure in failures})} of {len(pages)} pages")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'pages': pages, 'failures': failures}, f, indent=2)
+        print(f"Results saved to {args.save}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
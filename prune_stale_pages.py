@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Script to prune stale state and city pages from the generated website.
+A page is stale when its state or city no longer exists in the data. Stale
+pages are moved to a quarantine directory (or deleted) and their URLs are
+recorded so they can be purged from the CDN after the next deploy.
+"""
+
+import os
+import re
+import json
+import shutil
+import argparse
+from datetime import datetime
+
+# Live domain of the site (see fix_sitemap.py)
+SITE_URL = 'https://www.scissorliftsforrent.com/'
+
+# Top-level directories of output/ that do not hold state pages
+NON_STATE_DIRS = {'assets', 'states'}
+
+def find_stale_pages(output_dir, current_paths):
+    """Return the state and city pages in output_dir that are not in current_paths."""
+    current_paths = set(current_paths)
+    stale = []
+    for state_dir in sorted(os.listdir(output_dir)):
+        state_path = os.path.join(output_dir, state_dir)
+        if state_dir in NON_STATE_DIRS or not os.path.isdir(state_path):
+            continue
+        for city_dir in sorted(os.listdir(state_path)):
+            page = f'{state_dir}/{city_dir}/index.html'
+            if page not in current_paths and os.path.isfile(os.path.join(state_path, city_dir, 'index.html')):
+                stale.append(page)
+        page = f'{state_dir}/index.html'
+        if page not in current_paths and os.path.isfile(os.path.join(state_path, 'index.html')):
+            stale.append(page)
+    return stale
+
+def remove_empty_dirs(output_dir, directory):
+    """Remove directory and its parents while they are empty, stopping at output_dir."""
+    output_dir = os.path.abspath(output_dir)
+    directory = os.path.abspath(directory)
+    while directory != output_dir and directory.startswith(output_dir) and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+def record_stale_pages(pages, record_path, base_url=SITE_URL):
+    """Append the pruned pages to the CDN purge record at record_path."""
+    record = {'pages': []}
+    if os.path.exists(record_path):
+        with open(record_path, 'r', encoding='utf-8') as f:
+            record = json.load(f)
+
+    pruned_at = datetime.now().isoformat(timespec='seconds')
+    known = {entry['path'] for entry in record['pages']}
+    for page in pages:
+        path = page[:-len('index.html')]
+        if path not in known:
+            record['pages'].append({'path': path, 'url': base_url + path, 'pruned_at': pruned_at})
+
+    with open(record_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+
+def prune_stale_pages(output_dir, current_paths, quarantine_dir='stale-pages', record_path='stale-pages.json',
+                      base_url=SITE_URL):
+    """Move (or delete, if quarantine_dir is None) stale pages and record them for purging.
+
+    Returns the list of pruned pages relative to output_dir.
+    """
+    stale = find_stale_pages(output_dir, current_paths)
+    for page in stale:
+        page_path = os.path.join(output_dir, page)
+        if quarantine_dir:
+            destination = os.path.join(quarantine_dir, page)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.move(page_path, destination)
+        else:
+            os.remove(page_path)
+        remove_empty_dirs(output_dir, os.path.dirname(page_path))
+
+    if stale and record_path:
+        record_stale_pages(stale, record_path, base_url)
+    return stale
+
+def read_sitemap_paths(sitemap_path):
+    """Return the page paths listed in a sitemap, relative to the site root."""
+    with open(sitemap_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    paths = set()
+    for loc in re.findall(r'<loc>https?://[^/<]+/([^<]*)</loc>', content):
+        paths.add(loc + 'index.html' if loc == '' or loc.endswith('/') else loc)
+    return paths
+
+def main():
+    parser = argparse.ArgumentParser(description='Prune state and city pages that are no longer in the sitemap')
+    parser.add_argument('--output-dir', default='output', help='Generated website directory')
+    parser.add_argument('--quarantine-dir', default='stale-pages', help='Directory to move stale pages to')
+    parser.add_argument('--delete', action='store_true', help='Delete stale pages instead of quarantining them')
+    parser.add_argument('--record', default='stale-pages.json', help='File recording pruned URLs for CDN purge')
+    parser.add_argument('--base-url', default=SITE_URL, help='Site URL used for the recorded purge URLs')
+    parser.add_argument('--dry-run', action='store_true', help='Only list the stale pages')
+
+    args = parser.parse_args()
+
+    sitemap_path = os.path.join(args.output_dir, 'sitemap.xml')
+    if not os.path.exists(sitemap_path):
+        print(f"Sitemap not found at {sitemap_path}")
+        return
+
+    current_paths = read_sitemap_paths(sitemap_path)
+    if args.dry_run:
+        stale = find_stale_pages(args.output_dir, current_paths)
+    else:
+        quarantine_dir = None if args.delete else args.quarantine_dir
+        stale = prune_stale_pages(args.output_dir, current_paths, quarantine_dir, args.record, args.base_url)
+
+    for page in stale:
+        print(f"Stale: {page}")
+    print(f"Found {len(stale)} stale pages.")
+
+if __name__ == '__main__':
+    main()
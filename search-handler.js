@@ -1,3 +1,77 @@
+// Search form handling. Searches run in a Web Worker (search-worker.js,
+// next to this script), so fetching and scanning the index never blocks the
+// page; browsers without workers load the same script on the page instead.
+var SEARCH_SCRIPT_URL = document.currentScript ? document.currentScript.src : window.location.href;
+var SEARCH_WORKER_URL = new URL('search-worker.js', SEARCH_SCRIPT_URL).href;
+
+// The worker, its pending requests by id, and the script load promise of the fallback
+var searchWorker = null;
+var searchRequests = {};
+var searchRequestCount = 0;
+var searchScript = null;
+
+// Function to start the search worker, so it loads the index in the background
+function startSearchWorker() {
+    if (searchWorker || searchScript) return;
+    if (window.Worker) {
+        try {
+            searchWorker = new Worker(SEARCH_WORKER_URL);
+            searchWorker.onmessage = event => {
+                var request = searchRequests[event.data.id];
+                delete searchRequests[event.data.id];
+                if (!request) return;
+                if (event.data.error) {
+                    request.reject(new Error(event.data.error));
+                } else {
+                    request.resolve(event.data.answer);
+                }
+            };
+            searchWorker.onerror = event => {
+                Object.keys(searchRequests).forEach(id => searchRequests[id].reject(new Error(event.message)));
+                searchRequests = {};
+            };
+            return;
+        } catch (error) {
+            console.error('Error starting the search worker:', error);
+            searchWorker = null;
+        }
+    }
+    searchScript = new Promise((resolve, reject) => {
+        var script = document.createElement('script');
+        script.src = SEARCH_WORKER_URL;
+        script.onload = resolve;
+        script.onerror = () => {
+            searchScript = null;
+            reject(new Error('Could not load ' + SEARCH_WORKER_URL));
+        };
+        document.head.appendChild(script);
+    });
+}
+
+// Function to send a message to the search worker; resolves to its answer
+function askSearchWorker(message) {
+    startSearchWorker();
+    if (!searchWorker) {
+        return searchScript.then(() => answerSearchMessage(message));
+    }
+    return new Promise((resolve, reject) => {
+        message.id = ++searchRequestCount;
+        searchRequests[message.id] = { resolve: resolve, reject: reject };
+        searchWorker.postMessage(message);
+    });
+}
+
+// Function to act on a search answer: go to a page, list results or show an error
+function showSearchAnswer(answer) {
+    if (answer.redirect) {
+        window.location.href = answer.redirect;
+    } else if (answer.results) {
+        showSearchResults(answer.results);
+    } else {
+        showSearchError(answer.error);
+    }
+}
+
 // Function to handle the search form submission
 function handleSearch(event) {
     event.preventDefault();
@@ -14,96 +88,14 @@ function handleSearch(event) {
     // Show loading indicator
     showSearchLoading();
     
-    // Fetch the search data
-    fetch('assets/data/search-data.json')
-        .then(response => response.json())
-        .then(data => {
-            processSearchResults(searchQuery, data);
-        })
+    askSearchWorker({ type: 'search', query: searchQuery })
+        .then(showSearchAnswer)
         .catch(error => {
             console.error('Error fetching search data:', error);
             showSearchError('An error occurred while searching. Please try again.');
         });
 }
 
-// Function to process search results
-function processSearchResults(query, data) {
-    query = query.toLowerCase();
-    
-    // First, try to find an exact match for city or zip
-    var exactMatches = [];
-    
-    // Check for exact city matches
-    data.cities.forEach(city => {
-        if (city.name.toLowerCase() === query || 
-            city.name.toLowerCase() + ', ' + city.state.toLowerCase() === query) {
-            exactMatches.push({
-                type: 'city',
-                url: city.url,
-                name: city.name,
-                state: city.state,
-                distance: 0
-            });
-        }
-    });
-    
-    // Check for exact zip matches
-    data.zips.forEach(zip => {
-        if (zip.code === query) {
-            exactMatches.push({
-                type: 'zip',
-                url: zip.url,
-                name: zip.city,
-                state: zip.state,
-                distance: 0
-            });
-        }
-    });
-    
-    // If we have exact matches, redirect to the first one
-    if (exactMatches.length > 0) {
-        window.location.href = exactMatches[0].url;
-        return;
-    }
-    
-    // If no exact matches, try partial matches for cities
-    var partialMatches = [];
-    
-    data.cities.forEach(city => {
-        if (city.name.toLowerCase().includes(query) || 
-            query.includes(city.name.toLowerCase()) ||
-            city.state.toLowerCase().includes(query) ||
-            query.includes(city.state.toLowerCase())) {
-            
-            // Calculate a simple relevance score based on string similarity
-            var relevance = 0;
-            if (city.name.toLowerCase().startsWith(query)) relevance += 3;
-            else if (city.name.toLowerCase().includes(query)) relevance += 2;
-            else if (query.includes(city.name.toLowerCase())) relevance += 1;
-            
-            partialMatches.push({
-                type: 'city',
-                url: city.url,
-                name: city.name,
-                state: city.state,
-                relevance: relevance
-            });
-        }
-    });
-    
-    // Sort partial matches by relevance
-    partialMatches.sort((a, b) => b.relevance - a.relevance);
-    
-    // If we have partial matches, show the top 5
-    if (partialMatches.length > 0) {
-        showSearchResults(partialMatches.slice(0, 5));
-        return;
-    }
-    
-    // If no matches at all, show a message
-    showSearchError('No matches found. Please try a different search term.');
-}
-
 // Function to show search results
 function showSearchResults(results) {
     var resultsContainer = document.getElementById('search-results');
@@ -117,7 +109,10 @@ function showSearchResults(results) {
         var listItem = document.createElement('li');
         var link = document.createElement('a');
         link.href = result.url;
-        link.textContent = result.name + ', ' + result.state;
+        link.textContent = result.state ? result.name + ', ' + result.state : result.name;
+        if (result.miles !== undefined) {
+            link.textContent += ' (' + Math.round(result.miles) + ' mi)';
+        }
         listItem.appendChild(link);
         resultsList.appendChild(listItem);
     });
@@ -138,6 +133,57 @@ function showSearchError(message) {
     document.getElementById('search-loading').style.display = 'none';
 }
 
+// Latest typeahead query, so answers for earlier keystrokes are dropped
+var typeaheadQuery = '';
+
+// Function to suggest cities and states while the user types
+function handleTypeahead(event) {
+    var query = event.target.value;
+    var letters = query.replace(/[^\p{L}\p{N}]+/gu, '');
+    typeaheadQuery = query;
+    
+    // Zip codes are looked up on submit; names need two characters to pick a shard
+    if (letters.length < 2 || /^[0-9]+$/.test(letters)) {
+        hideSearchResults();
+        return;
+    }
+    
+    askSearchWorker({ type: 'suggest', query: query })
+        .then(answer => {
+            if (query !== typeaheadQuery) return;
+            if (answer.results.length > 0) {
+                showSearchResults(answer.results);
+            } else {
+                hideSearchResults();
+            }
+        })
+        .catch(error => {
+            console.error('Error fetching search suggestions:', error);
+        });
+}
+
+// Function to list the cities nearest to the browser's position
+function handleNearMe() {
+    showSearchLoading();
+    navigator.geolocation.getCurrentPosition(position => {
+        askSearchWorker({ type: 'nearMe', lat: position.coords.latitude, lng: position.coords.longitude })
+            .then(showSearchAnswer)
+            .catch(error => {
+                console.error('Error fetching nearby cities:', error);
+                showSearchError('An error occurred while searching. Please try again.');
+            });
+    }, () => {
+        showSearchError('Your location is unavailable. Please enter a city, state, or zip code.');
+    });
+}
+
+// Function to hide the search results
+function hideSearchResults() {
+    var resultsContainer = document.getElementById('search-results');
+    resultsContainer.innerHTML = '';
+    resultsContainer.style.display = 'none';
+}
+
 // Function to show search loading
 function showSearchLoading() {
     var resultsContainer = document.getElementById('search-results');
@@ -153,5 +199,16 @@ document.addEventListener('DOMContentLoaded', function() {
     var searchForm = document.getElementById('search-form');
     if (searchForm) {
         searchForm.addEventListener('submit', handleSearch);
+        startSearchWorker();
+    }
+    var searchInput = document.getElementById('search-input');
+    if (searchInput) {
+        searchInput.addEventListener('input', handleTypeahead);
+    }
+    // The "near me" button is only shown where the browser can locate the user
+    var nearMeButton = document.getElementById('search-near-me');
+    if (nearMeButton && navigator.geolocation) {
+        nearMeButton.hidden = false;
+        nearMeButton.addEventListener('click', handleNearMe);
     }
 }); 
\ No newline at end of file
@@ -0,0 +1,839 @@
+// Search worker: loads the sharded search index (see search_index.py) off
+// the main thread, keeps everything it fetched in memory and answers the
+// messages of search-handler.js. Index files are kept in the Cache API under
+// a name versioned by the manifest, so later visits skip the network.
+// Pages without Web Workers load this file as a plain script instead.
+//
+// The index lives next to this script: assets/js/ -> assets/data/search/.
+// Result URLs in the index are relative to the site root.
+var SEARCH_SCRIPT_URL = typeof document !== 'undefined' && document.currentScript ?
+    document.currentScript.src : self.location.href;
+var SEARCH_INDEX_URL = new URL('../data/search/', SEARCH_SCRIPT_URL).href;
+var SITE_ROOT_URL = new URL('../../', SEARCH_SCRIPT_URL).href;
+
+// Manifest, shard and zip index fetches, kept so repeated searches reuse them
+var searchManifest = null;
+var searchShards = {};
+var zipIndex = null;
+var nearbyIndex = null;
+var geoIndex = null;
+var searchCache = null;
+
+// Cache API name of the index files; the manifest version is appended
+var SEARCH_CACHE_PREFIX = 'search-index-';
+
+// Server-side search endpoint (api/index.py), e.g. '/api/search'. When set,
+// searches and suggestions are answered by it and index files are only
+// fetched if it fails; static hosts without the endpoint leave it null
+// (generate_site.py --search-api sets it in the copy written to output/).
+var SEARCH_API_URL = null;
+
+// Cities listed for a partial zip code (only their shards are fetched)
+var MAX_ZIP_CITIES = 5;
+
+// Fuzzy candidates re-ranked by edit distance, and the edits allowed per
+// FUZZY_LETTERS_PER_EDIT letters of the query (must match search_index.py)
+var FUZZY_CANDIDATES = 20;
+var FUZZY_LETTERS_PER_EDIT = 4;
+
+// Shortest company search term, and the best matches whose rows are read to
+// rank them (must match company_index.py)
+var MIN_TERM_LENGTH = 2;
+var COMPANY_CANDIDATES = 20;
+
+// Earth radius and the length of one degree of latitude, in miles
+// (must match search_index.py)
+var EARTH_RADIUS_MILES = 3958.8;
+var MILES_PER_DEGREE = EARTH_RADIUS_MILES * Math.PI / 180;
+
+// zip-index.bin layout (see search_index.py): 12-byte header, then uint32 codes
+var ZIP_INDEX_HEADER_SIZE = 12;
+
+// Miles of a zip-nearby.bin entry whose distance is unknown (ZIP3 answers;
+// must match NEARBY_NO_MILES in search_index.py)
+var NEARBY_NO_MILES = 65535;
+
+// Lowercase, strip accents and punctuation, collapse whitespace
+// (must match normalize() in search_index.py)
+function normalizeSearchText(text) {
+    return text.toLowerCase().normalize('NFKD').replace(/[\u0300-\u036f]/g, '')
+        .replace(/[^a-z0-9]+/g, ' ').trim();
+}
+
+// Function to open the Cache API cache of an index version, deleting the
+// caches of earlier versions; resolves to null where the Cache API is missing
+function openSearchCache(manifest) {
+    if (typeof caches === 'undefined') {
+        return Promise.resolve(null);
+    }
+    if (!searchCache) {
+        var name = SEARCH_CACHE_PREFIX + manifest.version;
+        searchCache = caches.open(name).then(cache => {
+            caches.keys().then(names => names.forEach(oldName => {
+                if (oldName.startsWith(SEARCH_CACHE_PREFIX) && oldName !== name) {
+                    caches.delete(oldName);
+                }
+            }));
+            return cache;
+        }).catch(() => null);
+    }
+    return searchCache;
+}
+
+// Function to fetch a file of the search index. The manifest (no version
+// yet) is always revalidated; versioned files come from the cache when
+// they are in it and are added to it otherwise.
+function fetchSearchFile(manifest, path) {
+    var url = SEARCH_INDEX_URL + path;
+    function fetchFromNetwork() {
+        return fetch(url, manifest ? {} : { cache: 'no-cache' }).then(response => {
+            if (!response.ok) {
+                throw new Error('HTTP ' + response.status + ' for ' + path);
+            }
+            return response;
+        });
+    }
+    if (!manifest) {
+        return fetchFromNetwork();
+    }
+    return openSearchCache(manifest).then(cache => {
+        if (!cache) return fetchFromNetwork();
+        return cache.match(url).then(cached => cached || fetchFromNetwork().then(response => {
+            cache.put(url, response.clone()).catch(() => {});
+            return response;
+        }));
+    });
+}
+
+// Function to fetch a JSON file of the search index
+function fetchSearchJson(manifest, path) {
+    return fetchSearchFile(manifest, path).then(response => response.json());
+}
+
+// Function to fetch a binary file of the search index
+function fetchSearchBuffer(manifest, path) {
+    return fetchSearchFile(manifest, path).then(response => response.arrayBuffer());
+}
+
+// Function to load the search index manifest
+function loadSearchManifest() {
+    if (!searchManifest) {
+        searchManifest = fetchSearchJson(null, 'manifest.json').catch(error => {
+            searchManifest = null;
+            throw error;
+        });
+    }
+    return searchManifest;
+}
+
+// Function to load one shard of the search index, e.g. ('cities', 'sa')
+function loadSearchShard(manifest, kind, key) {
+    var path = kind + '/' + key + '.json?v=' + manifest.version;
+    if (!searchShards[path]) {
+        searchShards[path] = fetchSearchJson(manifest, path).catch(error => {
+            delete searchShards[path];
+            throw error;
+        });
+    }
+    return searchShards[path];
+}
+
+// Function to load zip-index.bin: the sorted zip codes and the city id of each
+function loadZipIndex(manifest) {
+    if (!zipIndex) {
+        zipIndex = fetchSearchBuffer(manifest, 'zip-index.bin?v=' + manifest.version)
+            .then(buffer => {
+                var view = new DataView(buffer);
+                var count = view.getUint32(4, true);
+                return { view: view, count: count, idSize: view.getUint8(8), idStart: ZIP_INDEX_HEADER_SIZE + 4 * count };
+            })
+            .catch(error => {
+                zipIndex = null;
+                throw error;
+            });
+    }
+    return zipIndex;
+}
+
+// Function to load geo.json: the city centroids bucketed into grid cells
+function loadGeoIndex(manifest) {
+    if (!geoIndex) {
+        geoIndex = fetchSearchJson(manifest, 'geo.json?v=' + manifest.version).catch(error => {
+            geoIndex = null;
+            throw error;
+        });
+    }
+    return geoIndex;
+}
+
+// Function to compute the great-circle distance between two positions, in miles
+function distanceMiles(lat1, lng1, lat2, lng2) {
+    var toRadians = Math.PI / 180;
+    var a = Math.pow(Math.sin((lat2 - lat1) * toRadians / 2), 2) +
+        Math.cos(lat1 * toRadians) * Math.cos(lat2 * toRadians) * Math.pow(Math.sin((lng2 - lng1) * toRadians / 2), 2);
+    return 2 * EARTH_RADIUS_MILES * Math.asin(Math.min(1, Math.sqrt(a)));
+}
+
+// Function to find the k cities nearest to a position: scans rings of grid
+// cells outwards until the cities found are closer than any in the unscanned
+// rings (must match nearest_cities() in search_index.py)
+function nearestCities(geo, lat, lng, k) {
+    var size = geo.cell_degrees;
+    var row = Math.floor(lat / size);
+    var col = Math.floor(lng / size);
+    var lastRing = Math.max(row - geo.rows[0], geo.rows[1] - row, col - geo.cols[0], geo.cols[1] - col, 0);
+    var found = [];
+    function scanCell(i, j) {
+        var entries = geo.cells[i + ',' + j] || [];
+        for (var n = 0; n < entries.length; n += 3) {
+            found.push({ cityId: entries[n], miles: distanceMiles(lat, lng, entries[n + 1], entries[n + 2]) });
+        }
+    }
+    for (var ring = 0; ring <= lastRing; ring++) {
+        if (ring === 0) {
+            scanCell(row, col);
+        } else {
+            for (var i = row - ring; i <= row + ring; i++) {
+                scanCell(i, col - ring);
+                scanCell(i, col + ring);
+            }
+            for (var j = col - ring + 1; j < col + ring; j++) {
+                scanCell(row - ring, j);
+                scanCell(row + ring, j);
+            }
+        }
+        found.sort((a, b) => a.miles - b.miles || a.cityId - b.cityId);
+        // Cities beyond this ring are at least `ring` cells away in latitude
+        // or longitude; longitude cells narrow towards the pole
+        var narrowest = Math.cos(Math.min(90, Math.abs(lat) + ring * size) * Math.PI / 180);
+        if (found.length >= k && found[k - 1].miles <= ring * size * MILES_PER_DEGREE * narrowest) {
+            break;
+        }
+    }
+    return found.slice(0, k);
+}
+
+// Function to load the cities nearest to a position, with their distances
+function loadNearestCities(manifest, lat, lng) {
+    if (!manifest.geo_count) {
+        return Promise.resolve([]);
+    }
+    return loadGeoIndex(manifest).then(geo => {
+        var nearest = nearestCities(geo, lat, lng, manifest.typeahead_size);
+        return Promise.all(nearest.map(match => loadCity(manifest, match.cityId))).then(rows => rows.map((row, i) => {
+            var city = cityFromRow(manifest, row);
+            city.miles = nearest[i].miles;
+            return city;
+        }));
+    });
+}
+
+// Function to load zip-nearby.bin: zip codes (or their first `digits`
+// digits) with the nearest city with listings and its distance in miles
+function loadNearbyIndex(manifest) {
+    if (!nearbyIndex) {
+        nearbyIndex = fetchSearchBuffer(manifest, 'zip-nearby.bin?v=' + manifest.version)
+            .then(buffer => {
+                var view = new DataView(buffer);
+                var count = view.getUint32(4, true);
+                var idSize = view.getUint8(8);
+                var idStart = ZIP_INDEX_HEADER_SIZE + 4 * count;
+                return { view: view, count: count, idSize: idSize, idStart: idStart, digits: view.getUint8(9),
+                         milesStart: idStart + idSize * count };
+            })
+            .catch(error => {
+                nearbyIndex = null;
+                throw error;
+            });
+    }
+    return nearbyIndex;
+}
+
+// Function to find the nearest city with listings to a five-digit zip code
+function findNearbyZip(index, code) {
+    var number = parseInt(code.slice(0, index.digits), 10);
+    var start = 0, end = index.count;
+    while (start < end) {
+        var middle = (start + end) >> 1;
+        if (zipCodeAt(index, middle) < number) start = middle + 1;
+        else end = middle;
+    }
+    if (start === index.count || zipCodeAt(index, start) !== number) return null;
+    var miles = index.view.getUint16(index.milesStart + 2 * start, true);
+    return { cityId: zipCityIdAt(index, start), miles: miles === NEARBY_NO_MILES ? undefined : miles };
+}
+
+// Function to load the nearest city with listings to a zip code that has none
+function loadNearbyCity(manifest, code) {
+    if (!manifest.nearby_count) {
+        return Promise.resolve(null);
+    }
+    return loadNearbyIndex(manifest).then(index => {
+        var match = findNearbyZip(index, code);
+        if (!match) return null;
+        return loadCity(manifest, match.cityId).then(row => {
+            var city = cityFromRow(manifest, row);
+            if (match.miles !== undefined) city.miles = match.miles;
+            return city;
+        });
+    });
+}
+
+// Function to read the zip code at a position of the zip index
+function zipCodeAt(index, position) {
+    return index.view.getUint32(ZIP_INDEX_HEADER_SIZE + 4 * position, true);
+}
+
+// Function to read the city id at a position of the zip index
+function zipCityIdAt(index, position) {
+    var offset = index.idStart + index.idSize * position;
+    return index.idSize === 2 ? index.view.getUint16(offset, true) : index.view.getUint32(offset, true);
+}
+
+// Function to find the zip codes starting with the given digits by binary search
+function findZips(index, digits) {
+    if (digits.length > 5) return [];
+    var scale = Math.pow(10, 5 - digits.length);
+    var low = parseInt(digits, 10) * scale;
+    var high = low + scale;
+    
+    // First position whose code is >= low
+    var start = 0, end = index.count;
+    while (start < end) {
+        var middle = (start + end) >> 1;
+        if (zipCodeAt(index, middle) < low) start = middle + 1;
+        else end = middle;
+    }
+    
+    var matches = [];
+    for (var position = start; position < index.count && zipCodeAt(index, position) < high; position++) {
+        matches.push({ code: String(zipCodeAt(index, position)).padStart(5, '0'), cityId: zipCityIdAt(index, position) });
+    }
+    return matches;
+}
+
+// Function to expand a shard row ([name, state id, city slug, score]) into a
+// city, rebuilding its URL from the state and city slugs
+function cityFromRow(manifest, row) {
+    var state = manifest.states[row[1]];
+    return { name: row[0], state: state[0], url: SITE_ROOT_URL + state[1] + '/' + row[2] + '/', score: row[3] || 0 };
+}
+
+// Function to load a city's shard row by its id
+function loadCity(manifest, cityId) {
+    var start = 0;
+    for (var i = 0; i < manifest.name_shards.length; i++) {
+        if (cityId < start + manifest.name_shard_sizes[i]) {
+            return loadSearchShard(manifest, 'cities', manifest.name_shards[i]).then(shard => shard.cities[cityId - start]);
+        }
+        start += manifest.name_shard_sizes[i];
+    }
+    return Promise.reject(new Error('Unknown city id ' + cityId));
+}
+
+// Function to expand a prefix table ref into a suggestion: refs >= 0 are
+// cities of the shard, refs < 0 are state ids (-1 - ref)
+function suggestionFromRef(manifest, shard, ref) {
+    if (ref < 0) {
+        var state = manifest.states[-1 - ref];
+        return { type: 'state', name: state[0], state: '', url: SITE_ROOT_URL + state[1] + '/',
+                 strings: [normalizeSearchText(state[0])] };
+    }
+    var row = shard.cities[ref];
+    var city = cityFromRow(manifest, row);
+    var name = normalizeSearchText(city.name);
+    var cityState = manifest.states[row[1]];
+    city.type = 'city';
+    city.strings = [name, name + ' ' + normalizeSearchText(cityState[0]), name + ' ' + cityState[1]];
+    return city;
+}
+
+// Function to look up the precomputed top refs for a normalized query in a
+// shard's prefix table: those of the longest stored prefix of the query
+function findPrefixRefs(manifest, shard, query) {
+    var refs = null;
+    for (var length = query.length; length >= manifest.name_prefix_length && !refs; length--) {
+        refs = shard.prefixes[query.slice(0, length)] || null;
+    }
+    return refs || [];
+}
+
+// Function to expand the top refs of a query into suggestions; when the
+// stored prefix is shorter than the query, they are filtered by the query.
+function findSuggestions(manifest, shard, query) {
+    return findPrefixRefs(manifest, shard, query).map(ref => suggestionFromRef(manifest, shard, ref))
+        .filter(suggestion => suggestion.strings.some(string => string.startsWith(query)));
+}
+
+// Function to load the suggestions for a query from the one shard it can match in
+function loadSuggestions(manifest, query) {
+    var normalized = normalizeSearchText(query);
+    var key = normalized.replace(/ /g, '').slice(0, manifest.name_prefix_length);
+    if (key.length < manifest.name_prefix_length || manifest.name_shards.indexOf(key) === -1) {
+        return Promise.resolve([]);
+    }
+    return loadSearchShard(manifest, 'cities', key).then(shard => findSuggestions(manifest, shard, normalized));
+}
+
+// Function to return a normalized name from each word after its first, also
+// followed by the state if given (must match word_strings() in search_index.py)
+function wordStrings(name, state, stateSlug) {
+    var words = name.split(' ');
+    var strings = [];
+    for (var i = 1; i < words.length; i++) {
+        var suffix = words.slice(i).join(' ');
+        strings.push(suffix);
+        if (state) strings.push(suffix + ' ' + state, suffix + ' ' + stateSlug);
+    }
+    return strings;
+}
+
+// Function to load the cities and states with a later word of their name
+// starting a query ("worth" for Fort Worth) from its word shard
+function loadWordMatches(manifest, query) {
+    var normalized = normalizeSearchText(query);
+    var key = normalized.replace(/ /g, '').slice(0, manifest.name_prefix_length);
+    if (key.length < manifest.name_prefix_length || (manifest.word_shards || []).indexOf(key) === -1) {
+        return Promise.resolve([]);
+    }
+    return loadSearchShard(manifest, 'words', key).then(shard => findPrefixRefs(manifest, shard, normalized)
+        .map(ref => {
+            var match = suggestionFromRef(manifest, shard, ref);
+            if (ref < 0) {
+                match.strings = wordStrings(match.strings[0]);
+            } else {
+                var state = manifest.states[shard.cities[ref][1]];
+                match.strings = wordStrings(normalizeSearchText(match.name), normalizeSearchText(state[0]), state[1]);
+            }
+            return match;
+        })
+        .filter(match => match.strings.some(string => string.startsWith(normalized)))
+        .slice(0, manifest.typeahead_size));
+}
+
+// Function to return the trigrams of a normalized string, padded to weight
+// its start (must match trigrams() in search_index.py)
+function searchTrigrams(text) {
+    var padded = '  ' + text + ' ';
+    var trigrams = [];
+    for (var i = 0; i + 3 <= padded.length; i++) {
+        if (trigrams.indexOf(padded.slice(i, i + 3)) === -1) {
+            trigrams.push(padded.slice(i, i + 3));
+        }
+    }
+    return trigrams;
+}
+
+// Function to compute the Levenshtein distance between two strings
+function editDistance(a, b) {
+    var previous = [];
+    for (var j = 0; j <= b.length; j++) previous.push(j);
+    for (var i = 1; i <= a.length; i++) {
+        var current = [i];
+        for (j = 1; j <= b.length; j++) {
+            current.push(Math.min(previous[j] + 1, current[j - 1] + 1,
+                                  previous[j - 1] + (a[i - 1] === b[j - 1] ? 0 : 1)));
+        }
+        previous = current;
+    }
+    return previous[b.length];
+}
+
+// Function to find the names of a fuzzy shard close to a normalized query:
+// the candidates sharing the most trigrams with it, within a few edits
+// (must match fuzzy_matches() in search_index.py)
+function findFuzzyMatches(manifest, shard, query) {
+    var overlap = {};
+    searchTrigrams(query).forEach(trigram => {
+        (shard.trigrams[trigram] || []).forEach(ref => {
+            overlap[ref] = (overlap[ref] || 0) + 1;
+        });
+    });
+    var allowed = Math.max(1, Math.floor(query.length / FUZZY_LETTERS_PER_EDIT));
+    return Object.keys(overlap).map(Number)
+        .sort((a, b) => overlap[b] - overlap[a] || a - b)
+        .slice(0, FUZZY_CANDIDATES)
+        .map(ref => {
+            var suggestion = suggestionFromRef(manifest, shard, ref);
+            return { ref: ref, suggestion: suggestion, distance: editDistance(query, suggestion.strings[0]) };
+        })
+        .filter(match => match.distance <= allowed)
+        .sort((a, b) => a.distance - b.distance || (b.suggestion.score || 0) - (a.suggestion.score || 0) ||
+              overlap[b.ref] - overlap[a.ref] || a.ref - b.ref)
+        .map(match => match.suggestion);
+}
+
+// Function to load the near matches of a misspelled city or state name from
+// the fuzzy shard of its first letter, narrowed by an optional ", state"
+function loadFuzzyMatches(manifest, query) {
+    var parts = query.split(',');
+    var name = normalizeSearchText(parts[0]);
+    if (!name || /^[0-9 ]+$/.test(name) || manifest.fuzzy_shards.indexOf(name[0]) === -1) {
+        return Promise.resolve([]);
+    }
+    var state = parts.length > 1 ? findState(manifest.states, parts.slice(1).join(' ')) : null;
+    return loadSearchShard(manifest, 'fuzzy', name[0]).then(shard => {
+        var matches = findFuzzyMatches(manifest, shard, name);
+        var inState = matches.filter(match => state && match.state === state[0]);
+        return (inState.length > 0 ? inState : matches).slice(0, manifest.typeahead_size);
+    });
+}
+
+// Function to return the distinct terms of a text: the runs of letters or
+// digits of its normalized form (must match tokenize() in company_index.py)
+function companyTerms(text) {
+    var terms = [];
+    (normalizeSearchText(text).match(/[a-z]+|[0-9]+/g) || []).forEach(term => {
+        if (term.length >= MIN_TERM_LENGTH && terms.indexOf(term) === -1) terms.push(term);
+    });
+    return terms;
+}
+
+// Function to turn a posting list of id gaps back into sorted company ids
+function decodePostings(gaps) {
+    var companyId = 0;
+    return gaps.map(gap => companyId += gap);
+}
+
+// Function to return the ids in both sorted lists
+function intersectPostings(a, b) {
+    var result = [];
+    for (var i = 0, j = 0; i < a.length && j < b.length;) {
+        if (a[i] < b[j]) i++;
+        else if (a[i] > b[j]) j++;
+        else {
+            result.push(a[i]);
+            i++;
+            j++;
+        }
+    }
+    return result;
+}
+
+// Function to find the companies matching every term of a query, best first;
+// the last term also matches as a prefix (must match match_companies() in
+// company_index.py)
+function findCompanyIds(terms, shards) {
+    var matches = null;
+    terms.forEach((term, position) => {
+        var found;
+        if (position === terms.length - 1) {
+            var ids = {};
+            Object.keys(shards[position].terms).forEach(candidate => {
+                if (candidate.startsWith(term)) {
+                    decodePostings(shards[position].terms[candidate]).forEach(companyId => {
+                        ids[companyId] = true;
+                    });
+                }
+            });
+            found = Object.keys(ids).map(Number).sort((a, b) => a - b);
+        } else {
+            found = decodePostings(shards[position].terms[term] || []);
+        }
+        matches = matches === null ? found : intersectPostings(matches, found);
+    });
+    return matches;
+}
+
+// Function to expand a company row ([name, city, state id, city slug,
+// anchor]) into a result linking to the company's card on its city page
+function companyFromRow(manifest, row) {
+    var state = manifest.states[row[2]];
+    return { name: row[0], state: row[1] + ', ' + state[0], url: SITE_ROOT_URL + state[1] + '/' + row[3] + '/#' + row[4] };
+}
+
+// Function to load the companies whose name, brands, sizes or features match
+// a query from the full-text company index; companies whose name matches
+// every term come first
+function loadCompanyMatches(manifest, query) {
+    var terms = companyTerms(query);
+    var keys = terms.map(term => term.slice(0, manifest.term_prefix_length));
+    if (!manifest.company_count || terms.length === 0 || keys.some(key => manifest.term_shards.indexOf(key) === -1)) {
+        return Promise.resolve([]);
+    }
+    return Promise.all(keys.map(key => loadSearchShard(manifest, 'terms', key))).then(shards => {
+        var companyIds = findCompanyIds(terms, shards).slice(0, COMPANY_CANDIDATES);
+        return Promise.all(companyIds.map(companyId => loadSearchShard(manifest, 'companies',
+            Math.floor(companyId / manifest.company_chunk_size))
+            .then(chunk => chunk.companies[companyId % manifest.company_chunk_size])));
+    }).then(rows => rows
+        .map((row, rank) => {
+            var nameTerms = companyTerms(row[0]);
+            var nameMatch = terms.every(term => nameTerms.some(nameTerm => nameTerm.startsWith(term)));
+            return { row: row, rank: nameMatch ? rank : rank + rows.length };
+        })
+        .sort((a, b) => a.rank - b.rank)
+        .slice(0, manifest.typeahead_size)
+        .map(match => companyFromRow(manifest, match.row)));
+}
+
+// Function to find the state a query names by its name or abbreviation
+function findState(states, query) {
+    if (query.indexOf(',') !== -1) return null;
+    var name = normalizeSearchText(query);
+    return states.find(state => normalizeSearchText(state[0]) === name || state[1] === name) || null;
+}
+
+// Function to load the search data a query can match: the shard of its
+// city name or zip code prefix, plus the states from the manifest
+function loadSearchData(manifest, query) {
+    var name = normalizeSearchText(query.split(',')[0]);
+    var key = name.replace(/ /g, '');
+    var data = { cities: [], zips: [], states: manifest.states };
+
+    // State queries are answered from the manifest alone
+    if (findState(manifest.states, query)) {
+        return Promise.resolve(data);
+    }
+
+    if (/^[0-9]+$/.test(key)) {
+        return loadZipIndex(manifest).then(index => {
+            // Four digits are either a zip code that lost its leading zero (the
+            // index stores five-digit codes) or the start of a zip code
+            var matches = (key.length === 4 ? findZips(index, '0' + key) : []).concat(findZips(index, key));
+            var cityIds = [];
+            matches.forEach(match => {
+                if (cityIds.indexOf(match.cityId) === -1 && cityIds.length < MAX_ZIP_CITIES) {
+                    cityIds.push(match.cityId);
+                }
+            });
+            matches = matches.filter(match => cityIds.indexOf(match.cityId) !== -1);
+            // A full zip code without listings lists the nearest city with them
+            var fullCode = key.length === 4 ? '0' + key : key;
+            if (matches.length === 0 && fullCode.length === 5) {
+                return loadNearbyCity(manifest, fullCode).then(city => {
+                    data.nearby = city ? [city] : [];
+                    return data;
+                });
+            }
+            return Promise.all(matches.map(match => loadCity(manifest, match.cityId))).then(rows => {
+                data.zips = matches.map((match, i) => {
+                    var city = cityFromRow(manifest, rows[i]);
+                    return { code: match.code, city: city.name, state: city.state, url: city.url, score: city.score };
+                });
+                return data;
+            });
+        });
+    }
+
+    // Short queries load every shard their prefix could be in
+    key = key.slice(0, manifest.name_prefix_length);
+    var keys = manifest.name_shards.filter(shard => key && shard.startsWith(key));
+    return Promise.all(keys.map(shard => loadSearchShard(manifest, 'cities', shard))).then(shards => {
+        shards.forEach(shard => {
+            shard.cities.forEach(row => {
+                data.cities.push(cityFromRow(manifest, row));
+            });
+        });
+        // Queries long enough to select one shard use its prefix table
+        if (shards.length === 1 && key.length === manifest.name_prefix_length) {
+            data.suggestions = findSuggestions(manifest, shards[0], normalizeSearchText(query));
+        }
+        return data;
+    });
+}
+
+// Function to process search results into an answer for the page:
+// { redirect: url } or { results: [...] }; returns null if nothing matched
+function processSearchResults(query, data) {
+    var parts = query.split(',');
+    var name = normalizeSearchText(parts[0]);
+    var stateQuery = parts.length > 1 ? normalizeSearchText(parts.slice(1).join(' ')) : '';
+    
+    // A state name or abbreviation goes to the state page
+    var state = findState(data.states, query);
+    if (state) {
+        return { redirect: SITE_ROOT_URL + state[1] + '/' };
+    }
+    
+    // Function to check the optional ", state" part of the query
+    function matchesState(stateName) {
+        if (!stateQuery) return true;
+        var normalizedState = normalizeSearchText(stateName);
+        return data.states.some(state => state[0] === stateName &&
+            (normalizedState === stateQuery || state[1] === stateQuery));
+    }
+    
+    // First, try to find an exact match for city or zip
+    var exactMatches = [];
+    
+    // Check for exact city matches
+    data.cities.forEach(city => {
+        if (normalizeSearchText(city.name) === name && matchesState(city.state)) {
+            exactMatches.push({
+                type: 'city',
+                url: city.url,
+                name: city.name,
+                state: city.state,
+                distance: 0
+            });
+        }
+    });
+    
+    // Check for exact zip matches
+    var zipQuery = name.replace(/ /g, '');
+    var fullZipQuery = /^[0-9]{4}$/.test(zipQuery) ? '0' + zipQuery : zipQuery;
+    data.zips.forEach(zip => {
+        if (zip.code === fullZipQuery) {
+            exactMatches.push({
+                type: 'zip',
+                url: zip.url,
+                name: zip.city,
+                state: zip.state,
+                distance: 0
+            });
+        }
+    });
+    
+    // If we have exact matches, redirect to the first one
+    if (exactMatches.length > 0) {
+        return { redirect: exactMatches[0].url };
+    }
+    
+    // If no exact matches, try partial matches for cities
+    var partialMatches = [];
+    
+    if (data.suggestions) {
+        // Already ranked by the prefix table
+        data.suggestions.forEach(suggestion => {
+            partialMatches.push({
+                type: suggestion.type,
+                url: suggestion.url,
+                name: suggestion.name,
+                state: suggestion.state,
+                relevance: 3
+            });
+        });
+    } else {
+        data.cities.forEach(city => {
+            var cityName = normalizeSearchText(city.name);
+            if (!matchesState(city.state)) return;
+            
+            // Calculate a simple relevance score based on string similarity
+            var relevance = 0;
+            if (cityName.startsWith(name)) relevance = 3;
+            else if (name.startsWith(cityName + ' ')) relevance = 1;
+            
+            if (relevance > 0) {
+                partialMatches.push({
+                    type: 'city',
+                    url: city.url,
+                    name: city.name,
+                    state: city.state,
+                    relevance: relevance,
+                    score: city.score
+                });
+            }
+        });
+    }
+    
+    // Partial zip codes list the cities of the zips they start
+    data.zips.forEach(zip => {
+        if (zip.code.startsWith(zipQuery) && !partialMatches.some(match => match.url === zip.url)) {
+            partialMatches.push({
+                type: 'zip',
+                url: zip.url,
+                name: zip.city,
+                state: zip.state,
+                relevance: 2,
+                score: zip.score
+            });
+        }
+    });
+    
+    // Sort partial matches by relevance, then by the city scores baked into
+    // the index (listings, reviews and zip codes)
+    partialMatches.sort((a, b) => b.relevance - a.relevance || (b.score || 0) - (a.score || 0));
+    
+    // If we have partial matches, show the top 5
+    if (partialMatches.length > 0) {
+        return { results: partialMatches.slice(0, 5) };
+    }
+    
+    // Zip codes without listings list the nearest city with them
+    if (data.nearby && data.nearby.length > 0) {
+        return { results: data.nearby };
+    }
+    
+    return null;
+}
+
+// Function to answer a submitted query; if no name starts with it, look for
+// names with a later word starting with it, then for companies in the company
+// index, then for misspellings in the fuzzy index
+function runSearch(query) {
+    return loadSearchManifest().then(manifest => loadSearchData(manifest, query).then(data => {
+        var answer = processSearchResults(query, data);
+        if (answer) return answer;
+        return loadWordMatches(manifest, query).then(words => {
+            if (words.length > 0) return { results: words };
+            return loadCompanyMatches(manifest, query).then(companies => {
+                if (companies.length > 0) return { results: companies };
+                return loadFuzzyMatches(manifest, query).then(matches => matches.length > 0 ? { results: matches } :
+                    { error: 'No matches found. Please try a different search term.' });
+            });
+        });
+    }));
+}
+
+// Function to ask the search endpoint for an answer, resolving its
+// site-relative URLs like those of the index
+function fetchSearchApi(type, query) {
+    var url = new URL(SEARCH_API_URL, SITE_ROOT_URL);
+    url.searchParams.set('q', query);
+    url.searchParams.set('type', type);
+    return fetch(url.href).then(response => {
+        if (!response.ok) throw new Error('Search API request failed: ' + response.status);
+        return response.json();
+    }).then(answer => {
+        if (answer.redirect) answer.redirect = SITE_ROOT_URL + answer.redirect;
+        (answer.results || []).forEach(result => {
+            result.url = SITE_ROOT_URL + result.url;
+        });
+        return answer;
+    });
+}
+
+// Function to answer a message of search-handler.js, from the search
+// endpoint if there is one, else from the index
+function answerSearchMessage(message) {
+    if (SEARCH_API_URL && (message.type === 'search' || message.type === 'suggest')) {
+        return fetchSearchApi(message.type, message.query).catch(() => answerFromIndex(message));
+    }
+    return answerFromIndex(message);
+}
+
+// Function to answer a message of search-handler.js from the index:
+// { type: 'search' | 'suggest', query } or { type: 'nearMe', lat, lng }
+function answerFromIndex(message) {
+    if (message.type === 'search') {
+        return runSearch(message.query);
+    }
+    if (message.type === 'suggest') {
+        return loadSearchManifest()
+            .then(manifest => loadSuggestions(manifest, message.query))
+            .then(results => ({ results: results }));
+    }
+    if (message.type === 'nearMe') {
+        return loadSearchManifest()
+            .then(manifest => loadNearestCities(manifest, message.lat, message.lng))
+            .then(results => results.length > 0 ? { results: results } :
+                { error: 'No rentals found near you. Please enter a city, state, or zip code.' });
+    }
+    return Promise.reject(new Error('Unknown search message ' + message.type));
+}
+
+if (typeof document === 'undefined') {
+    self.onmessage = event => {
+        var message = event.data;
+        answerSearchMessage(message)
+            .then(answer => self.postMessage({ id: message.id, answer: answer }))
+            .catch(error => self.postMessage({ id: message.id, error: String(error) }));
+    };
+    
+    // Load the manifest and zip index in the background, before the first
+    // query, unless the search endpoint answers queries
+    if (!SEARCH_API_URL) {
+        loadSearchManifest().then(loadZipIndex).catch(() => {});
+    }
+}
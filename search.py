@@ -0,0 +1,355 @@
+"""
+Site search over the sharded index of search_index.py, in Python.
+IndexSearch answers queries the way search-worker.js does (prefix tables, zip
+index, nearby-zip, word-start, company index and fuzzy fallbacks), reading each index
+file once and counting the bytes a query touches. /api/search (api/index.py)
+serves its answers and search_replay.py benchmarks it against the original
+search-data.json scan.
+
+Example:
+    from search import IndexSearch
+    index = IndexSearch('output/assets/data/search')
+    answer, fetched = index.search('Fort Worth, TX')
+"""
+
+import os
+import re
+import json
+import bisect
+
+from search_index import (normalize, normalize_zip, city_result, decode_zip_index, decode_nearby_index,
+                          word_strings, fuzzy_matches, build_search_index, FUZZY_CANDIDATES, NEARBY_NO_MILES)
+from company_index import match_companies, name_matches, COMPANY_CANDIDATES
+
+# Cities listed for a partial zip code (MAX_ZIP_CITIES in search-worker.js)
+MAX_ZIP_CITIES = 5
+
+# Results shown for a partial match
+RESULT_LIMIT = 5
+
+NO_MATCHES = 'No matches found. Please try a different search term.'
+
+def columnar_search_data(data):
+    """Return search-data.json in the columnar format, converting the legacy record format."""
+    if isinstance(data['cities'], dict):
+        return data
+    states = {}
+    columnar = {
+        'states': {'name': [], 'slug': []},
+        'cities': {'name': [], 'slug': [], 'state': []},
+        'zips': {'code': [], 'city': []},
+    }
+    city_ids = {}
+    for city in data['cities']:
+        state_slug, city_slug = city['url'].strip('/').split('/')[:2]
+        if city['state'] not in states:
+            states[city['state']] = len(states)
+            columnar['states']['name'].append(city['state'])
+            columnar['states']['slug'].append(state_slug)
+        city_ids[city['url']] = len(columnar['cities']['name'])
+        columnar['cities']['name'].append(city['name'])
+        columnar['cities']['slug'].append(city_slug)
+        columnar['cities']['state'].append(states[city['state']])
+    for zip_entry in data['zips']:
+        if zip_entry['url'] in city_ids:
+            columnar['zips']['code'].append(normalize_zip(zip_entry['code']))
+            columnar['zips']['city'].append(city_ids[zip_entry['url']])
+    return columnar
+
+class FileSource:
+    """Reads and parses index files once, and counts the bytes each query touches."""
+
+    def __init__(self, root, files=None):
+        # files holds the index in memory ({path: JSON text or bytes}) instead of root
+        self.root = root
+        self.files = files
+        self.parsed = {}
+        self.sizes = {}
+        self.touched = set()
+        self.fetched = 0
+
+    def begin_query(self):
+        self.touched = set()
+        self.fetched = 0
+
+    def load(self, path, parse):
+        if path not in self.parsed:
+            data = self.read(path)
+            self.parsed[path] = parse(data)
+            self.sizes[path] = len(data)
+        if path not in self.touched:
+            self.touched.add(path)
+            self.fetched += self.sizes[path]
+        return self.parsed[path]
+
+    def read(self, path):
+        if self.files is not None:
+            content = self.files[path]
+            return content if isinstance(content, bytes) else content.encode('utf-8')
+        with open(os.path.join(self.root, path), 'rb') as f:
+            return f.read()
+
+    def paths(self):
+        """Return the path of every index file."""
+        if self.files is not None:
+            return list(self.files)
+        return [os.path.relpath(os.path.join(directory, file), self.root).replace(os.sep, '/')
+                for directory, _, files in os.walk(self.root) for file in files]
+
+    def json(self, path):
+        return self.load(path, json.loads)
+
+class IndexSearch:
+    """search-worker.js over a sharded index directory (see search_index.py)."""
+
+    def __init__(self, index_dir, files=None):
+        self.path = index_dir
+        self.source = FileSource(index_dir, files)
+
+    @classmethod
+    def from_search_data(cls, path):
+        """Build the index of a search-data.json file in memory."""
+        with open(path, 'r', encoding='utf-8') as f:
+            search_data = columnar_search_data(json.load(f))
+        return cls(path, build_search_index(search_data))
+
+    def preload(self):
+        """Read and parse every file of the index, so no query touches the disk."""
+        for path in self.source.paths():
+            if path.endswith('.json'):
+                self.source.json(path)
+            elif path == 'zip-index.bin':
+                self.source.load(path, decode_zip_index)
+            elif path == 'zip-nearby.bin':
+                self.source.load(path, decode_nearby_index)
+        self.source.begin_query()
+
+    def manifest(self):
+        return self.source.json('manifest.json')
+
+    def shard(self, kind, key):
+        return self.source.json(f'{kind}/{key}.json')
+
+    def city_from_row(self, row):
+        name, state, url = city_result([row], self.manifest()['states'], 0)
+        return {'name': name, 'state': state, 'url': url, 'score': row[3] if len(row) > 3 else 0}
+
+    def city(self, city_id):
+        manifest = self.manifest()
+        start = 0
+        for key, size in zip(manifest['name_shards'], manifest['name_shard_sizes']):
+            if city_id < start + size:
+                return self.shard('cities', key)['cities'][city_id - start]
+            start += size
+        raise ValueError(f'Unknown city id {city_id}')
+
+    def suggestion_from_ref(self, shard, ref):
+        if ref < 0:
+            state, state_slug = self.manifest()['states'][-1 - ref]
+            return {'type': 'state', 'name': state, 'state': '', 'url': f'{state_slug}/', 'score': 0,
+                    'strings': [normalize(state)]}
+        row = shard['cities'][ref]
+        city = self.city_from_row(row)
+        name = normalize(city['name'])
+        state, state_slug = self.manifest()['states'][row[1]]
+        city.update(type='city', strings=[name, f'{name} {normalize(state)}', f'{name} {state_slug}'])
+        return city
+
+    def prefix_refs(self, shard, query):
+        """Return the refs of the longest prefix of a query stored in a shard's prefix table."""
+        for length in range(len(query), self.manifest()['name_prefix_length'] - 1, -1):
+            refs = shard['prefixes'].get(query[:length])
+            if refs:
+                return refs
+        return []
+
+    def find_suggestions(self, shard, query):
+        suggestions = [self.suggestion_from_ref(shard, ref) for ref in self.prefix_refs(shard, query)]
+        return [suggestion for suggestion in suggestions
+                if any(string.startswith(query) for string in suggestion['strings'])]
+
+    def word_matches(self, query):
+        """Return the cities and states with a later word of their name starting a query (loadWordMatches)."""
+        manifest = self.manifest()
+        normalized = normalize(query)
+        key = normalized.replace(' ', '')[:manifest['name_prefix_length']]
+        if len(key) < manifest['name_prefix_length'] or key not in manifest.get('word_shards', []):
+            return []
+        shard = self.shard('words', key)
+        matches = []
+        for ref in self.prefix_refs(shard, normalized):
+            match = self.suggestion_from_ref(shard, ref)
+            if ref < 0:
+                match['strings'] = word_strings(match['strings'][0])
+            else:
+                state, state_slug = manifest['states'][shard['cities'][ref][1]]
+                match['strings'] = word_strings(normalize(match['name']), normalize(state), state_slug)
+            if any(string.startswith(normalized) for string in match['strings']):
+                matches.append(match)
+        return matches[:manifest['typeahead_size']]
+
+    def find_state(self, query):
+        if ',' in query:
+            return None
+        name = normalize(query)
+        for state in self.manifest()['states']:
+            if normalize(state[0]) == name or state[1] == name:
+                return state
+        return None
+
+    def find_zips(self, digits):
+        codes, city_ids = self.source.load('zip-index.bin', decode_zip_index)
+        if len(digits) > 5:
+            return []
+        scale = 10 ** (5 - len(digits))
+        low = int(digits) * scale
+        start = bisect.bisect_left(codes, low)
+        end = bisect.bisect_left(codes, low + scale, start)
+        return [(f'{codes[i]:05d}', city_ids[i]) for i in range(start, end)]
+
+    def nearby_city(self, code):
+        if not self.manifest().get('nearby_count'):
+            return None
+        digits, codes, city_ids, miles = self.source.load('zip-nearby.bin', decode_nearby_index)
+        number = int(code[:digits])
+        i = bisect.bisect_left(codes, number)
+        if i == len(codes) or codes[i] != number:
+            return None
+        city = self.city_from_row(self.city(city_ids[i]))
+        if miles[i] != NEARBY_NO_MILES:
+            city['miles'] = miles[i]
+        return city
+
+    def load_search_data(self, query):
+        """Return the cities, zips and suggestions a query can match (loadSearchData)."""
+        manifest = self.manifest()
+        name = normalize(query.split(',')[0])
+        key = name.replace(' ', '')
+        data = {'cities': [], 'zips': [], 'states': manifest['states']}
+        if self.find_state(query):
+            return data
+
+        if key.isdigit():
+            matches = (self.find_zips('0' + key) if len(key) == 4 else []) + self.find_zips(key)
+            city_ids = []
+            for _, city_id in matches:
+                if city_id not in city_ids and len(city_ids) < MAX_ZIP_CITIES:
+                    city_ids.append(city_id)
+            matches = [match for match in matches if match[1] in city_ids]
+            full_code = '0' + key if len(key) == 4 else key
+            if not matches and len(full_code) == 5:
+                city = self.nearby_city(full_code)
+                data['nearby'] = [city] if city else []
+                return data
+            for code, city_id in matches:
+                city = self.city_from_row(self.city(city_id))
+                data['zips'].append({'code': code, 'city': city['name'], 'state': city['state'],
+                                     'url': city['url'], 'score': city['score']})
+            return data
+
+        key = key[:manifest['name_prefix_length']]
+        shards = [self.shard('cities', shard) for shard in manifest['name_shards'] if key and shard.startswith(key)]
+        for shard in shards:
+            data['cities'].extend(self.city_from_row(row) for row in shard['cities'])
+        if len(shards) == 1 and len(key) == manifest['name_prefix_length']:
+            data['suggestions'] = self.find_suggestions(shards[0], normalize(query))
+        return data
+
+    def process_search_results(self, query, data):
+        """Return a redirect or results answer, or None if nothing matched (processSearchResults)."""
+        parts = query.split(',')
+        name = normalize(parts[0])
+        state_query = normalize(' '.join(parts[1:])) if len(parts) > 1 else ''
+
+        state = self.find_state(query)
+        if state:
+            return {'redirect': f'{state[1]}/'}
+
+        def matches_state(state_name):
+            if not state_query:
+                return True
+            return any(state[0] == state_name and (normalize(state_name) == state_query or state[1] == state_query)
+                       for state in data['states'])
+
+        exact = [city['url'] for city in data['cities'] if normalize(city['name']) == name and matches_state(city['state'])]
+        zip_query = name.replace(' ', '')
+        full_zip_query = '0' + zip_query if len(zip_query) == 4 and zip_query.isdigit() else zip_query
+        exact.extend(zip_entry['url'] for zip_entry in data['zips'] if zip_entry['code'] == full_zip_query)
+        if exact:
+            return {'redirect': exact[0]}
+
+        partial = []
+        if 'suggestions' in data:
+            partial = [dict(suggestion, relevance=3, score=0) for suggestion in data['suggestions']]
+        else:
+            for city in data['cities']:
+                city_name = normalize(city['name'])
+                if not matches_state(city['state']):
+                    continue
+                relevance = 3 if city_name.startswith(name) else 1 if name.startswith(city_name + ' ') else 0
+                if relevance:
+                    partial.append(dict(city, relevance=relevance))
+        for zip_entry in data['zips']:
+            if zip_entry['code'].startswith(zip_query) and not any(match['url'] == zip_entry['url'] for match in partial):
+                partial.append({'name': zip_entry['city'], 'state': zip_entry['state'], 'url': zip_entry['url'],
+                                'relevance': 2, 'score': zip_entry['score']})
+        partial.sort(key=lambda match: (-match['relevance'], -match['score']))
+        if partial:
+            return {'results': partial[:RESULT_LIMIT]}
+        if data.get('nearby'):
+            return {'results': data['nearby']}
+        return None
+
+    def fuzzy_matches(self, query):
+        """Return the near matches of a misspelled name (loadFuzzyMatches)."""
+        manifest = self.manifest()
+        parts = query.split(',')
+        name = normalize(parts[0])
+        if not name or re.fullmatch(r'[0-9 ]+', name) or name[0] not in manifest.get('fuzzy_shards', []):
+            return []
+        state = self.find_state(' '.join(parts[1:])) if len(parts) > 1 else None
+        shard = self.shard('fuzzy', name[0])
+        matches = [self.suggestion_from_ref(shard, ref)
+                   for ref in fuzzy_matches(shard, manifest['states'], name, limit=FUZZY_CANDIDATES)]
+        in_state = [match for match in matches if state and match['state'] == state[0]]
+        return (in_state or matches)[:manifest['typeahead_size']]
+
+    def company_matches(self, query):
+        """Return the companies matching a query, name matches first (loadCompanyMatches)."""
+        manifest = self.manifest()
+        if not manifest.get('company_count'):
+            return []
+
+        def load_terms(key):
+            return self.shard('terms', key)['terms'] if key in manifest['term_shards'] else None
+
+        chunk_size = manifest['company_chunk_size']
+        rows = [self.shard('companies', company_id // chunk_size)['companies'][company_id % chunk_size]
+                for company_id in match_companies(query, load_terms)[:COMPANY_CANDIDATES]]
+        ranked = sorted(range(len(rows)), key=lambda rank: (not name_matches(query, rows[rank][0]), rank))
+        results = []
+        for rank in ranked[:manifest['typeahead_size']]:
+            name, city, state_id, city_slug, anchor = rows[rank]
+            state, state_slug = manifest['states'][state_id]
+            results.append({'name': name, 'state': f'{city}, {state}', 'url': f'{state_slug}/{city_slug}/#{anchor}'})
+        return results
+
+    def search(self, query):
+        """Return (answer, bytes fetched) for a submitted query (runSearch)."""
+        self.source.begin_query()
+        query = query.strip()
+        answer = self.process_search_results(query, self.load_search_data(query))
+        if not answer:
+            matches = self.word_matches(query) or self.company_matches(query) or self.fuzzy_matches(query)
+            answer = {'results': matches} if matches else {'error': NO_MATCHES}
+        return answer, self.source.fetched
+
+    def suggest(self, query):
+        """Return (typeahead suggestions, bytes fetched) for a partial query (loadSuggestions)."""
+        self.source.begin_query()
+        manifest = self.manifest()
+        normalized = normalize(query)
+        key = normalized.replace(' ', '')[:manifest['name_prefix_length']]
+        if len(key) < manifest['name_prefix_length'] or key not in manifest['name_shards']:
+            return [], self.source.fetched
+        return self.find_suggestions(self.shard('cities', key), normalized), self.source.fetched
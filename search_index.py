@@ -0,0 +1,669 @@
+"""
+Sharded search index for the site search.
+Splits the city search data into small JSON shards keyed by the first
+characters of the normalized city name, and stores the zip codes as a compact
+binary index into those shards, plus a small manifest. search-worker.js
+fetches the manifest and only what a query needs, instead of the whole
+search-data.json.
+
+Layout below output/assets/data/search/:
+    manifest.json         {"version", "name_prefix_length", "name_shards",
+                           "name_shard_sizes", "zip_count", "states": [[name, slug], ...]}
+    cities/<prefix>.json  {"cities": [[city, state id, city slug, score], ...],
+                           "prefixes": {prefix: [ref, ...], ...}}
+    fuzzy/<letter>.json   {"cities": [[city, state id, city slug, score], ...],
+                           "trigrams": {trigram: [ref, ...], ...}}
+    words/<prefix>.json   {"cities": [[city, state id, city slug, score], ...],
+                           "prefixes": {prefix: [ref, ...], ...}}
+    geo.json              {"cell_degrees", "rows": [min, max], "cols": [min, max],
+                           "cells": {"<row>,<col>": [city id, lat, lng, ...], ...}}
+    zip-index.bin         b'ZIP1', uint32 count, uint8 city id size (2 or 4), 3 bytes
+                          padding, uint32 zip codes[count] (sorted), uint16 or
+                          uint32 city ids[count]; little-endian
+    zip-nearby.bin        b'NZP1', uint32 count, uint8 city id size, uint8 digits, 2 bytes
+                          padding, uint32 codes[count] (sorted), uint16 or uint32
+                          city ids[count], uint16 miles[count] (NEARBY_NO_MILES when
+                          unknown); little-endian
+    terms/<prefix>.json,  the full-text company index, when companies are passed
+    companies/<n>.json    (see company_index.py)
+
+State ids index the manifest's states and a city's URL is
+"<state slug>/<city slug>/". A city's score (city_score) ranks it by its
+listings, review volume and zip codes, so the ranking needs nothing at query
+time beyond the rows. City ids number the cities of all shards in
+manifest order, so shard name_shards[i] holds the ids from
+sum(name_shard_sizes[:i]) on. A zip query is a binary search over the zip
+codes followed by one shard fetch.
+
+zip-nearby.bin maps zip codes without listings to the nearest city with
+listings and its distance (see zip_centroids.py). Its codes are the first
+`digits` digits of a zip code: five with a zip centroid table, three (every
+ZIP3 area) when the centroids were derived from the listings. ZIP3 answers
+carry no distance, since the listings' centroid of an area is not the
+position of the zip code searched.
+
+"prefixes" is the shard's part of a prefix trie over normalized city names,
+"city state" and "city state-abbreviation" strings and state names, with the
+top TYPEAHEAD_SIZE results precomputed per node: states first, then cities by
+score. A ref >= 0 is a city of the
+shard's "cities"; a ref < 0 is state id -1 - ref. Nodes are stored from two
+characters on, down to the first prefix with at most TYPEAHEAD_SIZE matches;
+a longer query is answered by filtering the refs of its longest stored
+prefix, so a lookup is O(query length).
+
+The word shards hold the same kind of prefix table over the names of the
+cities and states from each word after their first ("worth" and "worth tx"
+for Fort Worth, "carolina" for the Carolinas), keyed like the city shards by
+the first characters of those strings (word_strings). A query no name starts
+falls back to them, so part of a name still finds it.
+
+The fuzzy shards hold a trigram inverted index over the normalized names of
+the cities (and states) starting with one letter, for typo-tolerant search:
+candidates sharing the most trigrams with the query are re-ranked by edit
+distance (fuzzy_matches). Refs follow the same convention as the prefixes.
+
+geo.json buckets the city centroids (the mean position of their listings)
+into a grid of cell_degrees cells, row = floor(lat / cell_degrees) and
+col = floor(lng / cell_degrees). A "near me" query scans rings of cells
+around the position outwards until the k nearest cities found are closer
+than any city left in the unscanned rings (nearest_cities).
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import array
+import struct
+import bisect
+import hashlib
+import unicodedata
+
+INDEX_DIR = 'output/assets/data/search'
+
+# Subdirectories of the index holding shard files
+SHARD_KINDS = ('cities', 'words', 'fuzzy', 'companies', 'terms')
+
+# Characters of the normalized name that select a shard; two characters give
+# ~190 city shards for the current data
+NAME_PREFIX_LENGTH = 2
+
+# Results precomputed per prefix trie node
+TYPEAHEAD_SIZE = 5
+
+# Fuzzy candidates re-ranked by edit distance, and the edits allowed per
+# FUZZY_LETTERS_PER_EDIT letters of the query (at least one)
+FUZZY_CANDIDATES = 20
+FUZZY_LETTERS_PER_EDIT = 4
+
+# Grid cell size of geo.json; one degree of latitude is ~69 miles
+GEO_CELL_DEGREES = 1.0
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * math.pi / 180
+
+ZIP_INDEX_MAGIC = b'ZIP1'
+ZIP_INDEX_HEADER = struct.Struct('<4sIB3x')
+NEARBY_INDEX_MAGIC = b'NZP1'
+NEARBY_INDEX_HEADER = struct.Struct('<4sIBB2x')
+# Miles of a nearby zip whose distance is unknown (NEARBY_NO_MILES in search-worker.js)
+NEARBY_NO_MILES = 2**16 - 1
+
+NON_ALPHANUMERIC = re.compile(r'[^a-z0-9]+')
+
+def normalize(text):
+    """Lowercase text, strip accents and punctuation and collapse whitespace.
+
+    search-worker.js normalizes queries the same way (normalizeSearchText).
+    """
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(NON_ALPHANUMERIC.sub(' ', text).split())
+
+def name_key(name):
+    """Return the shard key of a city name."""
+    return normalize(name).replace(' ', '')[:NAME_PREFIX_LENGTH]
+
+def normalize_zip(code):
+    """Return a zip code as five digits (spreadsheets drop the leading zero of e.g. 02134)."""
+    code = str(code).strip()
+    # Spreadsheet cells holding numbers come back as floats, e.g. 78745.0
+    if code.endswith('.0') and code[:-2].isdigit():
+        code = code[:-2]
+    return code.zfill(5) if code.isdigit() and len(code) < 5 else code
+
+def to_json(data):
+    return json.dumps(data, separators=(',', ':'))
+
+def little_endian(values):
+    """Return the bytes of an array in little-endian order."""
+    if sys.byteorder == 'big':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def encode_zip_index(entries):
+    """Encode (zip code, city id) pairs as zip-index.bin."""
+    entries = sorted(entries)
+    codes = array.array('I', (int(code) for code, _ in entries))
+    # Two-byte city ids unless there are more cities than they can number
+    id_type = 'H' if all(city_id < 2**16 for _, city_id in entries) else 'I'
+    city_ids = array.array(id_type, (city_id for _, city_id in entries))
+    header = ZIP_INDEX_HEADER.pack(ZIP_INDEX_MAGIC, len(entries), city_ids.itemsize)
+    return header + little_endian(codes) + little_endian(city_ids)
+
+def decode_zip_index(data):
+    """Return the (zip codes, city ids) arrays of zip-index.bin."""
+    magic, count, id_size = ZIP_INDEX_HEADER.unpack_from(data)
+    if magic != ZIP_INDEX_MAGIC:
+        raise ValueError('Not a zip index')
+    start = ZIP_INDEX_HEADER.size
+    codes, city_ids = array.array('I'), array.array('H' if id_size == 2 else 'I')
+    codes.frombytes(data[start:start + 4 * count])
+    city_ids.frombytes(data[start + 4 * count:start + (4 + id_size) * count])
+    if sys.byteorder == 'big':
+        codes.byteswap()
+        city_ids.byteswap()
+    return codes, city_ids
+
+def encode_nearby_index(entries, digits):
+    """Encode (code, city id, miles or None) triples as zip-nearby.bin."""
+    entries = sorted(entries, key=lambda entry: entry[:2])
+    codes = array.array('I', (int(code) for code, _, _ in entries))
+    id_type = 'H' if all(city_id < 2**16 for _, city_id, _ in entries) else 'I'
+    city_ids = array.array(id_type, (city_id for _, city_id, _ in entries))
+    miles = array.array('H', (NEARBY_NO_MILES if distance is None else min(round(distance), NEARBY_NO_MILES - 1)
+                              for _, _, distance in entries))
+    header = NEARBY_INDEX_HEADER.pack(NEARBY_INDEX_MAGIC, len(entries), city_ids.itemsize, digits)
+    return header + little_endian(codes) + little_endian(city_ids) + little_endian(miles)
+
+def decode_nearby_index(data):
+    """Return (digits, codes, city ids, miles) of zip-nearby.bin."""
+    magic, count, id_size, digits = NEARBY_INDEX_HEADER.unpack_from(data)
+    if magic != NEARBY_INDEX_MAGIC:
+        raise ValueError('Not a nearby zip index')
+    start = NEARBY_INDEX_HEADER.size
+    codes, city_ids, miles = array.array('I'), array.array('H' if id_size == 2 else 'I'), array.array('H')
+    codes.frombytes(data[start:start + 4 * count])
+    city_ids.frombytes(data[start + 4 * count:start + (4 + id_size) * count])
+    miles.frombytes(data[start + (4 + id_size) * count:start + (6 + id_size) * count])
+    if sys.byteorder == 'big':
+        codes.byteswap()
+        city_ids.byteswap()
+        miles.byteswap()
+    return digits, codes, city_ids, miles
+
+def prefix_table(entries, size=TYPEAHEAD_SIZE):
+    """Return {prefix: [ref, ...]} for the prefix trie nodes of entries.
+
+    entries is a list of (normalized string, ref) in rank order; each node
+    keeps the first `size` distinct refs whose strings start with its prefix.
+    """
+    table = {}
+
+    def add_node(prefix, matches):
+        refs = list(dict.fromkeys(ref for _, ref in matches))
+        table[prefix] = refs[:size]
+        if len(refs) <= size:
+            return
+        children = {}
+        for string, ref in matches:
+            if len(string) > len(prefix):
+                children.setdefault(string[:len(prefix) + 1], []).append((string, ref))
+        for child, child_matches in children.items():
+            add_node(child, child_matches)
+
+    roots = {}
+    for string, ref in entries:
+        roots.setdefault(string[:NAME_PREFIX_LENGTH], []).append((string, ref))
+    for root, matches in roots.items():
+        add_node(root, matches)
+    return table
+
+def word_strings(name, state=None, state_slug=None):
+    """Return a normalized name from each word after its first, also followed by the state if given.
+
+    search-worker.js matches word shard entries the same way (wordStrings).
+    """
+    words = name.split(' ')
+    strings = []
+    for i in range(1, len(words)):
+        suffix = ' '.join(words[i:])
+        strings.append(suffix)
+        if state:
+            strings.extend((f'{suffix} {state}', f'{suffix} {state_slug}'))
+    return strings
+
+def trigrams(text):
+    """Return the trigrams of a normalized string, padded to weight its start."""
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def edit_distance(a, b):
+    """Return the Levenshtein distance between two strings."""
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+def trigram_table(entries):
+    """Return {trigram: [ref, ...]} for (normalized string, ref) entries."""
+    table = {}
+    for string, ref in entries:
+        for trigram in sorted(trigrams(string)):
+            table.setdefault(trigram, []).append(ref)
+    return table
+
+def fuzzy_matches(shard, states, query, limit=TYPEAHEAD_SIZE):
+    """Return the refs of a fuzzy shard that approximately match a normalized query.
+
+    states is the manifest's [[name, slug], ...] list, which state refs point into.
+
+    search-worker.js does the same in findFuzzyMatches.
+    """
+    overlap = {}
+    for trigram in sorted(trigrams(query)):
+        for ref in shard['trigrams'].get(trigram, []):
+            overlap[ref] = overlap.get(ref, 0) + 1
+    candidates = sorted(overlap, key=lambda ref: (-overlap[ref], ref))[:FUZZY_CANDIDATES]
+    allowed = max(1, len(query) // FUZZY_LETTERS_PER_EDIT)
+    scored = []
+    for ref in candidates:
+        name = normalize(shard['cities'][ref][0]) if ref >= 0 else normalize(states[-1 - ref][0])
+        distance = edit_distance(query, name)
+        if distance <= allowed:
+            score = shard['cities'][ref][3] if ref >= 0 else 0
+            scored.append((distance, -score, -overlap[ref], ref))
+    return [entry[-1] for entry in sorted(scored)[:limit]]
+
+def city_score(companies, reviews, zips):
+    """Return the ranking score of a city from its signals.
+
+    Listings weigh most, then the distinct zip codes of the listings (a
+    population proxy) and the total reviews; logarithms keep one very large
+    metro from drowning out every other signal.
+    """
+    return round(4 * math.log1p(companies) + 2 * math.log1p(zips) + math.log1p(reviews), 2)
+
+def distance_miles(lat1, lng1, lat2, lng2):
+    """Return the great-circle distance between two positions, in miles."""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+def centroid(lats, lngs):
+    """Return the rounded mean (lat, lng) of the valid coordinate pairs, or (None, None)."""
+    points = []
+    for lat, lng in zip(lats, lngs):
+        try:
+            lat, lng = float(lat), float(lng)
+        except (TypeError, ValueError):
+            continue
+        if -90 <= lat <= 90 and -180 <= lng <= 180:
+            points.append((lat, lng))
+    if not points:
+        return None, None
+    return (round(sum(point[0] for point in points) / len(points), 4),
+            round(sum(point[1] for point in points) / len(points), 4))
+
+def geo_cell(lat, lng, cell_degrees=GEO_CELL_DEGREES):
+    """Return the (row, col) grid cell of a position."""
+    return math.floor(lat / cell_degrees), math.floor(lng / cell_degrees)
+
+def ring_cells(row, col, ring):
+    """Return the cells at Chebyshev distance ring from (row, col)."""
+    if ring == 0:
+        return [(row, col)]
+    cells = [(i, j) for i in range(row - ring, row + ring + 1) for j in (col - ring, col + ring)]
+    cells.extend((i, j) for j in range(col - ring + 1, col + ring) for i in (row - ring, row + ring))
+    return cells
+
+def nearest_cities(geo, lat, lng, k=TYPEAHEAD_SIZE):
+    """Return [(miles, city id)] of the k cities of geo.json nearest to a position.
+
+    search-worker.js does the same in nearestCities.
+    """
+    size = geo['cell_degrees']
+    row, col = geo_cell(lat, lng, size)
+    last_ring = max(row - geo['rows'][0], geo['rows'][1] - row, col - geo['cols'][0], geo['cols'][1] - col, 0)
+    found = []
+    for ring in range(last_ring + 1):
+        for i, j in ring_cells(row, col, ring):
+            entries = geo['cells'].get(f'{i},{j}', [])
+            for n in range(0, len(entries), 3):
+                found.append((distance_miles(lat, lng, entries[n + 1], entries[n + 2]), entries[n]))
+        found.sort()
+        # Cities beyond this ring are at least `ring` cells away in latitude or
+        # longitude; longitude cells narrow towards the pole
+        narrowest = math.cos(math.radians(min(90.0, abs(lat) + ring * size)))
+        if len(found) >= k and found[k - 1][0] <= ring * size * MILES_PER_DEGREE * narrowest:
+            break
+    return found[:k]
+
+def build_search_data(df):
+    """Return (search data, companies) of the cleaned listings of a pandas DataFrame.
+
+    df needs the us_state, state_slug, city, city_slug, postal_code, latitude,
+    longitude, reviews_num and anchor columns of generate_site.py, plus the
+    name, Scissor Lift Brands, Sizes Available and about columns indexed by
+    the company index. The search data is the columnar dict described in
+    build_search_index: states by name, and each state's cities by name.
+    """
+    # Columnar, dictionary-encoded search data: cities refer to their state and
+    # zip codes to their city by index, and clients rebuild URLs from the slugs
+    search_data = {
+        "states": {"name": [], "slug": []},
+        "cities": {"name": [], "slug": [], "state": [], "lat": [], "lng": [], "companies": [], "reviews": [], "zips": []},
+        "zips": {"code": [], "city": []}
+    }
+    # City id of every (state slug, city slug), for the company index
+    city_ids = {}
+
+    states_with_companies = df[df['state_slug'] != ''][['us_state', 'state_slug']].drop_duplicates().sort_values('us_state')
+
+    # Ranking signals of every city in one aggregation: listings, total reviews
+    # and distinct zip codes (a population proxy)
+    city_signals = df[df['city_slug'] != ''].assign(
+        zip_code=df['postal_code'].map(normalize_zip).where(lambda codes: codes != '')
+    ).groupby(['state_slug', 'city_slug']).agg(
+        companies=('city_slug', 'size'), reviews=('reviews_num', 'sum'), zips=('zip_code', 'nunique')
+    ).to_dict('index')
+
+    for state_id, (state, state_slug) in enumerate(zip(states_with_companies['us_state'], states_with_companies['state_slug'])):
+        search_data["states"]["name"].append(state)
+        search_data["states"]["slug"].append(state_slug)
+
+        state_df = df[df['state_slug'] == state_slug]
+        cities_with_companies = state_df[state_df['city_slug'] != ''][['city', 'city_slug']].drop_duplicates().sort_values('city')
+
+        for city, city_slug in zip(cities_with_companies['city'], cities_with_companies['city_slug']):
+            city_id = len(search_data["cities"]["name"])
+            search_data["cities"]["name"].append(city)
+            search_data["cities"]["slug"].append(city_slug)
+            search_data["cities"]["state"].append(state_id)
+            city_ids[state_slug, city_slug] = city_id
+
+            # Centroid of the city's listings, for "near me" search
+            city_df = state_df[state_df['city_slug'] == city_slug]
+            lat, lng = centroid(city_df['latitude'], city_df['longitude'])
+            search_data["cities"]["lat"].append(lat)
+            search_data["cities"]["lng"].append(lng)
+            signals = city_signals[state_slug, city_slug]
+            search_data["cities"]["companies"].append(int(signals['companies']))
+            search_data["cities"]["reviews"].append(int(signals['reviews']))
+            search_data["cities"]["zips"].append(int(signals['zips']))
+
+            for zip_code in city_df['postal_code'].dropna().unique():
+                if zip_code and str(zip_code).strip():
+                    search_data["zips"]["code"].append(normalize_zip(zip_code))
+                    search_data["zips"]["city"].append(city_id)
+
+    # Company name, brand, size and about feature search over every listing
+    listed = df[[key in city_ids for key in zip(df['state_slug'], df['city_slug'])]]
+    companies = {
+        'name': list(listed['name']),
+        'city': [city_ids[key] for key in zip(listed['state_slug'], listed['city_slug'])],
+        'anchor': list(listed['anchor']),
+        'reviews': list(listed['reviews_num']),
+        'brands': list(listed['Scissor Lift Brands']),
+        'sizes': list(listed['Sizes Available']),
+        'about': list(listed['about']),
+    }
+    return search_data, companies
+
+def build_search_index(search_data, nearby=None, companies=None):
+    """Return {path relative to the index directory: JSON text or bytes} for the index.
+
+    search_data is the columnar dict written to search-data.json:
+    {"states": {"name", "slug"}, "cities": {"name", "slug", "state", "lat", "lng"}, "zips": {"code", "city"}}
+    where cities["state"] holds state ids, zips["city"] city ids and
+    cities["lat"]/["lng"] the centroids (None without coordinates) and
+    cities["companies"]/["reviews"]/["zips"] the ranking signals (optional).
+    nearby is the zip_centroids.nearby_zips() mapping of zip codes to their
+    nearest city, written as zip-nearby.bin. companies is the columnar company
+    data of the full-text company index (see company_index.py).
+    """
+    states, cities, zips = search_data['states'], search_data['cities'], search_data['zips']
+    signals = [cities.get(signal, [0] * len(cities['name'])) for signal in ('companies', 'reviews', 'zips')]
+    scores = [city_score(*city_signals) for city_signals in zip(*signals)]
+    city_shards = {}
+    for city_id, name in enumerate(cities['name']):
+        key = name_key(name)
+        if key:
+            city_shards.setdefault(key, []).append(city_id)
+    state_shards = {}
+    for state_id, name in enumerate(states['name']):
+        key = name_key(name)
+        if key:
+            state_shards.setdefault(key, []).append(state_id)
+            city_shards.setdefault(key, [])
+
+    # Renumber the cities in shard order
+    files = {}
+    shard_ids = {}
+    for key in sorted(city_shards):
+        rows = []
+        entries = []
+        for state_id in state_shards.get(key, []):
+            entries.append((normalize(states['name'][state_id]), -1 - state_id))
+        # Higher scores first, then shorter names, so complete names rank above longer ones they start
+        ranked = sorted(city_shards[key], key=lambda city_id: (-scores[city_id], len(cities['name'][city_id]),
+                                                               cities['name'][city_id]))
+        refs = {}
+        for city_id in city_shards[key]:
+            shard_ids[city_id] = len(shard_ids)
+            refs[city_id] = len(rows)
+            rows.append([cities['name'][city_id], cities['state'][city_id], cities['slug'][city_id], scores[city_id]])
+        for city_id in ranked:
+            ref = refs[city_id]
+            name, state_id = normalize(cities['name'][city_id]), cities['state'][city_id]
+            for string in (name, f"{name} {normalize(states['name'][state_id])}", f"{name} {states['slug'][state_id]}"):
+                entries.append((string, ref))
+        files[f'cities/{key}.json'] = to_json({'cities': rows, 'prefixes': prefix_table(entries)})
+
+    # Word shards by the first characters of each later word of the name:
+    # states first, then cities in the rank order of the city shards
+    word_shards = {}
+    for state_id, name in enumerate(states['name']):
+        for string in word_strings(normalize(name)):
+            shard = word_shards.setdefault(name_key(string), {'cities': [], 'entries': []})
+            shard['entries'].append((string, -1 - state_id))
+    ranked = sorted(range(len(cities['name'])), key=lambda city_id: (-scores[city_id], len(cities['name'][city_id]),
+                                                                     cities['name'][city_id]))
+    for city_id in ranked:
+        state_id = cities['state'][city_id]
+        refs = {}
+        for string in word_strings(normalize(cities['name'][city_id]), normalize(states['name'][state_id]),
+                                   states['slug'][state_id]):
+            key = name_key(string)
+            shard = word_shards.setdefault(key, {'cities': [], 'entries': []})
+            if key not in refs:
+                refs[key] = len(shard['cities'])
+                shard['cities'].append([cities['name'][city_id], state_id, cities['slug'][city_id], scores[city_id]])
+            shard['entries'].append((string, refs[key]))
+    for key in sorted(word_shards):
+        shard = word_shards[key]
+        files[f'words/{key}.json'] = to_json({'cities': shard['cities'], 'prefixes': prefix_table(shard['entries'])})
+
+    # Fuzzy shards by the first letter of the name
+    fuzzy_shards = {}
+    for city_id, name in enumerate(cities['name']):
+        name = normalize(name)
+        if name:
+            shard = fuzzy_shards.setdefault(name[0], {'cities': [], 'entries': []})
+            shard['entries'].append((name, len(shard['cities'])))
+            shard['cities'].append([cities['name'][city_id], cities['state'][city_id], cities['slug'][city_id],
+                                    scores[city_id]])
+    for state_id, name in enumerate(states['name']):
+        name = normalize(name)
+        if name:
+            shard = fuzzy_shards.setdefault(name[0], {'cities': [], 'entries': []})
+            shard['entries'].append((name, -1 - state_id))
+    for letter in sorted(fuzzy_shards):
+        shard = fuzzy_shards[letter]
+        files[f'fuzzy/{letter}.json'] = to_json({'cities': shard['cities'], 'trigrams': trigram_table(shard['entries'])})
+
+    # City centroids bucketed into grid cells, by shard-order city id
+    cells = {}
+    for city_id, (lat, lng) in enumerate(zip(cities.get('lat', []), cities.get('lng', []))):
+        if lat is not None and lng is not None and city_id in shard_ids:
+            cells.setdefault(geo_cell(lat, lng), []).append((shard_ids[city_id], lat, lng))
+    cell_rows = [cell[0] for cell in cells] or [0]
+    cell_cols = [cell[1] for cell in cells] or [0]
+    files['geo.json'] = to_json({
+        'cell_degrees': GEO_CELL_DEGREES,
+        'rows': [min(cell_rows), max(cell_rows)],
+        'cols': [min(cell_cols), max(cell_cols)],
+        'cells': {f'{row},{col}': [value for entry in sorted(cells[row, col]) for value in entry]
+                  for row, col in sorted(cells)},
+    })
+
+    zip_entries = {(normalize_zip(code), shard_ids[city_id]) for code, city_id in zip(zips['code'], zips['city'])
+                   if city_id in shard_ids and normalize_zip(code).isdigit()}
+    files['zip-index.bin'] = encode_zip_index(zip_entries)
+    nearby_entries = set()
+    if nearby:
+        nearby_entries = {(code, shard_ids[city_id], miles) for code, city_id, miles
+                          in zip(nearby['code'], nearby['city'], nearby['miles']) if city_id in shard_ids}
+        files['zip-nearby.bin'] = encode_nearby_index(nearby_entries, nearby['digits'])
+    company_fields = {}
+    if companies and companies['name']:
+        # Imported here: company_index builds on the helpers of this module
+        from company_index import build_company_index
+        company_files, company_fields = build_company_index(search_data, companies)
+        files.update(company_files)
+
+    # The version changes whenever any file does, so clients can cache files by it
+    digest = hashlib.sha1()
+    for path, content in files.items():
+        digest.update(path.encode('utf-8'))
+        digest.update(content if isinstance(content, bytes) else content.encode('utf-8'))
+    files['manifest.json'] = to_json({
+        'version': digest.hexdigest()[:12],
+        'name_prefix_length': NAME_PREFIX_LENGTH,
+        'typeahead_size': TYPEAHEAD_SIZE,
+        'name_shards': sorted(city_shards),
+        'name_shard_sizes': [len(city_shards[key]) for key in sorted(city_shards)],
+        'word_shards': sorted(word_shards),
+        'fuzzy_shards': sorted(fuzzy_shards),
+        'zip_count': len(zip_entries),
+        'nearby_count': len(nearby_entries),
+        'geo_count': sum(len(entries) for entries in cells.values()),
+        'states': [[name, slug] for name, slug in zip(states['name'], states['slug'])],
+        **company_fields,
+    })
+    return files
+
+def remove_stale_shards(index_dir, files):
+    """Delete shard files below index_dir that are not part of the new index."""
+    removed = 0
+    # zips/ held the zip shards of earlier builds, now replaced by zip-index.bin
+    for kind in SHARD_KINDS + ('zips',):
+        directory = os.path.join(index_dir, kind)
+        if not os.path.isdir(directory):
+            continue
+        for file in os.listdir(directory):
+            if f'{kind}/{file}' not in files:
+                os.remove(os.path.join(directory, file))
+                removed += 1
+        if not os.listdir(directory):
+            os.rmdir(directory)
+    # zip-nearby.bin is only written when zip centroids are available
+    path = os.path.join(index_dir, 'zip-nearby.bin')
+    if 'zip-nearby.bin' not in files and os.path.isfile(path):
+        os.remove(path)
+        removed += 1
+    return removed
+
+def write_search_index(search_data, index_dir=INDEX_DIR, nearby=None, companies=None):
+    """Build the sharded index and write it to index_dir; return the files written."""
+    files = build_search_index(search_data, nearby, companies)
+    for kind in SHARD_KINDS:
+        os.makedirs(os.path.join(index_dir, kind), exist_ok=True)
+    for path, content in files.items():
+        with open(os.path.join(index_dir, path), 'wb') as f:
+            f.write(content if isinstance(content, bytes) else content.encode('utf-8'))
+    remove_stale_shards(index_dir, files)
+    return files
+
+def read_index(index_dir=INDEX_DIR):
+    """Return (manifest, city rows by city id) of a written search index."""
+    with open(os.path.join(index_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    cities = []
+    for key in manifest['name_shards']:
+        with open(os.path.join(index_dir, 'cities', f'{key}.json'), 'r', encoding='utf-8') as f:
+            cities.extend(json.load(f)['cities'])
+    return manifest, cities
+
+def city_result(cities, states, city_id):
+    """Return the [city, state, url] of a city id."""
+    name, state_id, slug = cities[city_id][:3]
+    state, state_slug = states[state_id]
+    return [name, state, f'{state_slug}/{slug}/']
+
+class ZipIndex:
+    """Answers zip code queries from a written search index."""
+
+    def __init__(self, codes, city_ids, cities, states, nearby=None):
+        self.codes = codes
+        self.city_ids = city_ids
+        self.cities = cities
+        self.states = states
+        self.nearby = nearby
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR):
+        manifest, cities = read_index(index_dir)
+        with open(os.path.join(index_dir, 'zip-index.bin'), 'rb') as f:
+            codes, city_ids = decode_zip_index(f.read())
+        nearby = None
+        if manifest.get('nearby_count'):
+            with open(os.path.join(index_dir, 'zip-nearby.bin'), 'rb') as f:
+                nearby = decode_nearby_index(f.read())
+        return cls(codes, city_ids, cities, manifest['states'], nearby)
+
+    def lookup(self, code):
+        """Return the [city, state, url] of every city with this zip code."""
+        code = normalize_zip(code)
+        if not code.isdigit():
+            return []
+        number = int(code)
+        start = bisect.bisect_left(self.codes, number)
+        end = bisect.bisect_right(self.codes, number, start)
+        return [city_result(self.cities, self.states, self.city_ids[i]) for i in range(start, end)]
+
+    def nearest(self, code):
+        """Return the [city, state, url, miles or None] of the nearest city to a zip code, or None."""
+        code = normalize_zip(code)
+        if not self.nearby or not code.isdigit():
+            return None
+        digits, codes, city_ids, miles = self.nearby
+        number = int(code[:digits])
+        i = bisect.bisect_left(codes, number)
+        if i == len(codes) or codes[i] != number:
+            return None
+        return city_result(self.cities, self.states, city_ids[i]) + [None if miles[i] == NEARBY_NO_MILES else miles[i]]
+
+class GeoIndex:
+    """Answers "near me" queries from a written search index."""
+
+    def __init__(self, geo, cities, states):
+        self.geo = geo
+        self.cities = cities
+        self.states = states
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR):
+        manifest, cities = read_index(index_dir)
+        with open(os.path.join(index_dir, 'geo.json'), 'r', encoding='utf-8') as f:
+            geo = json.load(f)
+        return cls(geo, cities, manifest['states'])
+
+    def nearest(self, lat, lng, k=TYPEAHEAD_SIZE):
+        """Return the [city, state, url, miles] of the k cities nearest to a position."""
+        return [city_result(self.cities, self.states, city_id) + [round(miles, 1)]
+                for miles, city_id in nearest_cities(self.geo, lat, lng, k)]
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Search replay harness.
+Runs a query corpus against search implementations in Python and compares
+them: latency percentiles, bytes a client with an empty cache fetches per
+query, and the queries whose answer differs from the baseline.
+
+Two implementations are ported from the browser:
+    SearchDataSearch  the original search-handler.js matching, which fetched
+                      the whole search-data.json on every submit and scanned it
+    IndexSearch       the matching of search-worker.js over the sharded index
+                      of search_index.py (prefix tables, zip index, company
+                      index, fuzzy and nearby-zip fallbacks)
+A path is replayed with SearchDataSearch if it is a JSON file (legacy record
+or columnar search-data.json) and with IndexSearch if it is an index
+directory, so an index built from a candidate format can be compared against
+the current one.
+
+The corpus is read from --queries (one query per line) or generated from the
+search data: exact city names, "city, ST", name prefixes, one-letter typos,
+states, zip codes and prefixes, and queries that match nothing.
+
+Example:
+    python search_replay.py --candidate output/assets/data/search
+    python search_replay.py --baseline old-index/ --candidate output/assets/data/search --save replay.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import string
+import argparse
+
+from build_report import percentile
+from search import IndexSearch, columnar_search_data, RESULT_LIMIT, NO_MATCHES
+
+def record_search_data(data):
+    """Return search-data.json in the legacy record format the original handler scanned."""
+    if isinstance(data['cities'], list):
+        return data
+    states, cities, zips = data['states'], data['cities'], data['zips']
+    records = {'cities': [], 'zips': []}
+    for name, slug, state_id in zip(cities['name'], cities['slug'], cities['state']):
+        records['cities'].append({'name': name, 'state': states['name'][state_id],
+                                  'url': f"{states['slug'][state_id]}/{slug}/"})
+    for code, city_id in zip(zips['code'], zips['city']):
+        city = records['cities'][city_id]
+        records['zips'].append({'code': code, 'city': city['name'], 'state': city['state'], 'url': city['url']})
+    return records
+
+def answer_key(answer):
+    """Return a comparable form of an answer: its redirect URL or result URLs."""
+    if 'redirect' in answer:
+        return ('redirect', answer['redirect'])
+    if 'results' in answer:
+        return ('results',) + tuple(result['url'] for result in answer['results'])
+    return ('none',)
+
+def describe(answer):
+    if 'redirect' in answer:
+        return f"-> {answer['redirect']}"
+    if 'results' in answer:
+        return ' | '.join(f"{result['name']}, {result['state']}" if result['state'] else result['name']
+                          for result in answer['results'])
+    return answer['error']
+
+class SearchDataSearch:
+    """The original search-handler.js: fetch search-data.json and scan every city."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'r', encoding='utf-8') as f:
+            self.data = record_search_data(json.load(f))
+        self.size = os.path.getsize(path)
+
+    def search(self, query):
+        """Return (answer, bytes fetched) for a submitted query."""
+        query = query.strip().lower()
+        exact = [city['url'] for city in self.data['cities']
+                 if city['name'].lower() == query or f"{city['name'].lower()}, {city['state'].lower()}" == query]
+        exact.extend(zip_entry['url'] for zip_entry in self.data['zips'] if zip_entry['code'] == query)
+        if exact:
+            return {'redirect': exact[0]}, self.size
+
+        partial = []
+        for city in self.data['cities']:
+            name, state = city['name'].lower(), city['state'].lower()
+            if query in name or name in query or query in state or state in query:
+                if name.startswith(query):
+                    relevance = 3
+                elif query in name:
+                    relevance = 2
+                elif name in query:
+                    relevance = 1
+                else:
+                    relevance = 0
+                partial.append((relevance, city))
+        partial.sort(key=lambda match: -match[0])
+        if partial:
+            return {'results': [dict(city) for _, city in partial[:RESULT_LIMIT]]}, self.size
+        return {'error': NO_MATCHES}, self.size
+
+def open_search(path):
+    """Return the implementation that replays a search-data.json file or an index directory."""
+    if os.path.isdir(path):
+        return IndexSearch(path)
+    return SearchDataSearch(path)
+
+def typo(rng, name):
+    """Return name with one letter after the first dropped, doubled, swapped or replaced."""
+    if len(name) < 4:
+        return name
+    i = rng.randrange(1, len(name) - 1)
+    edit = rng.choice(('drop', 'double', 'swap', 'replace'))
+    if edit == 'drop':
+        return name[:i] + name[i + 1:]
+    if edit == 'double':
+        return name[:i] + name[i] + name[i:]
+    if edit == 'swap':
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1:]
+
+def generate_corpus(search_data, size, seed=0):
+    """Return (kind, query) pairs drawn from columnar search data."""
+    rng = random.Random(seed)
+    states, cities, zips = search_data['states'], search_data['cities'], search_data['zips']
+
+    def random_city():
+        city_id = rng.randrange(len(cities['name']))
+        return cities['name'][city_id], cities['state'][city_id]
+
+    generators = {
+        'city': lambda: random_city()[0],
+        'city_state': lambda: (lambda city: f"{city[0]}, {states['slug'][city[1]].upper()}")(random_city()),
+        'prefix': lambda: (lambda name: name[:rng.randint(2, max(2, min(6, len(name))))])(random_city()[0]),
+        'typo': lambda: typo(rng, random_city()[0]),
+        'state': lambda: rng.choice((states['name'], states['slug']))[rng.randrange(len(states['name']))],
+        'zip': lambda: rng.choice(zips['code']),
+        'zip_prefix': lambda: rng.choice(zips['code'])[:rng.randint(3, 4)],
+        'unknown_zip': lambda: f'{rng.randrange(100000):05d}',
+        'miss': lambda: ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9))),
+    }
+    if not zips['code']:
+        for kind in ('zip', 'zip_prefix'):
+            del generators[kind]
+    kinds = list(generators)
+    return [(kind, generators[kind]()) for kind in (rng.choice(kinds) for _ in range(size))]
+
+def read_corpus(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [('file', line.strip()) for line in f if line.strip()]
+
+def replay(search, corpus):
+    """Run every query of the corpus and return (answers, latencies in ms, bytes fetched)."""
+    answers, latencies, fetched = [], [], []
+    for _, query in corpus:
+        start = time.perf_counter()
+        answer, nbytes = search.search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+        answers.append(answer)
+        fetched.append(nbytes)
+    return answers, latencies, fetched
+
+def summarize(path, latencies, fetched):
+    return {
+        'path': path,
+        'queries': len(latencies),
+        'first_query_ms': latencies[0],
+        'latency_ms': {name: percentile(latencies, fraction)
+                       for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))} | {'max': max(latencies)},
+        'bytes_per_query': {'mean': sum(fetched) / len(fetched), 'p50': percentile(fetched, 0.5),
+                            'p95': percentile(fetched, 0.95), 'max': max(fetched)},
+    }
+
+def diff_answers(corpus, baseline, candidate):
+    """Return {kind: [queries, differing]} and the differing (kind, query, baseline, candidate)."""
+    by_kind = {}
+    differences = []
+    for (kind, query), old, new in zip(corpus, baseline, candidate):
+        counts = by_kind.setdefault(kind, [0, 0])
+        counts[0] += 1
+        if answer_key(old) != answer_key(new):
+            counts[1] += 1
+            differences.append((kind, query, old, new))
+    return by_kind, differences
+
+def print_summary(name, summary):
+    latency, nbytes = summary['latency_ms'], summary['bytes_per_query']
+    print(f"{name}: {summary['path']}")
+    print(f"  latency ms  p50 {latency['p50']:.3f}  p95 {latency['p95']:.3f}  p99 {latency['p99']:.3f}  "
+          f"max {latency['max']:.3f}  (first query {summary['first_query_ms']:.1f})")
+    print(f"  bytes/query mean {nbytes['mean']:,.0f}  p50 {nbytes['p50']:,}  p95 {nbytes['p95']:,}  max {nbytes['max']:,}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a query corpus against search implementations')
+    parser.add_argument('--data', default='output/assets/data/search-data.json',
+                        help='search-data.json the corpus is generated from')
+    parser.add_argument('--baseline', help='search-data.json or index directory to compare against (default: --data)')
+    parser.add_argument('--candidate', action='append', default=[],
+                        help='search-data.json or index directory to replay (repeatable)')
+    parser.add_argument('--queries', help='Query corpus, one query per line (default: generated)')
+    parser.add_argument('--size', type=int, default=5000, help='Generated queries')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the generated corpus')
+    parser.add_argument('--examples', type=int, default=10, help='Differing queries to list per candidate')
+    parser.add_argument('--save', help='Write the summaries and differences to this JSON file')
+
+    args = parser.parse_args()
+
+    if args.queries:
+        corpus = read_corpus(args.queries)
+    else:
+        with open(args.data, 'r', encoding='utf-8') as f:
+            corpus = generate_corpus(columnar_search_data(json.load(f)), args.size, args.seed)
+    if not corpus:
+        print("The query corpus is empty")
+        return 2
+    candidates = args.candidate or ['output/assets/data/search']
+    baseline_path = args.baseline or args.data
+
+    baseline, latencies, fetched = replay(open_search(baseline_path), corpus)
+    results = {'baseline': summarize(baseline_path, latencies, fetched), 'candidates': []}
+    print(f"Replayed {len(corpus)} queries")
+    print_summary('Baseline', results['baseline'])
+
+    for path in candidates:
+        answers, latencies, fetched = replay(open_search(path), corpus)
+        summary = summarize(path, latencies, fetched)
+        by_kind, differences = diff_answers(corpus, baseline, answers)
+        summary['differences'] = {kind: counts[1] for kind, counts in by_kind.items()}
+        summary['examples'] = [{'kind': kind, 'query': query, 'baseline': old, 'candidate': new}
+                               for kind, query, old, new in differences[:args.examples]]
+        results['candidates'].append(summary)
+
+        print()
+        print_summary('Candidate', summary)
+        print(f"  {len(differences)} of {len(corpus)} answers differ from the baseline")
+        for kind, (total, differing) in sorted(by_kind.items()):
+            print(f"    {kind:<12}{differing:>7} / {total}")
+        for kind, query, old, new in differences[:args.examples]:
+            print(f"    [{kind}] {query!r}")
+            print(f"      baseline:  {describe(old)}")
+            print(f"      candidate: {describe(new)}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results saved to {args.save}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,28 +2,256 @@
 """
 Simple HTTP server for testing the generated website locally.
 Run this script and then open http://localhost:3000 in your browser.
+
+With --threaded, every connection gets its own thread and connections are
+kept alive (HTTP/1.1), so parallel crawls and smoke tests don't queue behind
+one slow client. --no-browser skips opening the browser, to run headless.
+
+With --cache, file bodies are kept in memory (loaded on first request, or all
+at startup with --preload) and reloaded when a file's mtime or size changes.
+Responses carry a strong ETag and answer a matching If-None-Match with 304.
+A .br or .gz sibling of a file (e.g. index.html.br) is sent with its
+Content-Encoding when the client accepts it and the sibling is not older than
+the file; text files without a .gz sibling are gzip-compressed once in memory.
+
+Example:
+    python serve.py
+    python serve.py --threaded --no-browser --bind 127.0.0.1 --port 8000
+    python serve.py --threaded --cache --preload --no-browser
 """
 
+import os
+import sys
+import gzip
+import stat
+import hashlib
+import argparse
+import functools
 import http.server
 import socketserver
-import os
 import webbrowser
+from urllib.parse import urlsplit
+
+# Seconds an idle keep-alive connection is held open in threaded mode
+KEEP_ALIVE_TIMEOUT = 15
+
+# Precompressed siblings in order of preference: (Content-Encoding, suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Types gzip-compressed in memory when a file has no .gz sibling
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/xml', 'image/svg+xml')
+
+# gzip level typical of web servers and CDNs (as in page_weight.py)
+COMPRESSION_LEVEL = 6
+
+def make_etag(body):
+    """Return a strong ETag of a response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def accepted_encodings(header):
+    """Return the content codings an Accept-Encoding header allows (q > 0)."""
+    accepted = set()
+    refused = set()
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        (accepted if quality > 0 else refused).add(name)
+    if '*' in accepted:
+        accepted.update(encoding for encoding, _ in ENCODINGS if encoding not in refused)
+    return accepted
+
+class FileCache:
+    """Keeps file bodies and their ETags in memory, reloading a file when its mtime or size changes."""
+
+    def __init__(self):
+        # path: ((mtime_ns, size), body, etag); replaced whole, so threads can share it
+        self.files = {}
+        # path: (ETag of the file, gzip body, its ETag)
+        self.compressed = {}
+
+    def get(self, path):
+        """Return (body, ETag, mtime_ns) of a regular file, or None if there is none."""
+        try:
+            info = os.stat(path)
+        except OSError:
+            self.files.pop(path, None)
+            return None
+        if not stat.S_ISREG(info.st_mode):
+            return None
+        entry = self.files.get(path)
+        if entry is None or entry[0] != (info.st_mtime_ns, info.st_size):
+            with open(path, 'rb') as f:
+                # Stat the open file, so a write racing the read is seen on the next request
+                info = os.fstat(f.fileno())
+                body = f.read()
+            entry = ((info.st_mtime_ns, info.st_size), body, make_etag(body))
+            self.files[path] = entry
+        return entry[1], entry[2], entry[0][0]
+
+    def gzip(self, path, body, etag):
+        """Return (gzip body, ETag) of a file's body, compressing each version once."""
+        entry = self.compressed.get(path)
+        if entry is None or entry[0] != etag:
+            compressed = gzip.compress(body, COMPRESSION_LEVEL, mtime=0)
+            entry = (etag, compressed, make_etag(compressed))
+            self.compressed[path] = entry
+        return entry[1], entry[2]
+
+    def preload(self, directory):
+        """Load every file below directory; return the number of files and bytes."""
+        files = size = 0
+        for root, _, names in os.walk(directory):
+            for name in names:
+                entry = self.get(os.path.join(root, name))
+                if entry:
+                    files += 1
+                    size += len(entry[0])
+        return files, size
+
+class KeepAliveHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves files over HTTP/1.1, keeping connections open between requests."""
+
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEP_ALIVE_TIMEOUT
+
+class CachingHandler(http.server.SimpleHTTPRequestHandler):
+    """Serves files from a FileCache with ETags, 304s and precompressed variants."""
+
+    def __init__(self, *args, cache, **kwargs):
+        self.cache = cache
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self.send_cached(head=False)
+
+    def do_HEAD(self):
+        self.send_cached(head=True)
+
+    def send_cached(self, head):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, 'index.html')
+            # Redirects to the trailing slash and directory listings are left to the base class
+            if not urlsplit(self.path).path.endswith('/') or not os.path.isfile(index):
+                super().do_HEAD() if head else super().do_GET()
+                return
+            path = index
+        cached = self.cache.get(path)
+        if cached is None:
+            self.send_error(404, "File not found")
+            return
+        body, etag, mtime_ns = cached
+        content_type = self.guess_type(path)
+        encoding, body, etag = self.choose_variant(path, body, etag, mtime_ns, content_type)
+
+        tags = self.if_none_match()
+        not_modified = etag in tags or '*' in tags
+        self.send_response(304 if not_modified else 200)
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Last-Modified', self.date_time_string(mtime_ns // 1_000_000_000))
+        if not_modified:
+            self.end_headers()
+            return
+        self.send_header('Content-Type', content_type)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def choose_variant(self, path, body, etag, mtime_ns, content_type):
+        """Return (Content-Encoding or None, body, ETag) of the best variant the client accepts."""
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding'))
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted:
+                sibling = self.cache.get(path + suffix)
+                # A sibling older than the file was compressed from an earlier version
+                if sibling and sibling[2] >= mtime_ns:
+                    return encoding, sibling[0], sibling[1]
+        if 'gzip' in accepted and content_type.startswith(COMPRESSIBLE_TYPES):
+            compressed, compressed_etag = self.cache.gzip(path, body, etag)
+            if len(compressed) < len(body):
+                return 'gzip', compressed, compressed_etag
+        return None, body, etag
+
+    def if_none_match(self):
+        """Return the ETags of the If-None-Match header (weak ones compared as strong)."""
+        header = self.headers.get('If-None-Match', '')
+        return {tag.strip().removeprefix('W/') for tag in header.split(',') if tag.strip()}
+
+class KeepAliveCachingHandler(CachingHandler):
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEP_ALIVE_TIMEOUT
+
+class ReusableTCPServer(socketserver.TCPServer):
+    allow_reuse_address = True
+
+def make_server(directory='output', bind='', port=3000, threaded=False, cache=None):
+    """Return an HTTP server for the files below directory, served from cache if given."""
+    if cache is not None:
+        handler_class = KeepAliveCachingHandler if threaded else CachingHandler
+        handler = functools.partial(handler_class, directory=directory, cache=cache)
+    else:
+        handler_class = KeepAliveHandler if threaded else http.server.SimpleHTTPRequestHandler
+        handler = functools.partial(handler_class, directory=directory)
+    if threaded:
+        return http.server.ThreadingHTTPServer((bind, port), handler)
+    return ReusableTCPServer((bind, port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the generated website locally')
+    parser.add_argument('--directory', default='output', help='Directory to serve')
+    parser.add_argument('--bind', default='', help='Address to bind to (default: all interfaces)')
+    parser.add_argument('--port', type=int, default=3000, help='Port to listen on')
+    parser.add_argument('--threaded', action='store_true',
+                        help='Handle connections in parallel threads, with HTTP/1.1 keep-alive')
+    parser.add_argument('--no-browser', action='store_true', help='Do not open the site in a browser')
+    parser.add_argument('--cache', action='store_true',
+                        help='Serve files from memory with ETags, 304s and .br/.gz variants')
+    parser.add_argument('--preload', action='store_true', help='Load every file into the cache at startup (implies --cache)')
+
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"{args.directory} does not exist; generate the site first")
+        return 1
+
+    cache = None
+    if args.cache or args.preload:
+        cache = FileCache()
+        if args.preload:
+            files, size = cache.preload(args.directory)
+            print(f"Preloaded {files} files ({size:,} bytes)")
 
-# Change to the output directory
-os.chdir('output')
+    # Set up the server
+    httpd = make_server(args.directory, args.bind, args.port, args.threaded, cache)
+    url = f"http://{args.bind or 'localhost'}:{httpd.server_address[1]}"
 
-# Set up the server
-PORT = 3000
-Handler = http.server.SimpleHTTPRequestHandler
+    # Open the browser
+    if not args.no_browser:
+        webbrowser.open(url)
 
-# Open the browser
-webbrowser.open(f'http://localhost:{PORT}')
+    # Start the server
+    with httpd:
+        modes = ', '.join(mode for mode, enabled in (('threaded, keep-alive', args.threaded), ('cached', cache)) if enabled)
+        print(f"Serving {args.directory} at {url}{f' ({modes})' if modes else ''}")
+        print("Press Ctrl+C to stop the server")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print("\nServer stopped")
+    return 0
 
-# Start the server
-with socketserver.TCPServer(("", PORT), Handler) as httpd:
-    print(f"Serving at http://localhost:{PORT}")
-    print("Press Ctrl+C to stop the server")
-    try:
-        httpd.serve_forever()
-    except KeyboardInterrupt:
-        print("\nServer stopped") 
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+Data cleaning, formatting and description helpers used by generate_site.py.
+"""
+
+import re
+import json
+import random
+from urllib.parse import unquote
+
+# Function to generate unique SEO-optimized descriptions for states
+def generate_state_description(state):
+    # LSI keywords and N-grams related to scissor lift rentals
+    lsi_keywords = [
+        "aerial work platforms", "elevated work platforms", "construction equipment rental",
+        "industrial equipment", "maintenance equipment", "height access solutions",
+        "lifting equipment", "mobile elevating work platforms", "MEWP rentals",
+        "commercial construction equipment", "industrial machinery"
+    ]
+    
+    # Randomly select 3-4 LSI keywords to include
+    selected_keywords = random.sample(lsi_keywords, random.randint(3, 4))
+    
+    # Create a unique description for each state
+    descriptions = [
+        f"{state} offers a comprehensive selection of scissor lift rentals and {selected_keywords[0]} for construction, maintenance, and industrial projects. Whether you need equipment for indoor applications or {selected_keywords[1]} for outdoor construction sites, rental companies throughout {state} provide reliable solutions with flexible rental terms.",
+        
+        f"Finding quality scissor lift rentals in {state} is simple with numerous providers offering {selected_keywords[0]} and {selected_keywords[1]}. Construction professionals and maintenance crews across {state} rely on these versatile machines for safe and efficient elevated work access.",
+        
+        f"Contractors and facility managers in {state} can access a wide range of scissor lift rentals and {selected_keywords[0]} from reputable providers. These {selected_keywords[1]} are essential for projects requiring safe access to elevated work areas in commercial, industrial, and institutional settings.",
+        
+        f"{state}'s construction and maintenance industries are well-served by local companies offering scissor lift rentals and other {selected_keywords[0]}. These {selected_keywords[1]} provide safe and stable platforms for workers needing to reach heights efficiently.",
+        
+        f"The {selected_keywords[0]} market in {state} includes numerous options for scissor lift rentals suited to various applications. From {selected_keywords[1]} to specialized equipment for unique projects, {state}'s rental providers offer comprehensive solutions for height access needs."
+    ]
+    
+    # Select a random description template and add safety information
+    description = random.choice(descriptions)
+    
+    # Add information about popular brands
+    brands = ["JLG", "Genie", "Skyjack", "Haulotte", "Snorkel"]
+    random.shuffle(brands)
+    top_brands = brands[:3]  # Select 3 random brands
+    
+    description += f" Popular scissor lift brands available in {state} include {', '.join(top_brands)}, offering various platform heights, weight capacities, and power options to suit specific project requirements."
+    
+    return description
+
+# Function to generate unique SEO-optimized descriptions for cities
+def generate_city_description(city, state):
+    # LSI keywords and N-grams related to scissor lift rentals in cities
+    lsi_keywords = [
+        "aerial equipment rental", "construction lift rental", "industrial lift equipment",
+        "scissor platform rental", "elevated work access", "commercial lift solutions",
+        "height access equipment", "construction machinery rental", "industrial access platforms",
+        "building maintenance equipment", "contractor equipment rental"
+    ]
+    
+    # Randomly select 3-4 LSI keywords to include
+    selected_keywords = random.sample(lsi_keywords, random.randint(3, 4))
+    
+    # Create a unique description for each city
+    descriptions = [
+        f"Contractors and businesses in {city}, {state} have access to premium scissor lift rentals and {selected_keywords[0]} from local providers. These {selected_keywords[1]} are essential for construction, maintenance, and renovation projects requiring safe and efficient access to elevated work areas.",
+        
+        f"{city}, {state} offers numerous options for scissor lift rentals and {selected_keywords[0]} to support local construction and maintenance industries. Companies in {city} provide {selected_keywords[1]} with various platform heights and weight capacities to accommodate different project requirements.",
+        
+        f"Finding reliable scissor lift rentals in {city}, {state} is straightforward with several local companies offering {selected_keywords[0]} and {selected_keywords[1]}. These versatile machines help contractors and maintenance teams work safely and efficiently at height.",
+        
+        f"The {selected_keywords[0]} market in {city}, {state} includes multiple providers offering scissor lift rentals for commercial, industrial, and institutional applications. These {selected_keywords[1]} are crucial for projects requiring stable elevated work platforms.",
+        
+        f"Businesses and contractors in {city}, {state} rely on local scissor lift rentals and {selected_keywords[0]} for safe access to elevated work areas. The {selected_keywords[1]} available in {city} include various models suited to both indoor and outdoor applications."
+    ]
+    
+    # Select a random description template
+    description = random.choice(descriptions)
+    
+    # Add rental advice specific to the city
+    rental_advice = [
+        f"When renting scissor lifts in {city}, consider factors such as project duration, required working height, and whether you need an electric model for indoor use or a rough terrain unit for outdoor applications.",
+        
+        f"For optimal results when renting scissor lifts in {city}, be sure to specify your project requirements including working height, platform capacity, and whether you need indoor or outdoor capabilities.",
+        
+        f"Rental companies in {city} typically offer daily, weekly, and monthly rates for scissor lifts, with significant discounts available for longer rental periods. Be sure to inquire about delivery and pickup services when requesting quotes.",
+        
+        f"Before renting a scissor lift in {city}, assess your specific project needs including required height, weight capacity, and whether you'll be working indoors or outdoors. Most local rental companies can help determine the right equipment for your application.",
+        
+        f"When selecting a scissor lift rental in {city}, consider the working environment, required platform height, weight capacity needs, and rental duration to ensure you get the most cost-effective solution for your project."
+    ]
+    
+    description += " " + random.choice(rental_advice)
+    
+    return description
+
+# Function to strip UTM parameters from URLs
+def clean_url(url):
+    if not url:
+        return ''
+    # Remove UTM parameters and other tracking codes
+    url = re.sub(r'\?utm_.*$', '', url)
+    url = re.sub(r'&utm_.*$', '', url)
+    # Remove any other query parameters if needed
+    # url = re.sub(r'\?.*$', '', url)
+    return url
+
+# Function to validate and clean image URLs
+def clean_image_url(url):
+    if not url:
+        return ''
+    
+    # Check if URL is truncated (common in Excel exports)
+    if '...' in url:
+        return ''
+    
+    # Remove @ symbol if it's at the beginning (sometimes added in Excel)
+    if url.startswith('@'):
+        url = url[1:]
+    
+    # Make sure URL has a valid scheme
+    if not url.startswith(('http://', 'https://')):
+        if url.startswith('//'):
+            url = 'https:' + url
+        else:
+            url = 'https://' + url
+    
+    # Special handling for Google images
+    if 'googleusercontent.com' in url or 'googleapis.com' in url:
+        # Fix common issues with Google image URLs
+        
+        # Ensure we're using https
+        url = url.replace('http://', 'https://')
+        
+        # Remove size restrictions that might be in the URL
+        url = re.sub(r'=s\d+', '=s800', url)  # Set to a reasonable size
+        url = re.sub(r'=w\d+', '=w800', url)
+        url = re.sub(r'=h\d+', '=h500', url)
+        
+        # Fix common issues with Google Street View images
+        if 'streetviewpixels' in url:
+            # These often need special handling
+            url = re.sub(r'\?.*$', '', url)  # Remove all query parameters
+            url = url + '?cb=1'  # Add a cache-busting parameter
+        
+        # Handle Google Maps photos
+        if 'AF1QipP' in url:
+            # These are Google Maps user-contributed photos
+            # Make sure we're using the right format
+            url = re.sub(r'=.*$', '=w800-h500', url)
+    
+    # URL decode to handle any encoded characters
+    url = unquote(url)
+    
+    return url
+
+# Function to format working hours in a user-friendly way
+def format_hours(hours_str):
+    if not hours_str:
+        return ''
+    
+    try:
+        # Try to parse the JSON-like string
+        hours_str = hours_str.replace("'", '"')  # Replace single quotes with double quotes for JSON parsing
+        hours_dict = json.loads(hours_str)
+        
+        # Format the hours in a readable way
+        formatted_hours = []
+        days_order = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        
+        for day in days_order:
+            if day in hours_dict:
+                time = hours_dict[day]
+                formatted_hours.append(f"{day}: {time}")
+        
+        return "<br>".join(formatted_hours)
+    except:
+        # If parsing fails, return the original string
+        return hours_str
+
+# Function to format about section in a user-friendly way
+def format_about(about_str):
+    if not about_str:
+        return ''
+    
+    try:
+        # Try to parse the JSON-like string
+        about_str = about_str.replace("'", '"')  # Replace single quotes with double quotes for JSON parsing
+        about_dict = json.loads(about_str)
+        
+        # Format the about information in a readable way
+        formatted_about = []
+        
+        for category, details in about_dict.items():
+            formatted_about.append(f"<strong>{category}</strong>")
+            
+            if isinstance(details, dict):
+                for feature, value in details.items():
+                    if isinstance(value, bool):
+                        value_text = "Yes" if value else "No"
+                        formatted_about.append(f"- {feature}: {value_text}")
+                    else:
+                        formatted_about.append(f"- {feature}: {value}")
+            else:
+                formatted_about.append(f"- {details}")
+        
+        return "<br>".join(formatted_about)
+    except:
+        # If parsing fails, return the original string
+        return about_str
+
+# Function to convert to URL-friendly slug
+def to_slug(text):
+    if not text:
+        return ''
+    text = text.lower()
+    text = re.sub(r'[^a-z0-9\s-]', '', text)
+    text = re.sub(r'\s+', '-', text)
+    return text
@@ -0,0 +1,145 @@
+"""
+Zip code centroids for the zip search fallback.
+Joins a table of zip code centroids with the city centroids of the search
+data, so a zip code without listings can be answered with the nearest city
+that has them (see the zip-nearby.bin file of search_index.py).
+
+The table is the Census ZCTA gazetteer file (e.g. 2020_Gaz_zcta_national.txt
+from https://www.census.gov/geographies/reference-files/time-series/geo/gazetteer-files.html)
+saved as zip-centroids.txt next to the build, or any tab- or comma-separated
+file with zip, latitude and longitude columns. Without it, the centroids of
+the three-digit zip prefixes (ZIP3 areas) are derived from the listings
+themselves, and an area without listings takes the city of the numerically
+nearest area with them (ZIP3 prefixes are assigned in geographic order), so
+every zip code gets an answer. Those answers carry no distance: the
+listings' centroid of an area is not where the searched zip code is.
+
+The nearest-neighbor join is vectorized with numpy: positions become unit
+vectors, and the closest city maximizes the dot product.
+"""
+
+import os
+import csv
+import bisect
+
+import numpy as np
+
+from search_index import EARTH_RADIUS_MILES, normalize_zip
+
+GAZETTEER_PATH = 'zip-centroids.txt'
+
+# Column names accepted for the zip code, latitude and longitude
+ZIP_COLUMNS = ('geoid', 'zcta', 'zcta5', 'zip', 'zipcode', 'zip_code', 'postal_code')
+LAT_COLUMNS = ('intptlat', 'lat', 'latitude')
+LNG_COLUMNS = ('intptlong', 'lng', 'lon', 'long', 'longitude')
+
+# Zip codes compared with all cities at once; bounds the distance matrix memory
+JOIN_CHUNK = 4096
+
+def find_column(header, names, path):
+    for index, column in enumerate(header):
+        if column.strip().lower() in names:
+            return index
+    raise ValueError(f"{path} has none of the columns {', '.join(names)}")
+
+def load_zip_centroids(path=GAZETTEER_PATH):
+    """Return (five-digit codes, latitudes, longitudes) from a zip centroid table."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        header = f.readline()
+        delimiter = '\t' if '\t' in header else ','
+        header = next(csv.reader([header], delimiter=delimiter))
+        zip_column = find_column(header, ZIP_COLUMNS, path)
+        lat_column = find_column(header, LAT_COLUMNS, path)
+        lng_column = find_column(header, LNG_COLUMNS, path)
+        codes, lats, lngs = [], [], []
+        for row in csv.reader(f, delimiter=delimiter):
+            try:
+                lat, lng = float(row[lat_column]), float(row[lng_column])
+            except (IndexError, ValueError):
+                continue
+            code = normalize_zip(row[zip_column].strip())
+            if code.isdigit():
+                codes.append(code)
+                lats.append(lat)
+                lngs.append(lng)
+    return codes, np.array(lats), np.array(lngs)
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def listing_zip3_centroids(postal_codes, lats, lngs):
+    """Return (ZIP3 prefixes, latitudes, longitudes): the mean listing position per ZIP3 area."""
+    codes = np.array([normalize_zip(code)[:3] if code != '' else '' for code in postal_codes], dtype=str)
+    lats = np.array([to_float(lat) for lat in lats])
+    lngs = np.array([to_float(lng) for lng in lngs])
+    valid = (np.char.str_len(codes) == 3) & np.char.isdigit(codes) & ~np.isnan(lats) & ~np.isnan(lngs)
+    prefixes, groups = np.unique(codes[valid], return_inverse=True)
+    counts = np.bincount(groups)
+    return ([str(prefix) for prefix in prefixes], np.bincount(groups, lats[valid]) / counts, np.bincount(groups, lngs[valid]) / counts)
+
+def fill_zip3_areas(prefixes, city_ids):
+    """Return (every ZIP3 prefix 000-999, city ids), taking an area without listings from the numerically nearest one."""
+    numbers = [int(prefix) for prefix in prefixes]
+    filled = []
+    for number in range(1000):
+        i = bisect.bisect_left(numbers, number)
+        # Ties go to the lower prefix
+        nearest = min((j for j in (i - 1, i) if 0 <= j < len(numbers)), key=lambda j: abs(numbers[j] - number))
+        filled.append(city_ids[nearest])
+    return [f'{number:03d}' for number in range(1000)], filled
+
+def unit_vectors(lats, lngs):
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    return np.column_stack((np.cos(lats) * np.cos(lngs), np.cos(lats) * np.sin(lngs), np.sin(lats)))
+
+def nearest_points(lats, lngs, target_lats, target_lngs):
+    """Return (index of the nearest target, distance in miles) for every point."""
+    points, targets = unit_vectors(lats, lngs), unit_vectors(target_lats, target_lngs)
+    nearest = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), JOIN_CHUNK):
+        nearest[start:start + JOIN_CHUNK] = (points[start:start + JOIN_CHUNK] @ targets.T).argmax(axis=1)
+    # The chord between the unit vectors is 2 sin(angle / 2), which stays
+    # accurate for the short distances where arccos of the dot product is not
+    chords = np.linalg.norm(points - targets[nearest], axis=1)
+    return nearest, 2 * EARTH_RADIUS_MILES * np.arcsin(np.minimum(chords / 2, 1.0))
+
+def nearby_zips(search_data, path=GAZETTEER_PATH, listings=None):
+    """Map zip codes to their nearest city with listings.
+
+    Reads the centroid table at path if it exists, else derives ZIP3 centroids
+    from listings, a (postal codes, latitudes, longitudes) triple of the
+    company data. Returns {"digits", "code", "city", "miles"} with the zip
+    codes (or every ZIP3 prefix when digits is 3, with miles None) and the
+    city ids of search_data, or None when neither source or no city centroid
+    is available.
+    """
+    cities = search_data['cities']
+    city_ids = [city_id for city_id, (lat, lng) in enumerate(zip(cities.get('lat', []), cities.get('lng', [])))
+                if lat is not None and lng is not None]
+    if not city_ids:
+        return None
+    if path and os.path.isfile(path):
+        codes, lats, lngs = load_zip_centroids(path)
+        digits = 5
+    elif listings is not None:
+        codes, lats, lngs = listing_zip3_centroids(*listings)
+        digits = 3
+    else:
+        return None
+    if not codes:
+        return None
+
+    nearest, miles = nearest_points(lats, lngs, [cities['lat'][city_id] for city_id in city_ids],
+                                    [cities['lng'][city_id] for city_id in city_ids])
+    if digits == 3:
+        codes, nearest_cities = fill_zip3_areas(codes, [city_ids[index] for index in nearest])
+        return {'digits': 3, 'code': codes, 'city': nearest_cities, 'miles': [None] * len(codes)}
+    return {
+        'digits': digits,
+        'code': codes,
+        'city': [city_ids[index] for index in nearest],
+        'miles': [float(distance) for distance in miles],
+    }